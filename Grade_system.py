@@ -4,10 +4,35 @@ import sqlite3
 from datetime import datetime
 import csv
 import os
-import hashlib
-import secrets
+from concurrent.futures import ThreadPoolExecutor
+from password_hasher import PasswordHasher, calibrate, make_scheme, DEFAULT_SCHEME
+from reference_cache import ReferenceCache
+from ranking import RankCache
+from report_cache import ReportCache
+from chart_canvas import HistogramChart, TrendChart
+import result_analytics
+import back_papers
+import promotion
+import moderation
+import grade_history
+from change_bus import ChangeBus, INSERT, UPDATE, DELETE
+from tree_binder import TreeviewBinder
+from backup_manager import (BackupManager, DEFAULT_BACKUP_DIR, DEFAULT_INTERVAL_HOURS, DEFAULT_KEEP_COUNT,
+                            DEFAULT_KEEP_DAYS, DEFAULT_INCREMENTAL_MINUTES)
+from change_journal import (JOURNALED_TABLES, JournalGapError, changes_since, compact, current_seq,
+                            install_change_journal)
+from perf_monitor import EventLoopLagMonitor, process_rss_bytes, file_size, format_bytes, ratio_text
+import grading
+import incremental_export
+import queries
+import query_stats
+import schema
 
 class ProfessionalCollegeGradeSystem:
+    PERF_REFRESH_MS = 2000  # Performance panel refresh interval
+    BACKUP_CHECK_MS = 60000  # How often the backup scheduler checks whether a backup is due
+    JOURNAL_POLL_MS = 3000  # How often to look for writes committed by other processes
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Professional College Grade Management System")
@@ -20,6 +45,10 @@ class ProfessionalCollegeGradeSystem:
         self.login_attempts = 0
         self.max_login_attempts = 3
         self.locked_out = False
+        self.login_in_progress = False
+        
+        # Worker threads for slow jobs (password hashing) that must not block Tk
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="grade-system")
         
         # Style configuration
         self.setup_styles()
@@ -27,6 +56,9 @@ class ProfessionalCollegeGradeSystem:
         # Initialize database (including security tables)
         self.init_database()
         
+        # Scheduled online backups run on a worker thread
+        self.setup_backups()
+        
         # Show login screen first
         self.show_login_screen()
         
@@ -146,9 +178,13 @@ class ProfessionalCollegeGradeSystem:
                 status_label.config(text="Security answer incorrect!")
                 return
             
-            # Reset password
-            salt = secrets.token_hex(16)
-            hashed_password = hashlib.sha256((new_pass + salt).encode()).hexdigest()
+            # Hash the new password on a worker thread, then store it
+            status_label.config(text="Updating password...")
+            reset_button.config(state="disabled")
+            self.run_in_background(self.password_hasher.hash, new_pass, on_done=store_password)
+        
+        def store_password(hashed):
+            hashed_password, salt = hashed
             
             self.cursor.execute('''
                 UPDATE admin_users SET password_hash=?, salt=?, last_password_change=?
@@ -163,11 +199,15 @@ class ProfessionalCollegeGradeSystem:
             messagebox.showinfo("Success", "Password reset successfully!\nYou can now login with the new password.")
             dialog.destroy()
         
-        ttk.Button(dialog, text="🔄 Reset Password", command=reset_password).pack(pady=10)
+        reset_button = ttk.Button(dialog, text="🔄 Reset Password", command=reset_password)
+        reset_button.pack(pady=10)
         ttk.Button(dialog, text="❌ Cancel", command=dialog.destroy).pack(pady=5)
         
     def login(self):
         """Handle login authentication"""
+        if self.login_in_progress:
+            return
+        
         if self.locked_out:
             self.login_status_label.config(text="Account locked. Please contact system administrator.")
             return
@@ -201,22 +241,51 @@ class ProfessionalCollegeGradeSystem:
             self.locked_out = True
             return
         
-        # Verify password
-        hashed_input = hashlib.sha256((password + salt).encode()).hexdigest()
+        # Verify password on a worker thread so the login screen stays responsive
+        self.login_in_progress = True
+        self.login_status_label.config(text="Verifying credentials...")
+        self.run_in_background(self.password_hasher.verify_and_upgrade, password, salt, db_password_hash,
+                               on_done=lambda result: self.finish_login(username, result),
+                               on_error=self.login_failed_with_error)
+    
+    def login_failed_with_error(self, error):
+        """Report an unexpected error from password verification"""
+        self.login_in_progress = False
+        self.login_status_label.config(text=f"Login error: {str(error)}")
+    
+    def finish_login(self, username, result):
+        """Complete login once the password has been verified"""
+        self.login_in_progress = False
+        verified, upgrade = result
         
-        if hashed_input == db_password_hash:
+        if verified:
             # Successful login
             self.logged_in = True
             self.admin_username = username
             self.login_attempts = 0
             
+            # Grade history records this user as the author of grade changes
+            grade_history.set_changed_by(self.conn, username)
+            
             # Update last login
             self.cursor.execute('''
                 UPDATE admin_users SET last_login=?, login_attempts=0 
                 WHERE username=?
             ''', (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), username))
+            
+            # Transparently move legacy or under-cost hashes to the current scheme
+            if upgrade:
+                new_hash, new_salt = upgrade
+                self.cursor.execute('''
+                    UPDATE admin_users SET password_hash=?, salt=? WHERE username=?
+                ''', (new_hash, new_salt, username))
+            
             self.conn.commit()
             
+            if upgrade:
+                self.log_security_event("PASSWORD_REHASHED",
+                                        f"Password hash upgraded to {self.password_hasher.scheme.name} for user: {username}")
+            
             # Log successful login
             self.log_security_event("LOGIN_SUCCESS", f"Successful login for user: {username}")
             
@@ -274,6 +343,9 @@ class ProfessionalCollegeGradeSystem:
         self.theory_grade_tab = ttk.Frame(self.notebook)
         self.practical_grade_tab = ttk.Frame(self.notebook)
         self.student_report_tab = ttk.Frame(self.notebook)
+        self.rank_tab = ttk.Frame(self.notebook)
+        self.analytics_tab = ttk.Frame(self.notebook)
+        self.back_paper_tab = ttk.Frame(self.notebook)
         self.admin_tab = ttk.Frame(self.notebook)  # New admin tab
         
         self.notebook.add(self.department_tab, text="🏛️ Department Setup")
@@ -283,8 +355,16 @@ class ProfessionalCollegeGradeSystem:
         self.notebook.add(self.theory_grade_tab, text="📖 Theory Grade Entry")
         self.notebook.add(self.practical_grade_tab, text="🔬 Practical Grade Entry")
         self.notebook.add(self.student_report_tab, text="📊 Student Report")
+        self.notebook.add(self.rank_tab, text="🏆 Rank List")
+        self.notebook.add(self.analytics_tab, text="📈 Result Analytics")
+        self.notebook.add(self.back_paper_tab, text="📝 Back Papers")
         self.notebook.add(self.admin_tab, text="⚙️ Admin Settings")  # New admin tab
         
+        # Measure UI responsiveness for the performance panel
+        self.loop_monitor = EventLoopLagMonitor(self.root)
+        self.loop_monitor.start()
+        self.perf_job = None
+        
         # Setup all tabs
         self.setup_department_tab()
         self.setup_section_tab()
@@ -293,6 +373,9 @@ class ProfessionalCollegeGradeSystem:
         self.setup_theory_grade_tab()
         self.setup_practical_grade_tab()
         self.setup_student_report_tab()
+        self.setup_rank_tab()
+        self.setup_analytics_tab()
+        self.setup_back_paper_tab()
         self.setup_admin_tab()  # Setup admin tab
         
         # Load initial data
@@ -300,6 +383,13 @@ class ProfessionalCollegeGradeSystem:
         self.load_sections()
         self.load_subjects()
         self.load_students()
+        self.load_student_combos()
+        
+        # Route change events to the tabs that display the affected rows
+        self.setup_change_subscriptions()
+        
+        # Pick up writes from other processes through the change journal
+        self.start_journal_polling()
         
     def create_header(self):
         """Create header with user info and controls"""
@@ -338,9 +428,13 @@ class ProfessionalCollegeGradeSystem:
             self.log_security_event("LOGOUT", f"User {self.admin_username} logged out")
             
             # Destroy main application and show login screen
+            self.change_bus.unsubscribe_owner("ui")
+            self.stop_performance_monitoring()
+            self.stop_journal_polling()
             self.main_frame.destroy()
             self.logged_in = False
             self.admin_username = ""
+            grade_history.set_changed_by(self.conn, None)
             self.login_attempts = 0
             self.locked_out = False
             self.show_login_screen()
@@ -363,162 +457,78 @@ class ProfessionalCollegeGradeSystem:
         
     def init_database(self):
         """Initialize SQLite database with professional structure and security tables"""
-        self.conn = sqlite3.connect('professional_college_system.db')
+        # Every statement is timed; slow ones are logged with their query plan
+        self.db_path = 'professional_college_system.db'
+        self.query_stats = query_stats.QueryStats(log_path='slow_queries.log')
+        self.conn = query_stats.connect(self.db_path, self.query_stats)
         self.cursor = self.conn.cursor()
         
-        # Create admin users table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS admin_users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                salt TEXT NOT NULL,
-                full_name TEXT,
-                email TEXT,
-                is_locked INTEGER DEFAULT 0,
-                login_attempts INTEGER DEFAULT 0,
-                last_login TIMESTAMP,
-                last_password_change TIMESTAMP,
-                lockout_time TIMESTAMP,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create security logs table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS security_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                description TEXT NOT NULL,
-                username TEXT,
-                ip_address TEXT DEFAULT 'localhost',
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        # Write-ahead logging: readers (backups, stats) do not block grade entry
+        self.cursor.execute("PRAGMA journal_mode=WAL")
         
-        # Create departments table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS departments (
-                dept_id TEXT PRIMARY KEY,
-                dept_name TEXT NOT NULL,
-                hod_name TEXT,
-                established_year INTEGER,
-                total_students INTEGER DEFAULT 0,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        schema.create_tables(self.cursor)
+        schema.create_indexes(self.cursor)
+        self.conn.commit()
         
-        # Create sections table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sections (
-                section_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                section_name TEXT NOT NULL,
-                department TEXT NOT NULL,
-                semester INTEGER NOT NULL,
-                batch INTEGER NOT NULL,
-                class_teacher TEXT,
-                room_number TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (department) REFERENCES departments(dept_id),
-                UNIQUE(section_name, department, semester, batch)
-            )
-        ''')
+        # Keep department and section student totals maintained by triggers
+        self.setup_student_counters()
         
-        # Create subjects table with enhanced fields if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS subjects (
-                subject_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                subject_code TEXT UNIQUE NOT NULL,
-                subject_name TEXT NOT NULL,
-                credits INTEGER NOT NULL,
-                semester INTEGER NOT NULL,
-                department TEXT NOT NULL,
-                subject_type TEXT NOT NULL,  -- Theory/Practical
-                max_marks INTEGER DEFAULT 100,
-                min_pass_marks INTEGER DEFAULT 40,
-                teaching_hours INTEGER,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (department) REFERENCES departments(dept_id)
-            )
-        ''')
+        # Per-table row counts for the System Info tab, also trigger-maintained
+        schema.install_row_counters(self.cursor)
+        self.conn.commit()
         
-        # Create students table with section field if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS students (
-                student_id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                department TEXT NOT NULL,
-                batch INTEGER NOT NULL,
-                current_semester INTEGER DEFAULT 1,
-                section TEXT,
-                email TEXT,
-                phone TEXT,
-                address TEXT,
-                blood_group TEXT,
-                admission_date DATE,
-                status TEXT DEFAULT 'Active',
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (department) REFERENCES departments(dept_id),
-                FOREIGN KEY (section) REFERENCES sections(section_name)
-            )
-        ''')
+        # Per-student semester results (SGPA) for rank lists, trigger-maintained
+        schema.install_semester_results(self.cursor)
+        self.conn.commit()
         
-        # Create theory grades table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS theory_grades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT NOT NULL,
-                subject_code TEXT NOT NULL,
-                semester INTEGER NOT NULL,
-                academic_year TEXT,
-                internal1_marks REAL DEFAULT 0,    -- First Internal (20 marks)
-                internal2_marks REAL DEFAULT 0,    -- Second Internal (20 marks)
-                presentation_marks REAL DEFAULT 0, -- Presentation (10 marks)
-                assignment1_marks REAL DEFAULT 0,  -- Assignment 1 (5 marks)
-                assignment2_marks REAL DEFAULT 0,  -- Assignment 2 (5 marks)
-                external_marks REAL DEFAULT 0,     -- External (60 marks)
-                total_marks REAL DEFAULT 0,
-                grade TEXT,
-                grade_point REAL DEFAULT 0,
-                result_status TEXT,
-                back_paper INTEGER DEFAULT 0,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students(student_id),
-                FOREIGN KEY (subject_code) REFERENCES subjects(subject_code),
-                UNIQUE(student_id, subject_code, semester)
-            )
-        ''')
+        # Per-student report versions for the report cache, trigger-maintained
+        schema.install_student_versions(self.cursor)
+        self.conn.commit()
         
-        # Create practical grades table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS practical_grades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT NOT NULL,
-                subject_code TEXT NOT NULL,
-                semester INTEGER NOT NULL,
-                academic_year TEXT,
-                lab_copies_marks REAL DEFAULT 0,    -- Lab Copies (20 marks)
-                viva_marks REAL DEFAULT 0,          -- Viva (20 marks)
-                practical_exam_marks REAL DEFAULT 0, -- Practical Exam (60 marks)
-                total_marks REAL DEFAULT 0,
-                grade TEXT,
-                grade_point REAL DEFAULT 0,
-                result_status TEXT,
-                back_paper INTEGER DEFAULT 0,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students(student_id),
-                FOREIGN KEY (subject_code) REFERENCES subjects(subject_code),
-                UNIQUE(student_id, subject_code, semester)
-            )
-        ''')
+        # Append-only grade history; snapshots bound point-in-time reconstruction
+        grade_history.install_grade_history(self.cursor)
+        grade_history.take_snapshots(self.conn)
+        self.conn.commit()
         
+        # Journal of changed rows, used for incremental backups
+        install_change_journal(self.cursor)
         self.conn.commit()
         
+        self.query_stats.slow_ms = float(self.get_setting("slow_query_ms", query_stats.DEFAULT_SLOW_MS))
+        
+        # Password hashing must be ready before the default admin is created
+        self.setup_password_hasher()
+        
         # Initialize admin user if not exists
         self.initialize_admin_user()
         
         # Check if database is empty and insert sample data only if needed
         self.insert_sample_data_if_empty()
+        
+        # Writes publish change events; views and caches subscribe to them
+        self.change_bus = ChangeBus()
+        
+        # In-process cache of departments, sections and subjects for UI lookups
+        self.ref_cache = ReferenceCache(self.conn)
+        self.dept_combo_generation = -1
+        self.subject_combo_generation = -1
+        for entity, table in (("department", "departments"), ("section", "sections"), ("subject", "subjects")):
+            self.change_bus.subscribe(entity, lambda event, table=table: self.ref_cache.invalidate(table))
+        
+        # Rank lists, revalidated against result_scope_versions on each lookup
+        self.rank_cache = RankCache(self.conn)
+        
+        # Student report models, revalidated against student_grade_versions on each lookup
+        self.report_cache = ReportCache(self.conn)
+    
+    def setup_student_counters(self):
+        """Create triggers that keep departments/sections.total_students accurate"""
+        schema.install_student_counters(self.cursor)
+        self.conn.commit()
+    
+    def reconcile_student_counters(self):
+        """Recount department and section totals from the students table"""
+        schema.reconcile_student_counters(self.cursor)
     
     def initialize_admin_user(self):
         """Initialize default admin user if not exists"""
@@ -527,9 +537,8 @@ class ProfessionalCollegeGradeSystem:
         
         if admin_count == 0:
             # Create default admin user with password "admin123"
-            salt = secrets.token_hex(16)
             default_password = "admin123"
-            hashed_password = hashlib.sha256((default_password + salt).encode()).hexdigest()
+            hashed_password, salt = self.password_hasher.hash(default_password)
             
             self.cursor.execute('''
                 INSERT INTO admin_users 
@@ -541,6 +550,72 @@ class ProfessionalCollegeGradeSystem:
             self.conn.commit()
             print("Default admin user created with password: admin123")
     
+    def get_setting(self, key, default=None):
+        """Read a value from the system settings table"""
+        self.cursor.execute("SELECT setting_value FROM system_settings WHERE setting_key=?", (key,))
+        row = self.cursor.fetchone()
+        return row[0] if row else default
+    
+    def set_setting(self, key, value):
+        """Store a value in the system settings table"""
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO system_settings (setting_key, setting_value, updated_at)
+            VALUES (?, ?, ?)
+        ''', (key, str(value), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        self.conn.commit()
+    
+    def setup_password_hasher(self):
+        """Create the password hasher from stored settings, calibrating on first run"""
+        scheme_name = self.get_setting("password_scheme", DEFAULT_SCHEME)
+        cost = self.get_setting("password_cost")
+        
+        if cost is None:
+            # Use the default cost now and store a host-specific one once measured
+            self.password_hasher = PasswordHasher(make_scheme(scheme_name))
+            self.calibrate_password_hasher(scheme_name, notify=False)
+        else:
+            self.password_hasher = PasswordHasher(make_scheme(scheme_name, int(cost)))
+    
+    def calibrate_password_hasher(self, scheme_name=None, notify=True):
+        """Measure the KDF cost that hits the target login latency on this host"""
+        scheme_name = scheme_name or self.password_hasher.scheme.name
+        target_ms = float(self.get_setting("password_target_ms", 250))
+        
+        def store_calibration(scheme):
+            self.password_hasher = PasswordHasher(scheme)
+            self.set_setting("password_scheme", scheme.name)
+            self.set_setting("password_cost", scheme.cost)
+            if notify:
+                messagebox.showinfo("Calibration Complete",
+                                    f"Password hashing calibrated for ~{target_ms:.0f} ms per login.\n"
+                                    f"Scheme: {scheme.name}\nCost: {scheme.cost}")
+        
+        self.run_in_background(calibrate, scheme_name, target_ms / 1000, on_done=store_calibration)
+    
+    def run_in_background(self, func, *args, on_done=None, on_error=None):
+        """Run func(*args) on a worker thread and deliver the result on the Tk thread"""
+        future = self.executor.submit(func, *args)
+        self.root.after(20, self._poll_background, future, on_done, on_error)
+        return future
+    
+    def _poll_background(self, future, on_done, on_error):
+        """Wait for a background job without blocking the event loop"""
+        if not future.done():
+            self.root.after(20, self._poll_background, future, on_done, on_error)
+            return
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                messagebox.showerror("Error", f"Background task failed: {str(e)}")
+            return
+        
+        if on_done:
+            on_done(result)
+    
     def log_security_event(self, event_type, description):
         """Log security events to database"""
         try:
@@ -619,6 +694,7 @@ class ProfessionalCollegeGradeSystem:
         # Treeview for admin users
         columns = ("username", "full_name", "email", "last_login", "login_attempts", "is_locked")
         self.admin_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=15)
+        self.admin_binder = TreeviewBinder(self.admin_tree)
         
         headings = {
             "username": "Username",
@@ -668,8 +744,8 @@ class ProfessionalCollegeGradeSystem:
         ttk.Label(filter_frame, text="Event Type:").pack(side=tk.LEFT, padx=5)
         self.event_type_combo = ttk.Combobox(filter_frame, width=15, 
                                            values=["All", "LOGIN_SUCCESS", "LOGIN_FAILED", "LOGOUT", 
-                                                  "PASSWORD_RESET", "ACCOUNT_LOCKED", "USER_CREATED", 
-                                                  "USER_DELETED"])
+                                                  "PASSWORD_RESET", "PASSWORD_REHASHED", "ACCOUNT_LOCKED", 
+                                                  "USER_CREATED", "USER_DELETED"])
         self.event_type_combo.pack(side=tk.LEFT, padx=5)
         self.event_type_combo.set("All")
         
@@ -688,6 +764,7 @@ class ProfessionalCollegeGradeSystem:
         # Treeview for security logs
         columns = ("timestamp", "event_type", "username", "description")
         self.security_tree = ttk.Treeview(parent, columns=columns, show="headings", height=20)
+        self.security_binder = TreeviewBinder(self.security_tree)
         
         headings = {
             "timestamp": "Timestamp",
@@ -715,8 +792,11 @@ class ProfessionalCollegeGradeSystem:
     
     def setup_system_info_tab(self, parent):
         """Setup system information tab"""
-        info_frame = ttk.LabelFrame(parent, text="System Information", padding="20")
-        info_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        top_frame = ttk.Frame(parent)
+        top_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        info_frame = ttk.LabelFrame(top_frame, text="System Information", padding="20")
+        info_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
         
         # Database info
         ttk.Label(info_frame, text="Database Information", font=('Arial', 12, 'bold')).grid(row=0, column=0, sticky=tk.W, pady=10)
@@ -724,12 +804,16 @@ class ProfessionalCollegeGradeSystem:
         # Get database statistics
         stats = self.get_database_stats()
         
+        self.system_info_labels = {}
         row = 1
         for key, value in stats.items():
             ttk.Label(info_frame, text=f"{key}:", font=('Arial', 10, 'bold')).grid(row=row, column=0, sticky=tk.W, pady=2, padx=5)
-            ttk.Label(info_frame, text=str(value)).grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
+            self.system_info_labels[key] = ttk.Label(info_frame, text=str(value))
+            self.system_info_labels[key].grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
             row += 1
         
+        self.setup_performance_frame(top_frame)
+        
         # System actions
         action_frame = ttk.LabelFrame(parent, text="System Actions", padding="20")
         action_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -737,75 +821,213 @@ class ProfessionalCollegeGradeSystem:
         ttk.Button(action_frame, text="🔄 Refresh Statistics", command=self.refresh_system_info).pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="💾 Backup Database", command=self.backup_database).pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="🧹 Clear Old Logs", command=self.clear_old_logs).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="⏱️ Calibrate Password Hashing", 
+                  command=self.calibrate_password_hasher).pack(side=tk.LEFT, padx=5)
+        
+        # Progress of the running backup (scheduled or manual)
+        self.backup_status_label = ttk.Label(action_frame, text="")
+        self.backup_status_label.pack(side=tk.RIGHT, padx=5)
+        self.backup_progress = ttk.Progressbar(action_frame, length=150, mode='determinate')
+        self.backup_progress.pack(side=tk.RIGHT, padx=5)
+        
+        self.setup_query_stats_frame(parent)
+    
+    def setup_performance_frame(self, parent):
+        """Live performance figures, refreshed on a timer while visible"""
+        self.perf_frame = ttk.LabelFrame(parent, text="Performance", padding="20")
+        self.perf_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
+        
+        self.perf_labels = {}
+        for row, key in enumerate(["Database File", "WAL File", "Page Cache", "Query Latency",
+                                   "Statements Executed", "Reference Cache Hits", "Report Cache Hits",
+                                   "Event Loop Lag", "Process Memory", "Last Backup"]):
+            ttk.Label(self.perf_frame, text=f"{key}:", font=('Arial', 10, 'bold')).grid(row=row, column=0, sticky=tk.W, pady=2, padx=5)
+            self.perf_labels[key] = ttk.Label(self.perf_frame, text="...")
+            self.perf_labels[key].grid(row=row, column=1, sticky=tk.W, pady=2, padx=5)
+        
+        self.refresh_performance_panel()
+    
+    def get_performance_stats(self):
+        """Cheap performance figures: file sizes, pragmas and in-memory counters only"""
+        stats = {}
+        stats["Database File"] = format_bytes(file_size(self.db_path))
+        stats["WAL File"] = format_bytes(file_size(self.db_path + "-wal"))
+        
+        # Python's sqlite3 does not expose sqlite3_db_status, so the page cache
+        # hit rate is not available; show the configured cache instead
+        cache_size = self.conn.execute("PRAGMA cache_size").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        cache_bytes = -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+        stats["Page Cache"] = f"{format_bytes(cache_bytes)} configured (hit rate not exposed by sqlite3 module)"
+        
+        calls, p50, p95, p99 = self.query_stats.overall()
+        stats["Query Latency"] = f"p50 {p50:g} ms / p95 {p95:g} ms / p99 {p99:g} ms" if calls else "No queries yet"
+        stats["Statements Executed"] = f"{calls} ({len(self.query_stats.slow_queries)} slow)"
+        stats["Reference Cache Hits"] = ratio_text(self.ref_cache.hits, self.ref_cache.misses)
+        stats["Report Cache Hits"] = ratio_text(self.report_cache.hits, self.report_cache.misses)
+        
+        lag = self.loop_monitor.summary()
+        stats["Event Loop Lag"] = f"p50 {lag[0]:.1f} ms / p95 {lag[1]:.1f} ms / max {lag[2]:.1f} ms" if lag else "Measuring..."
+        stats["Process Memory"] = format_bytes(process_rss_bytes())
+        last_backup = BackupManager.last_backup(self.conn)
+        stats["Last Backup"] = f"{last_backup[0]} ({last_backup[1]})" if last_backup else "Never"
+        return stats
+    
+    def refresh_performance_panel(self):
+        """Update the performance labels and schedule the next refresh"""
+        if self.perf_frame.winfo_viewable():
+            for key, value in self.get_performance_stats().items():
+                self.perf_labels[key].config(text=value)
+        self.perf_job = self.root.after(self.PERF_REFRESH_MS, self.refresh_performance_panel)
+    
+    def stop_performance_monitoring(self):
+        if self.perf_job is not None:
+            self.root.after_cancel(self.perf_job)
+            self.perf_job = None
+        self.loop_monitor.stop()
+    
+    def setup_query_stats_frame(self, parent):
+        """Per-statement latency table and slow query controls"""
+        query_frame = ttk.LabelFrame(parent, text="Query Statistics", padding="10")
+        query_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        controls = ttk.Frame(query_frame)
+        controls.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(controls, text="Slow query threshold (ms):").pack(side=tk.LEFT, padx=5)
+        self.slow_query_entry = ttk.Entry(controls, width=8)
+        self.slow_query_entry.insert(0, f"{self.query_stats.slow_ms:g}")
+        self.slow_query_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Apply", command=self.apply_slow_query_threshold).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="🐢 Slow Queries", command=self.show_slow_queries).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="🧹 Reset", command=self.reset_query_stats).pack(side=tk.LEFT, padx=5)
+        
+        columns = ("calls", "mean", "p50", "p95", "max", "total", "rows", "call_site", "statement")
+        self.query_stats_tree = ttk.Treeview(query_frame, columns=columns, show="headings", height=8)
+        self.query_stats_binder = TreeviewBinder(self.query_stats_tree)
+        
+        headings = {
+            "calls": "Calls",
+            "mean": "Mean ms",
+            "p50": "p50 ms",
+            "p95": "p95 ms",
+            "max": "Max ms",
+            "total": "Total ms",
+            "rows": "Rows",
+            "call_site": "Top Call Site",
+            "statement": "Statement"
+        }
+        
+        for col, text in headings.items():
+            self.query_stats_tree.heading(col, text=text)
+            self.query_stats_tree.column(col, width=70)
+        
+        self.query_stats_tree.column("call_site", width=200)
+        self.query_stats_tree.column("statement", width=400)
+        self.query_stats_tree.pack(fill=tk.BOTH, expand=True)
+        
+        self.load_query_stats()
+    
+    def load_query_stats(self):
+        """Show statements ordered by total time spent in them"""
+        self.query_stats_binder.set_rows(
+            (index, (stats.calls, f"{stats.mean_ms:.2f}", f"{stats.percentile(0.5):g}",
+                     f"{stats.percentile(0.95):g}", f"{stats.max_ms:.2f}", f"{stats.total_ms:.1f}",
+                     stats.rows, stats.top_call_site(), stats.sql[:200]))
+            for index, stats in enumerate(self.query_stats.snapshot(limit=100))
+        )
+    
+    def apply_slow_query_threshold(self):
+        """Change and persist the slow query threshold"""
+        try:
+            slow_ms = float(self.slow_query_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the threshold in milliseconds!")
+            return
+        
+        self.query_stats.slow_ms = slow_ms
+        self.set_setting("slow_query_ms", slow_ms)
+        messagebox.showinfo("Success", f"Statements slower than {slow_ms:g} ms will be logged.")
+    
+    def reset_query_stats(self):
+        self.query_stats.reset()
+        self.load_query_stats()
+    
+    def show_slow_queries(self):
+        """Show recent slow statements with their query plans"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Slow Queries")
+        dialog.geometry("800x500")
+        dialog.transient(self.root)
+        
+        text = tk.Text(dialog, wrap=tk.WORD, font=('Courier', 9))
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        if not self.query_stats.slow_queries:
+            text.insert(tk.END, f"No statements slower than {self.query_stats.slow_ms:g} ms yet.")
+        
+        for entry in reversed(self.query_stats.slow_queries):
+            text.insert(tk.END, f"[{entry['time']}] {entry['elapsed_ms']:.1f} ms, {entry['rows']} rows, {entry['call_site']}\n")
+            text.insert(tk.END, f"{entry['sql']}\n")
+            for line in entry['plan']:
+                text.insert(tk.END, f"    {line}\n")
+            text.insert(tk.END, "\n")
+        
+        text.config(state=tk.DISABLED)
+        ttk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=5)
     
     def load_admin_users(self):
         """Load admin users into treeview"""
-        for item in self.admin_tree.get_children():
-            self.admin_tree.delete(item)
-        
         self.cursor.execute('''
             SELECT username, full_name, email, last_login, login_attempts, is_locked
             FROM admin_users
             ORDER BY username
         ''')
         
-        users = self.cursor.fetchall()
-        for user in users:
-            # Convert locked status to text
-            user_list = list(user)
-            user_list[5] = "Yes" if user[5] else "No"
-            self.admin_tree.insert("", tk.END, values=user_list)
+        # Convert locked status to text
+        self.admin_binder.set_rows(
+            (user[0], user[:5] + ("Yes" if user[5] else "No",)) for user in self.cursor.fetchall()
+        )
     
     def load_security_logs(self, event_type="All", date_from=None, date_to=None):
         """Load security logs with filtering"""
-        for item in self.security_tree.get_children():
-            self.security_tree.delete(item)
-        
-        query = '''
-            SELECT timestamp, event_type, username, description
-            FROM security_logs
-            WHERE 1=1
-        '''
+        query = queries.SECURITY_LOG_LIST
         params = []
         
         event_type_filter = self.event_type_combo.get()
         if event_type_filter != "All":
-            query += " AND event_type = ?"
+            query += queries.SECURITY_LOG_EVENT_FILTER
             params.append(event_type_filter)
         
         date_from = self.date_from_entry.get().strip()
         date_to = self.date_to_entry.get().strip()
         
         if date_from:
-            query += " AND DATE(timestamp) >= ?"
+            query += queries.SECURITY_LOG_FROM_FILTER
             params.append(date_from)
         
         if date_to:
-            query += " AND DATE(timestamp) <= ?"
+            query += queries.SECURITY_LOG_TO_FILTER
             params.append(date_to)
         
-        query += " ORDER BY timestamp DESC LIMIT 1000"
+        query += queries.SECURITY_LOG_ORDER
         
         self.cursor.execute(query, params)
-        logs = self.cursor.fetchall()
-        
-        for log in logs:
-            self.security_tree.insert("", tk.END, values=log)
+        self.security_binder.set_rows((log[0], log[1:]) for log in self.cursor.fetchall())
     
     def get_database_stats(self):
         """Get database statistics"""
         stats = {}
         
-        # Table counts
-        tables = ['departments', 'sections', 'subjects', 'students', 'theory_grades', 'practical_grades', 'admin_users', 'security_logs']
+        # Table counts from maintained counters (no COUNT(*) scans)
+        counts = schema.table_row_counts(self.cursor)
         
-        for table in tables:
-            try:
-                self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = self.cursor.fetchone()[0]
-                stats[f"{table.capitalize()}"] = count
-            except:
+        for table in schema.COUNTED_TABLES:
+            if table not in counts:
                 stats[f"{table.capitalize()}"] = "N/A"
+                continue
+            count, exact = counts[table]
+            stats[f"{table.capitalize()}"] = f"{count:,}" if exact else f"~{count:,} (approximate)"
         
         # Database size
         try:
@@ -815,9 +1037,6 @@ class ProfessionalCollegeGradeSystem:
         except:
             stats["Database Size"] = "Unknown"
         
-        # Last backup (placeholder)
-        stats["Last Backup"] = "Never"
-        
         return stats
     
     def add_admin_user(self):
@@ -840,9 +1059,13 @@ class ProfessionalCollegeGradeSystem:
             messagebox.showerror("Error", "Password must be at least 4 characters!")
             return
         
-        # Hash password
-        salt = secrets.token_hex(16)
-        hashed_password = hashlib.sha256((password + salt).encode()).hexdigest()
+        # Hash password on a worker thread, then insert the user
+        self.run_in_background(self.password_hasher.hash, password,
+                               on_done=lambda hashed: self.insert_admin_user(username, full_name, email, hashed))
+    
+    def insert_admin_user(self, username, full_name, email, hashed):
+        """Insert a new admin user once the password hash is ready"""
+        hashed_password, salt = hashed
         
         try:
             self.cursor.execute('''
@@ -889,18 +1112,25 @@ class ProfessionalCollegeGradeSystem:
                 messagebox.showerror("Error", "Password must be at least 4 characters!")
                 return
             
-            salt = secrets.token_hex(16)
-            hashed_password = hashlib.sha256((password + salt).encode()).hexdigest()
+            # Hash on a worker thread and apply the update when it is ready
+            def apply_with_password(hashed):
+                hashed_password, salt = hashed
+                self.apply_admin_user_update(
+                    username,
+                    update_fields + ["password_hash = ?", "salt = ?", "last_password_change = ?"],
+                    params + [hashed_password, salt, datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
             
-            update_fields.append("password_hash = ?")
-            update_fields.append("salt = ?")
-            update_fields.append("last_password_change = ?")
-            params.extend([hashed_password, salt, datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+            self.run_in_background(self.password_hasher.hash, password, on_done=apply_with_password)
+            return
         
         if not update_fields:
             messagebox.showinfo("Info", "No changes to update!")
             return
         
+        self.apply_admin_user_update(username, update_fields, params)
+    
+    def apply_admin_user_update(self, username, update_fields, params):
+        """Write admin user changes to the database"""
         update_query = f"UPDATE admin_users SET {', '.join(update_fields)} WHERE username = ?"
         params.append(username)
         
@@ -998,11 +1228,7 @@ class ProfessionalCollegeGradeSystem:
             )
             
             if filename:
-                self.cursor.execute('''
-                    SELECT timestamp, event_type, username, description
-                    FROM security_logs
-                    ORDER BY timestamp DESC
-                ''')
+                self.cursor.execute(queries.SECURITY_LOG_EXPORT)
                 
                 logs = self.cursor.fetchall()
                 
@@ -1020,38 +1246,133 @@ class ProfessionalCollegeGradeSystem:
     
     def refresh_system_info(self):
         """Refresh system information"""
-        # This would refresh the system info tab
-        messagebox.showinfo("Info", "System information refreshed!")
+        for key, value in self.get_database_stats().items():
+            if key in self.system_info_labels:
+                self.system_info_labels[key].config(text=str(value))
+        self.load_query_stats()
+    
+    def setup_backups(self):
+        """Create the backup manager from stored settings and start the scheduler"""
+        self.backup_manager = BackupManager(
+            self.db_path,
+            self.get_setting("backup_dir", DEFAULT_BACKUP_DIR),
+            keep_count=int(self.get_setting("backup_keep_count", DEFAULT_KEEP_COUNT)),
+            keep_days=float(self.get_setting("backup_keep_days", DEFAULT_KEEP_DAYS)))
+        self.backup_job = self.root.after(self.BACKUP_CHECK_MS, self.check_backup_schedule)
+    
+    def check_backup_schedule(self):
+        """Start a scheduled full or incremental backup when one is due, snapshot grade history, then check again later"""
+        interval = float(self.get_setting("backup_interval_hours", DEFAULT_INTERVAL_HOURS))
+        incremental_minutes = float(self.get_setting("incremental_backup_minutes", DEFAULT_INCREMENTAL_MINUTES))
+        if interval > 0 and not self.backup_manager.running:
+            if self.backup_manager.is_due(self.conn, interval):
+                self.start_backup("scheduled")
+            elif incremental_minutes > 0 and self.backup_manager.incremental_due(self.conn, incremental_minutes):
+                self.backup_manager.running = True
+                self.run_in_background(self.backup_manager.run_incremental,
+                                       on_done=self.incremental_backup_finished,
+                                       on_error=lambda e: self.backup_failed("incremental", e))
+        
+        # Keep grade history reconstruction bounded during long sessions, a batch per tick
+        try:
+            if grade_history.take_snapshots(self.conn, limit=grade_history.SNAPSHOT_BATCH):
+                self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Grade history snapshots failed: {e}")
+        self.backup_job = self.root.after(self.BACKUP_CHECK_MS, self.check_backup_schedule)
     
     def backup_database(self):
         """Create database backup"""
-        try:
-            backup_dir = filedialog.askdirectory(title="Select Backup Directory")
-            if backup_dir:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_file = os.path.join(backup_dir, f"college_system_backup_{timestamp}.db")
-                
-                # Create backup
-                backup_conn = sqlite3.connect(backup_file)
-                self.conn.backup(backup_conn)
-                backup_conn.close()
-                
-                # Log the backup event
-                self.log_security_event("DATABASE_BACKUP", f"Database backed up to: {backup_file}")
-                
-                messagebox.showinfo("Success", f"Database backed up successfully to:\n{backup_file}")
-                
-        except Exception as e:
-            messagebox.showerror("Backup Error", f"Failed to create backup: {str(e)}")
+        if self.backup_manager.running:
+            messagebox.showinfo("Backup Running", "A backup is already in progress.")
+            return
+        
+        backup_dir = filedialog.askdirectory(title="Select Backup Directory")
+        if backup_dir:
+            self.start_backup("manual", backup_dir)
+    
+    def start_backup(self, kind, backup_dir=None):
+        """Run a paged backup on a worker thread, showing progress until it finishes"""
+        # Set here as well so a second start cannot slip in before the worker runs
+        self.backup_manager.running = True
+        self.run_in_background(self.backup_manager.run_backup, kind, backup_dir,
+                               on_done=self.backup_finished,
+                               on_error=lambda e: self.backup_failed(kind, e))
+        self.poll_backup_progress()
+    
+    def poll_backup_progress(self):
+        """Mirror the worker's page counts in the progress bar while a backup runs"""
+        if not self.logged_in or not self.backup_progress.winfo_exists():
+            if self.backup_manager.running:
+                self.root.after(100, self.poll_backup_progress)
+            return
+        
+        progress = self.backup_manager.progress
+        if self.backup_manager.running:
+            if progress and progress[1]:
+                self.backup_progress.config(maximum=progress[1], value=progress[0])
+                self.backup_status_label.config(text=f"Backing up: {progress[0]}/{progress[1]} pages")
+            else:
+                self.backup_status_label.config(text="Backing up...")
+            self.root.after(100, self.poll_backup_progress)
+    
+    def backup_finished(self, record):
+        """Log the backup and report problems; manual backups always report"""
+        if record["status"] == "ok":
+            self.log_security_event("DATABASE_BACKUP",
+                                    f"{record['kind'].title()} backup to: {record['file_path']} "
+                                    f"({format_bytes(record['size_bytes'])}, {record['duration_ms']:.0f} ms)")
+            message = f"Last backup: {record['finished_at']} (verified)"
+        else:
+            self.log_security_event("BACKUP_FAILED",
+                                    f"{record['kind'].title()} backup {record['status']}: {record['check_result']}")
+            message = f"Backup {record['status']}: {record['check_result']}"
+        
+        if record["pruned"]:
+            print(f"Removed {len(record['pruned'])} old backup(s)")
+        
+        # Journal entries every consumer has read are no longer needed
+        if record["status"] == "ok" and record["kind"] == "scheduled":
+            removed = compact(self.conn, keep_days=int(self.get_setting("journal_keep_days", 7)))
+            self.conn.commit()
+            if removed:
+                print(f"Compacted {removed} change journal entries")
+        
+        if self.logged_in and self.backup_progress.winfo_exists():
+            self.backup_progress.config(value=0)
+            self.backup_status_label.config(text=message)
+        
+        if record["kind"] == "manual":
+            if record["status"] == "ok":
+                messagebox.showinfo("Success", f"Database backed up successfully to:\n{record['file_path']}\n\n"
+                                               f"Integrity check passed.")
+            else:
+                messagebox.showerror("Backup Error", f"Failed to create backup: {record['check_result']}")
+    
+    def incremental_backup_finished(self, record):
+        """Report a changeset backup (None when there was nothing new to write)"""
+        if record is None:
+            return
+        # A good one is not a security event (logging it would itself be a change for the
+        # next changeset); it shows as the System Info tab's Last Backup
+        if record["status"] != "ok":
+            self.log_security_event("BACKUP_FAILED", f"Incremental backup failed: {record['check_result']}")
+    
+    def backup_failed(self, kind, error):
+        """Backup bookkeeping itself failed (e.g. the database was locked)"""
+        self.backup_manager.running = False
+        self.log_security_event("BACKUP_FAILED", f"{kind.title()} backup failed: {str(error)}")
+        if kind == "manual":
+            messagebox.showerror("Backup Error", f"Failed to create backup: {str(error)}")
+        else:
+            print(f"Scheduled backup failed: {error}")
     
     def clear_old_logs(self):
         """Clear security logs older than 90 days"""
         result = messagebox.askyesno("Confirm", "Delete security logs older than 90 days?")
         if result:
-            self.cursor.execute('''
-                DELETE FROM security_logs 
-                WHERE timestamp < datetime('now', '-90 days')
-            ''')
+            self.cursor.execute(queries.SECURITY_LOG_PURGE)
             
             deleted_count = self.cursor.rowcount
             self.conn.commit()
@@ -1220,6 +1541,7 @@ class ProfessionalCollegeGradeSystem:
         # Treeview for departments
         columns = ("dept_id", "dept_name", "hod_name", "est_year", "total_students")
         self.dept_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=20)
+        self.dept_binder = TreeviewBinder(self.dept_tree)
         
         headings = {
             "dept_id": "Dept ID",
@@ -1315,8 +1637,9 @@ class ProfessionalCollegeGradeSystem:
         ttk.Button(filter_frame, text="🔄 Show All", command=self.load_sections).pack(side=tk.LEFT, padx=5)
         
         # Treeview for sections
-        columns = ("section_name", "department", "semester", "batch", "class_teacher", "room_number")
+        columns = ("section_name", "department", "semester", "batch", "class_teacher", "room_number", "total_students")
         self.section_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=20)
+        self.section_binder = TreeviewBinder(self.section_tree)
         
         headings = {
             "section_name": "Section Name",
@@ -1324,7 +1647,8 @@ class ProfessionalCollegeGradeSystem:
             "semester": "Semester",
             "batch": "Batch",
             "class_teacher": "Class Teacher",
-            "room_number": "Room Number"
+            "room_number": "Room Number",
+            "total_students": "Students"
         }
         
         for col, text in headings.items():
@@ -1430,6 +1754,7 @@ class ProfessionalCollegeGradeSystem:
         # Treeview for subjects
         columns = ("code", "name", "dept", "semester", "credits", "type", "max_marks")
         self.subject_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=20)
+        self.subject_binder = TreeviewBinder(self.subject_tree)
         
         headings = {
             "code": "Subject Code",
@@ -1555,11 +1880,14 @@ class ProfessionalCollegeGradeSystem:
         self.filter_stu_dept_combo.bind('<<ComboboxSelected>>', self.filter_students)
         
         ttk.Button(filter_frame, text="📤 Export All", command=self.export_all_students).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(filter_frame, text="📤 Export Changes", command=self.export_changes).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(filter_frame, text="🎓 Promote Batch", command=self.show_promotion_dialog).pack(side=tk.RIGHT, padx=5)
         ttk.Button(filter_frame, text="🔄 Show All", command=self.load_students).pack(side=tk.LEFT, padx=5)
         
         # Treeview for students
         columns = ("student_id", "name", "department", "batch", "semester", "section", "email", "phone", "status")
         self.student_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=20)
+        self.student_binder = TreeviewBinder(self.student_tree)
         
         headings = {
             "student_id": "Student ID",
@@ -1723,6 +2051,7 @@ class ProfessionalCollegeGradeSystem:
         # Treeview for current theory grades
         columns = ("subject", "internal1", "internal2", "presentation", "assign1", "assign2", "external", "total", "grade", "status")
         self.theory_grades_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=15)
+        self.theory_grades_binder = TreeviewBinder(self.theory_grades_tree)
         
         headings = {
             "subject": "Subject",
@@ -1862,6 +2191,7 @@ class ProfessionalCollegeGradeSystem:
         # Treeview for current practical grades
         columns = ("subject", "lab_copies", "viva", "practical_exam", "total", "grade", "status")
         self.practical_grades_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=20)
+        self.practical_grades_binder = TreeviewBinder(self.practical_grades_tree)
         
         headings = {
             "subject": "Subject",
@@ -1902,6 +2232,7 @@ class ProfessionalCollegeGradeSystem:
         
         # Export button
         ttk.Button(selection_frame, text="📤 Export Report", command=self.export_student_report).grid(row=0, column=2, padx=5)
+        ttk.Button(selection_frame, text="🕓 Grade History", command=self.show_grade_history).grid(row=0, column=3, padx=5)
         
         selection_frame.columnconfigure(1, weight=1)
         
@@ -1936,35 +2267,641 @@ class ProfessionalCollegeGradeSystem:
         self.current_semester_label = ttk.Label(summary_frame, text="-", font=('Arial', 14, 'bold'), foreground="purple")
         self.current_semester_label.pack(side=tk.LEFT, padx=5)
 
+    def show_grade_history(self):
+        """Show the selected student's grades as of a past date and the changes that led there"""
+        student_display = self.report_student_combo.get()
+        if not student_display:
+            messagebox.showinfo("Info", "Please select a student first!")
+            return
+        student_id = student_display.split(' - ')[0]
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Grade History - {student_display}")
+        dialog.geometry("900x550")
+        dialog.transient(self.root)
+        
+        query_frame = ttk.Frame(dialog, padding="10")
+        query_frame.pack(fill=tk.X)
+        ttk.Label(query_frame, text="As of (YYYY-MM-DD [HH:MM:SS]):").pack(side=tk.LEFT, padx=5)
+        as_of_entry = ttk.Entry(query_frame, width=20)
+        as_of_entry.pack(side=tk.LEFT, padx=5)
+        as_of_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        
+        grades_frame = ttk.LabelFrame(dialog, text="Grades", padding="5")
+        grades_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        grade_columns = ("semester", "type", "subject", "total", "grade", "grade_point", "status")
+        grades_tree = ttk.Treeview(grades_frame, columns=grade_columns, show="headings", height=10)
+        for col, text in zip(grade_columns, ("Semester", "Type", "Subject", "Total", "Grade", "Grade Point", "Status")):
+            grades_tree.heading(col, text=text)
+            grades_tree.column(col, width=90)
+        grades_tree.pack(fill=tk.BOTH, expand=True)
+        
+        events_frame = ttk.LabelFrame(dialog, text="Changes up to that time", padding="5")
+        events_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        event_columns = ("changed_at", "changed_by", "op", "semester", "subject", "total", "grade", "status")
+        events_tree = ttk.Treeview(events_frame, columns=event_columns, show="headings", height=8)
+        for col, text in zip(event_columns, ("Changed At", "Changed By", "Change", "Semester", "Subject", "Total",
+                                             "Grade", "Status")):
+            events_tree.heading(col, text=text)
+            events_tree.column(col, width=90)
+        events_tree.column("changed_at", width=140)
+        events_tree.pack(fill=tk.BOTH, expand=True)
+        
+        kinds = {"theory_grades": "Theory", "practical_grades": "Practical"}
+        changes = {"B": "Before history", "I": "Added", "U": "Changed", "D": "Deleted"}
+        
+        def show():
+            as_of = as_of_entry.get().strip()
+            try:
+                datetime.strptime(as_of, "%Y-%m-%d" if len(as_of) == 10 else "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a date as YYYY-MM-DD or YYYY-MM-DD HH:MM:SS!", parent=dialog)
+                return
+            grades_tree.delete(*grades_tree.get_children())
+            for grade in grade_history.grades_as_of(self.conn, student_id, as_of):
+                grades_tree.insert("", tk.END, values=(grade.semester, kinds[grade.grade_table], grade.subject_code,
+                                                       grade.total_marks, grade.grade, grade.grade_point,
+                                                       grade.result_status))
+            events_tree.delete(*events_tree.get_children())
+            for event in reversed(grade_history.events_for(self.conn, student_id, until=as_of)):
+                events_tree.insert("", tk.END, values=(event.changed_at, event.changed_by or "-", changes[event.op],
+                                                       event.semester, event.subject_code, event.total_marks,
+                                                       event.grade, event.result_status))
+        
+        ttk.Button(query_frame, text="🔍 Show", command=show).pack(side=tk.LEFT, padx=5)
+        ttk.Button(query_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        show()
+
+    def setup_rank_tab(self):
+        """Setup rank list tab: section, department and batch ranks by SGPA"""
+        main_frame = ttk.Frame(self.rank_tab)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Scope selection
+        selection_frame = ttk.LabelFrame(main_frame, text="Select Scope", padding="10")
+        selection_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(selection_frame, text="Department:").pack(side=tk.LEFT, padx=5)
+        self.rank_dept_combo = ttk.Combobox(selection_frame, width=30, state="readonly")
+        self.rank_dept_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(selection_frame, text="Batch:").pack(side=tk.LEFT, padx=5)
+        self.rank_batch_combo = ttk.Combobox(selection_frame, width=8, values=[str(i) for i in range(2020, 2030)], state="readonly")
+        self.rank_batch_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(selection_frame, text="Semester:").pack(side=tk.LEFT, padx=5)
+        self.rank_semester_combo = ttk.Combobox(selection_frame, width=5, values=[str(i) for i in range(1, 9)], state="readonly")
+        self.rank_semester_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(selection_frame, text="Top N (blank for all):").pack(side=tk.LEFT, padx=5)
+        self.rank_top_entry = ttk.Entry(selection_frame, width=6)
+        self.rank_top_entry.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(selection_frame, text="🏆 Show Ranks", command=self.show_rank_list).pack(side=tk.LEFT, padx=5)
+        
+        # Rank list
+        list_frame = ttk.LabelFrame(main_frame, text="Rank List", padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        columns = ("dept_rank", "section_rank", "batch_rank", "student_id", "name", "section", "sgpa", "credits", "failed")
+        self.rank_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=20)
+        self.rank_binder = TreeviewBinder(self.rank_tree)
+        
+        headings = {
+            "dept_rank": "Dept Rank",
+            "section_rank": "Section Rank",
+            "batch_rank": "Batch Rank",
+            "student_id": "Student ID",
+            "name": "Name",
+            "section": "Section",
+            "sgpa": "SGPA",
+            "credits": "Credits",
+            "failed": "Failed Subjects"
+        }
+        
+        for col, text in headings.items():
+            self.rank_tree.heading(col, text=text)
+            self.rank_tree.column(col, width=90)
+        
+        self.rank_tree.column("student_id", width=120)
+        self.rank_tree.column("name", width=180)
+        
+        self.rank_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.rank_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rank_tree.configure(yscrollcommand=scrollbar.set)
+        
+        self.rank_summary_label = ttk.Label(main_frame, text="Select a department, batch and semester", font=('Arial', 10))
+        self.rank_summary_label.pack(anchor=tk.W, pady=5)
+    
+    def show_rank_list(self):
+        """Show the rank list for the selected scope (ties share a rank)"""
+        department = self.rank_dept_combo.get()
+        batch = self.rank_batch_combo.get()
+        semester = self.rank_semester_combo.get()
+        top_n = self.rank_top_entry.get().strip()
+        
+        if not department or not batch or not semester:
+            messagebox.showerror("Error", "Please select department, batch and semester!")
+            return
+        
+        if top_n and (not top_n.isdigit() or int(top_n) < 1):
+            messagebox.showerror("Error", "Top N must be a positive whole number!")
+            return
+        
+        dept_id = department.split(' - ')[0]
+        rows = self.rank_cache.rank_list(dept_id, batch, semester, int(top_n) if top_n else None)
+        self.rank_binder.set_rows((row[3], row) for row in rows)
+        
+        if rows:
+            self.rank_summary_label.config(text=f"{len(rows)} students ranked in {dept_id} batch {batch}, "
+                                                f"semester {semester}")
+        else:
+            self.rank_summary_label.config(text="No results recorded for this scope")
+
+    def setup_analytics_tab(self):
+        """Setup result analytics tab: pass rates, mark statistics and grade distributions"""
+        main_frame = ttk.Frame(self.analytics_tab)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Filters (All means any value)
+        filter_frame = ttk.LabelFrame(main_frame, text="Filter", padding="10")
+        filter_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(filter_frame, text="Department:").pack(side=tk.LEFT, padx=5)
+        self.analytics_dept_combo = ttk.Combobox(filter_frame, width=25, values=["All"], state="readonly")
+        self.analytics_dept_combo.pack(side=tk.LEFT, padx=5)
+        self.analytics_dept_combo.set("All")
+        
+        ttk.Label(filter_frame, text="Batch:").pack(side=tk.LEFT, padx=5)
+        self.analytics_batch_combo = ttk.Combobox(filter_frame, width=6, values=["All"] + [str(i) for i in range(2020, 2030)], state="readonly")
+        self.analytics_batch_combo.pack(side=tk.LEFT, padx=5)
+        self.analytics_batch_combo.set("All")
+        
+        ttk.Label(filter_frame, text="Semester:").pack(side=tk.LEFT, padx=5)
+        self.analytics_semester_combo = ttk.Combobox(filter_frame, width=5, values=["All"] + [str(i) for i in range(1, 9)], state="readonly")
+        self.analytics_semester_combo.pack(side=tk.LEFT, padx=5)
+        self.analytics_semester_combo.set("All")
+        
+        ttk.Label(filter_frame, text="Subject:").pack(side=tk.LEFT, padx=5)
+        self.analytics_subject_combo = ttk.Combobox(filter_frame, width=30, values=["All"], state="readonly")
+        self.analytics_subject_combo.pack(side=tk.LEFT, padx=5)
+        self.analytics_subject_combo.set("All")
+        
+        ttk.Label(filter_frame, text="Group by:").pack(side=tk.LEFT, padx=5)
+        self.analytics_group_combo = ttk.Combobox(filter_frame, width=8, values=list(result_analytics.GROUPINGS), state="readonly")
+        self.analytics_group_combo.pack(side=tk.LEFT, padx=5)
+        self.analytics_group_combo.set("subject")
+        
+        ttk.Button(filter_frame, text="📈 Analyze", command=self.show_result_analytics).pack(side=tk.LEFT, padx=5)
+        
+        # Relative grading: regrade the selected subject's cohorts under a scheme
+        grading_frame = ttk.LabelFrame(main_frame, text="Grading Scheme", padding="10")
+        grading_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(grading_frame, text="Scheme for selected subject:").pack(side=tk.LEFT, padx=5)
+        self.grading_scheme_combo = ttk.Combobox(grading_frame, width=12, values=grading.GRADING_SCHEMES, state="readonly")
+        self.grading_scheme_combo.pack(side=tk.LEFT, padx=5)
+        self.grading_scheme_combo.set(grading.ABSOLUTE)
+        
+        ttk.Button(grading_frame, text="⚖️ Regrade Subject", command=self.regrade_selected_subject).pack(side=tk.LEFT, padx=5)
+        ttk.Label(grading_frame, text="Percentile and z-score grades are relative to everyone who sat the paper; "
+                                      "marks below the pass mark still fail", font=('Arial', 9)).pack(side=tk.LEFT, padx=10)
+        
+        # Grace marks / moderation of the selected subject (and semester, if chosen)
+        moderation_frame = ttk.LabelFrame(main_frame, text="Moderation", padding="10")
+        moderation_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(moderation_frame, text="Rule:").pack(side=tk.LEFT, padx=5)
+        self.moderation_rule_combo = ttk.Combobox(moderation_frame, width=10, values=list(moderation.RULES), state="readonly")
+        self.moderation_rule_combo.pack(side=tk.LEFT, padx=5)
+        self.moderation_rule_combo.set(moderation.PASS_LIFT)
+        
+        ttk.Label(moderation_frame, text="Marks:").pack(side=tk.LEFT, padx=5)
+        self.moderation_amount_entry = ttk.Entry(moderation_frame, width=6)
+        self.moderation_amount_entry.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(moderation_frame, text="🔍 Preview", command=self.preview_subject_moderation).pack(side=tk.LEFT, padx=5)
+        ttk.Button(moderation_frame, text="✏️ Apply Moderation", command=self.apply_subject_moderation).pack(side=tk.LEFT, padx=5)
+        self.moderation_label = ttk.Label(moderation_frame, text="flat: add marks to all; cap: lower totals above marks; "
+                                                                "pass_lift: lift fails within marks of passing",
+                                          font=('Arial', 9))
+        self.moderation_label.pack(side=tk.LEFT, padx=10)
+        
+        self.analytics_subject_combo.bind('<<ComboboxSelected>>', self.on_analytics_subject_select)
+        
+        # Statistics per group
+        list_frame = ttk.LabelFrame(main_frame, text="Statistics", padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        grade_columns = tuple(f"grade_{grade}" for grade in result_analytics.GRADE_ORDER)
+        columns = ("group", "count", "mean", "median", "std", "pass_rate", "back_papers") + grade_columns
+        self.analytics_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=12)
+        self.analytics_binder = TreeviewBinder(self.analytics_tree)
+        
+        headings = {
+            "group": "Subject / Section",
+            "count": "Grades",
+            "mean": "Mean",
+            "median": "Median",
+            "std": "Std Dev",
+            "pass_rate": "Pass %",
+            "back_papers": "Back Papers"
+        }
+        
+        for col, text in headings.items():
+            self.analytics_tree.heading(col, text=text)
+            self.analytics_tree.column(col, width=80)
+        for col, grade in zip(grade_columns, result_analytics.GRADE_ORDER):
+            self.analytics_tree.heading(col, text=grade)
+            self.analytics_tree.column(col, width=45)
+        
+        self.analytics_tree.column("group", width=220)
+        
+        self.analytics_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.analytics_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.analytics_tree.configure(yscrollcommand=scrollbar.set)
+        self.analytics_tree.bind("<<TreeviewSelect>>", lambda event: self.update_analytics_charts())
+        
+        # Charts: marks distribution of the filter (or selected row) and CGPA by semester per batch
+        charts_frame = ttk.Frame(main_frame)
+        charts_frame.pack(fill=tk.X, pady=5)
+        
+        self.marks_chart = HistogramChart(charts_frame, title="Marks Distribution", height=220)
+        self.marks_chart.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
+        
+        self.cgpa_chart = TrendChart(charts_frame, title="Mean CGPA by Semester", y_max=10, height=220)
+        self.cgpa_chart.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
+        
+        self.analytics_group_by = "subject"
+        
+        self.analytics_summary_label = ttk.Label(main_frame, text="Choose filters and press Analyze", font=('Arial', 10))
+        self.analytics_summary_label.pack(anchor=tk.W, pady=5)
+    
+    def analytics_filters(self):
+        """Filter keyword arguments from the analytics comboboxes"""
+        def selected(combo):
+            value = combo.get()
+            return None if value in ("", "All") else value.split(' - ')[0]
+        
+        return {
+            "department": selected(self.analytics_dept_combo),
+            "batch": selected(self.analytics_batch_combo),
+            "semester": selected(self.analytics_semester_combo),
+            "subject_code": selected(self.analytics_subject_combo),
+        }
+    
+    @staticmethod
+    def analytics_row(stats):
+        """Treeview values for one GroupStatistics"""
+        def number(value):
+            return "-" if value is None else f"{value:.2f}"
+        
+        return ((stats.label, stats.count, number(stats.mean), number(stats.median), number(stats.std),
+                 f"{stats.pass_rate:.1f}", stats.back_papers)
+                + tuple(stats.grade_counts[grade] for grade in result_analytics.GRADE_ORDER))
+    
+    def show_result_analytics(self):
+        """Show per-subject or per-section statistics for the selected filters"""
+        filters = self.analytics_filters()
+        group_by = self.analytics_group_combo.get() or "subject"
+        
+        groups = result_analytics.group_statistics(self.conn, group_by, **filters)
+        self.analytics_group_by = group_by
+        self.analytics_binder.set_rows(("|".join(map(str, stats.key)), self.analytics_row(stats)) for stats in groups)
+        self.update_analytics_charts()
+        
+        overall = result_analytics.overall_statistics(self.conn, **filters)
+        if overall.count:
+            self.analytics_summary_label.config(
+                text=f"{overall.count} grades in {len(groups)} {group_by}s: mean {overall.mean:.2f}, "
+                     f"median {overall.median:.2f}, std dev {overall.std:.2f}, pass {overall.pass_rate:.1f}%, "
+                     f"{overall.back_papers} back papers")
+        else:
+            self.analytics_summary_label.config(text="No grades recorded for these filters")
+    
+    def on_analytics_subject_select(self, event=None):
+        """Show the grading scheme the selected subject is graded under"""
+        subject_code = self.analytics_filters()["subject_code"]
+        if subject_code:
+            self.grading_scheme_combo.set(grading.subject_grading_scheme(self.conn, subject_code))
+    
+    def regrade_selected_subject(self):
+        """Regrade every result of the selected subject under the chosen scheme"""
+        subject_code = self.analytics_filters()["subject_code"]
+        scheme = self.grading_scheme_combo.get()
+        
+        if not subject_code:
+            messagebox.showerror("Error", "Please select a subject to regrade!")
+            return
+        
+        if not messagebox.askyesno("Confirm", f"Regrade every result of {subject_code} using {scheme} grading?"):
+            return
+        
+        try:
+            changed = grading.regrade_subject(self.conn, subject_code, scheme)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+            return
+        
+        self.log_security_event("REGRADE", f"{subject_code} regraded with {scheme} grading ({changed} grades changed)")
+        messagebox.showinfo("Success", f"{subject_code} is now graded with {scheme} grading. {changed} grades changed.")
+        self.apply_external_changes({"theory_grades", "practical_grades"})
+    
+    def moderation_request(self):
+        """(subject code, semester, rule, marks) from the analytics tab, or None after showing an error"""
+        filters = self.analytics_filters()
+        if not filters["subject_code"]:
+            messagebox.showerror("Error", "Please select a subject to moderate!")
+            return None
+        try:
+            amount = float(self.moderation_amount_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid marks!")
+            return None
+        try:
+            moderation.check_rule(self.moderation_rule_combo.get(), amount)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return None
+        return filters["subject_code"], filters["semester"], self.moderation_rule_combo.get(), amount
+    
+    def preview_subject_moderation(self):
+        request = self.moderation_request()
+        if request is None:
+            return None
+        subject_code, semester, rule, amount = request
+        preview = moderation.preview_moderation(self.conn, subject_code, rule, amount, semester)
+        self.moderation_label.config(text=f"{preview.rows} grades change: {preview.newly_passed} newly pass, "
+                                          f"{preview.newly_failed} newly fail")
+        return request, preview
+    
+    def apply_subject_moderation(self):
+        """Apply the moderation rule to every result of the selected subject in one transaction"""
+        previewed = self.preview_subject_moderation()
+        if previewed is None:
+            return
+        (subject_code, semester, rule, amount), preview = previewed
+        if not preview.rows:
+            messagebox.showinfo("Info", "This moderation changes no grades.")
+            return
+        scope = f"{subject_code} semester {semester}" if semester else subject_code
+        if not messagebox.askyesno("Confirm", f"Apply {rule} {amount:g} to {scope}? {preview.rows} grades change, "
+                                              f"{preview.newly_passed} newly pass."):
+            return
+        
+        try:
+            moderation_id, changed = moderation.moderate_subject(self.conn, subject_code, rule, amount, semester,
+                                                                 getattr(self, 'admin_username', None))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+            return
+        
+        self.log_security_event("MODERATION", f"{scope} moderated with {rule} {amount:g} "
+                                              f"({changed} grades changed, moderation #{moderation_id})")
+        messagebox.showinfo("Success", f"{changed} grades of {scope} moderated.")
+        self.apply_external_changes({"theory_grades", "practical_grades"})
+    
+    def update_analytics_charts(self):
+        """Redraw the analytics charts for the filters, narrowed to the selected row if any"""
+        filters = self.analytics_filters()
+        title = "Marks Distribution"
+        selection = [iid for iid in self.analytics_tree.selection() if iid in self.analytics_binder.rows]
+        if selection:
+            key = selection[0].split("|")
+            if self.analytics_group_by == "section":
+                filters.update(department=key[0], section=key[1])
+            else:
+                filters["subject_code"] = key[0]
+            title = f"Marks Distribution: {self.analytics_binder.rows[selection[0]][0]}"
+        
+        counts, edges = result_analytics.marks_histogram(self.conn, 10, **filters)
+        self.marks_chart.set_title(title)
+        self.marks_chart.set_bins(counts, edges)
+        
+        trend = result_analytics.cgpa_trend(self.conn, filters["department"], filters["batch"])
+        self.cgpa_chart.set_series({f"Batch {batch}": series for batch, series in trend.items()})
+
+    def setup_back_paper_tab(self):
+        """Setup back paper tab: outstanding backs and supplementary attempts"""
+        main_frame = ttk.Frame(self.back_paper_tab)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Filter
+        filter_frame = ttk.LabelFrame(main_frame, text="Filter", padding="10")
+        filter_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(filter_frame, text="Department:").pack(side=tk.LEFT, padx=5)
+        self.back_dept_combo = ttk.Combobox(filter_frame, width=30, state="readonly")
+        self.back_dept_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(filter_frame, text="Semester:").pack(side=tk.LEFT, padx=5)
+        self.back_semester_combo = ttk.Combobox(filter_frame, width=5, values=["All"] + [str(i) for i in range(1, 9)], state="readonly")
+        self.back_semester_combo.pack(side=tk.LEFT, padx=5)
+        self.back_semester_combo.set("All")
+        
+        ttk.Button(filter_frame, text="🔍 Show Pending", command=self.show_pending_backs).pack(side=tk.LEFT, padx=5)
+        
+        # Pending back papers
+        list_frame = ttk.LabelFrame(main_frame, text="Outstanding Back Papers", padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        columns = ("kind", "student_id", "name", "section", "subject_code", "subject_name", "semester", "total_marks", "attempts")
+        self.back_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=14)
+        self.back_binder = TreeviewBinder(self.back_tree)
+        
+        headings = {
+            "kind": "Type",
+            "student_id": "Student ID",
+            "name": "Name",
+            "section": "Section",
+            "subject_code": "Subject Code",
+            "subject_name": "Subject",
+            "semester": "Semester",
+            "total_marks": "Marks",
+            "attempts": "Attempts"
+        }
+        
+        for col, text in headings.items():
+            self.back_tree.heading(col, text=text)
+            self.back_tree.column(col, width=90)
+        
+        self.back_tree.column("name", width=160)
+        self.back_tree.column("subject_name", width=200)
+        
+        self.back_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.back_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.back_tree.configure(yscrollcommand=scrollbar.set)
+        self.back_tree.bind("<<TreeviewSelect>>", lambda event: self.show_supplementary_attempts())
+        
+        # Record a supplementary attempt for the selected back paper
+        attempt_frame = ttk.LabelFrame(main_frame, text="Supplementary Attempt", padding="10")
+        attempt_frame.pack(fill=tk.X, pady=5)
+        
+        self.back_selected_label = ttk.Label(attempt_frame, text="Select a back paper", font=('Arial', 10, 'bold'))
+        self.back_selected_label.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(attempt_frame, text="Exam Marks (60):").pack(side=tk.LEFT, padx=5)
+        self.back_exam_entry = ttk.Entry(attempt_frame, width=8)
+        self.back_exam_entry.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(attempt_frame, text="Exam Date:").pack(side=tk.LEFT, padx=5)
+        self.back_date_entry = ttk.Entry(attempt_frame, width=12)
+        self.back_date_entry.pack(side=tk.LEFT, padx=5)
+        self.back_date_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        
+        ttk.Button(attempt_frame, text="📝 Record Attempt", command=self.record_supplementary_attempt).pack(side=tk.LEFT, padx=5)
+        
+        # Attempts so far at the selected back paper
+        history_frame = ttk.LabelFrame(main_frame, text="Previous Attempts", padding="10")
+        history_frame.pack(fill=tk.X, pady=5)
+        
+        columns = ("attempt_no", "exam_date", "exam_marks", "total_marks", "grade", "result_status", "recorded_by", "recorded_at")
+        self.back_attempts_tree = ttk.Treeview(history_frame, columns=columns, show="headings", height=4)
+        
+        headings = {
+            "attempt_no": "Attempt",
+            "exam_date": "Exam Date",
+            "exam_marks": "Exam Marks",
+            "total_marks": "Total",
+            "grade": "Grade",
+            "result_status": "Status",
+            "recorded_by": "Recorded By",
+            "recorded_at": "Recorded At"
+        }
+        
+        for col, text in headings.items():
+            self.back_attempts_tree.heading(col, text=text)
+            self.back_attempts_tree.column(col, width=100)
+        
+        self.back_attempts_tree.pack(fill=tk.X)
+        
+        self.back_summary_label = ttk.Label(main_frame, text="Select a department", font=('Arial', 10))
+        self.back_summary_label.pack(anchor=tk.W, pady=5)
+    
+    def show_pending_backs(self):
+        """List the outstanding back papers of the selected department"""
+        department = self.back_dept_combo.get()
+        semester = self.back_semester_combo.get()
+        
+        if not department:
+            messagebox.showerror("Error", "Please select a department!")
+            return
+        
+        dept_id = department.split(' - ')[0]
+        rows = back_papers.pending_backs(self.conn, dept_id, None if semester in ("", "All") else semester)
+        self.back_binder.set_rows((f"{row[1]}:{row[2]}", (row[0],) + tuple(row[3:])) for row in rows)
+        
+        students = len({row[3] for row in rows})
+        self.back_summary_label.config(text=f"{len(rows)} back papers outstanding for {students} students in {dept_id}")
+        self.show_supplementary_attempts()
+    
+    def selected_back_paper(self):
+        """(grade_table, grade_id) of the selected back paper, or None"""
+        selection = [iid for iid in self.back_tree.selection() if iid in self.back_binder.rows]
+        if not selection:
+            return None
+        grade_table, grade_id = selection[0].split(":")
+        return grade_table, int(grade_id)
+    
+    def show_supplementary_attempts(self):
+        """Show the attempts so far at the selected back paper"""
+        for item in self.back_attempts_tree.get_children():
+            self.back_attempts_tree.delete(item)
+        
+        selected = self.selected_back_paper()
+        if not selected:
+            self.back_selected_label.config(text="Select a back paper")
+            return
+        
+        values = self.back_binder.rows[f"{selected[0]}:{selected[1]}"]
+        self.back_selected_label.config(text=f"{values[1]} - {values[4]}")
+        for attempt in back_papers.attempts_for(self.conn, *selected):
+            self.back_attempts_tree.insert("", tk.END, values=attempt)
+    
+    def record_supplementary_attempt(self):
+        """Record a supplementary exam result; a pass clears the back paper and updates SGPA"""
+        selected = self.selected_back_paper()
+        if not selected:
+            messagebox.showerror("Error", "Please select a back paper!")
+            return
+        
+        try:
+            exam_marks = float(self.back_exam_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid numeric exam marks!")
+            return
+        
+        values = self.back_binder.rows[f"{selected[0]}:{selected[1]}"]
+        try:
+            attempt = back_papers.record_attempt(self.conn, *selected, exam_marks,
+                                                 self.back_date_entry.get().strip() or None,
+                                                 getattr(self, 'admin_username', None))
+            self.conn.commit()
+        except ValueError as e:
+            self.conn.rollback()
+            messagebox.showerror("Error", str(e))
+            return
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+            return
+        
+        if attempt.cleared:
+            messagebox.showinfo("Success", f"Attempt {attempt.attempt_no} passed with {attempt.total_marks:.2f} "
+                                           f"marks (grade {attempt.grade}). The back paper is cleared.")
+        else:
+            messagebox.showinfo("Recorded", f"Attempt {attempt.attempt_no} failed with {attempt.total_marks:.2f} "
+                                            f"marks. The back paper remains outstanding.")
+        self.back_exam_entry.delete(0, tk.END)
+        
+        entity = "theory_grade" if selected[0] == "theory_grades" else "practical_grade"
+        self.change_bus.publish(entity, (values[1], values[4], int(values[6])), UPDATE)
+
     # [ALL THE REMAINING ORIGINAL METHODS STAY EXACTLY THE SAME]
     # Only the security system and admin management methods have been added
 
     # Section Management Methods
+    def section_filter_conditions(self, department):
+        """WHERE conditions for the section list filter"""
+        if department:
+            return ['department = ?'], [department.split(' - ')[0]]
+        return [], []
+
     def load_sections(self, department=None):
         """Load sections into treeview and comboboxes"""
-        # Clear treeview
-        for item in self.section_tree.get_children():
-            self.section_tree.delete(item)
+        self.section_filter = department
         
         # Build query based on filters
         query = '''
-            SELECT section_name, department, semester, batch, class_teacher, room_number
+            SELECT section_id, section_name, department, semester, batch, class_teacher, room_number, total_students
             FROM sections
         '''
-        params = []
-        
-        if department:
-            dept_id = department.split(' - ')[0]
-            query += ' WHERE department = ?'
-            params.append(dept_id)
+        conditions, params = self.section_filter_conditions(department)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
         
         query += ' ORDER BY department, batch, semester, section_name'
         
         self.cursor.execute(query, params)
-        sections = self.cursor.fetchall()
-        
-        for section in sections:
-            self.section_tree.insert("", tk.END, values=section)
+        self.section_binder.set_rows((section[0], section[1:]) for section in self.cursor.fetchall())
+    
+    def refresh_section_row(self, section_id):
+        """Re-read one section and update, add or remove its row in the list"""
+        conditions, params = self.section_filter_conditions(self.section_filter)
+        self.cursor.execute('''
+            SELECT section_name, department, semester, batch, class_teacher, room_number, total_students
+            FROM sections WHERE ''' + ' AND '.join(['section_id = ?'] + conditions), [section_id] + params)
+        self.section_binder.update_row(section_id, self.cursor.fetchone())
 
     def add_section(self):
         """Add a new section"""
@@ -1990,7 +2927,7 @@ class ProfessionalCollegeGradeSystem:
             
             self.conn.commit()
             messagebox.showinfo("Success", "Section added successfully!")
-            self.load_sections()
+            self.change_bus.publish("section", self.cursor.lastrowid, INSERT)
             self.clear_section_form()
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Section already exists for this department, semester, and batch!")
@@ -2010,21 +2947,19 @@ class ProfessionalCollegeGradeSystem:
         
         department = department_display.split(' - ')[0]
         
-        # Get original values to identify the section
+        # Rows are keyed by section_id
         selected = self.section_tree.selection()
         if selected:
-            original_values = self.section_tree.item(selected[0], 'values')
-            original_section_name, original_department, original_semester, original_batch = original_values[:4]
+            section_id = int(selected[0])
             
             self.cursor.execute('''
                 UPDATE sections SET section_name=?, department=?, semester=?, batch=?, class_teacher=?, room_number=?
-                WHERE section_name=? AND department=? AND semester=? AND batch=?
-            ''', (section_name, department, int(semester), int(batch), class_teacher, room_number,
-                 original_section_name, original_department, int(original_semester), int(original_batch)))
+                WHERE section_id=?
+            ''', (section_name, department, int(semester), int(batch), class_teacher, room_number, section_id))
             
             self.conn.commit()
             messagebox.showinfo("Success", "Section updated successfully!")
-            self.load_sections()
+            self.change_bus.publish("section", section_id, UPDATE)
             self.clear_section_form()
 
     def delete_section(self):
@@ -2034,12 +2969,12 @@ class ProfessionalCollegeGradeSystem:
             messagebox.showerror("Error", "Please select a section to delete!")
             return
         
-        values = self.section_tree.item(selected[0], 'values')
-        section_name, department, semester, batch = values[:4]
+        section_id = int(selected[0])
         
-        # Check if section has students
-        self.cursor.execute("SELECT COUNT(*) FROM students WHERE section=?", (section_name,))
-        student_count = self.cursor.fetchone()[0]
+        # Check if section has students (counter maintained by triggers)
+        self.cursor.execute("SELECT total_students FROM sections WHERE section_id=?", (section_id,))
+        count_row = self.cursor.fetchone()
+        student_count = count_row[0] if count_row and count_row[0] else 0
         
         if student_count > 0:
             messagebox.showerror("Error", f"Cannot delete section! There are {student_count} students in this section.")
@@ -2047,14 +2982,11 @@ class ProfessionalCollegeGradeSystem:
         
         result = messagebox.askyesno("Confirm", "Are you sure you want to delete this section?")
         if result:
-            self.cursor.execute('''
-                DELETE FROM sections 
-                WHERE section_name=? AND department=? AND semester=? AND batch=?
-            ''', (section_name, department, semester, batch))
+            self.cursor.execute("DELETE FROM sections WHERE section_id=?", (section_id,))
             
             self.conn.commit()
             messagebox.showinfo("Success", "Section deleted successfully!")
-            self.load_sections()
+            self.change_bus.publish("section", section_id, DELETE)
             self.clear_section_form()
 
     def clear_section_form(self):
@@ -2079,10 +3011,8 @@ class ProfessionalCollegeGradeSystem:
             
             # Find department display string
             dept_id = values[1]
-            self.cursor.execute("SELECT dept_name FROM departments WHERE dept_id=?", (dept_id,))
-            dept_data = self.cursor.fetchone()
-            if dept_data:
-                dept_display = f"{dept_id} - {dept_data[0]}"
+            dept_display = self.ref_cache.department_display(dept_id)
+            if dept_display:
                 self.sec_dept_combo.set(dept_display)
             
             self.sec_semester_combo.set(values[2])
@@ -2098,157 +3028,344 @@ class ProfessionalCollegeGradeSystem:
     # Data loading methods
     def load_departments(self):
         """Load departments into treeview and comboboxes"""
-        # Clear treeview
-        for item in self.dept_tree.get_children():
-            self.dept_tree.delete(item)
-        
-        # Load departments
+        # Load departments (total_students is maintained by triggers)
         self.cursor.execute('''
-            SELECT d.dept_id, d.dept_name, d.hod_name, d.established_year, 
-                   COUNT(s.student_id) as total_students
-            FROM departments d
-            LEFT JOIN students s ON d.dept_id = s.department
-            GROUP BY d.dept_id
+            SELECT dept_id, dept_name, hod_name, established_year, total_students
+            FROM departments
+            ORDER BY dept_id
         ''')
-        departments = self.cursor.fetchall()
-        
-        for dept in departments:
-            self.dept_tree.insert("", tk.END, values=dept)
-        
-        # Update department comboboxes
-        dept_list = [f"{dept[0]} - {dept[1]}" for dept in departments]
+        self.dept_binder.set_rows((dept[0], dept) for dept in self.cursor.fetchall())
         
+        self.load_department_combos()
+    
+    def refresh_department_row(self, dept_id):
+        """Re-read one department and update, add or remove its row in the list"""
+        self.cursor.execute('''
+            SELECT dept_id, dept_name, hod_name, established_year, total_students
+            FROM departments WHERE dept_id = ?
+        ''', (dept_id,))
+        self.dept_binder.update_row(dept_id, self.cursor.fetchone())
+    
+    def load_department_combos(self):
+        """Fill department comboboxes from the reference cache"""
         # Update all department comboboxes
+        dept_list = self.ref_cache.department_displays()
+        rebuild = self.dept_combo_generation != self.ref_cache.generation
+        self.dept_combo_generation = self.ref_cache.generation
+        
         comboboxes = [
             self.sec_dept_combo, self.filter_sec_dept_combo,
             self.sub_dept_combo, self.filter_sub_dept_combo,
-            self.stu_dept_combo, self.filter_stu_dept_combo
+            self.stu_dept_combo, self.filter_stu_dept_combo,
+            self.rank_dept_combo, self.back_dept_combo
         ]
         
         for combo in comboboxes:
-            combo['values'] = dept_list
+            if rebuild:
+                combo['values'] = dept_list
             if dept_list and combo.get() == '':
                 combo.set(dept_list[0])
-
-    def load_subjects(self, department=None, semester=None):
-        """Load subjects into treeview and comboboxes"""
-        # Clear treeview
-        for item in self.subject_tree.get_children():
-            self.subject_tree.delete(item)
         
-        # Build query based on filters
-        query = '''
-            SELECT subject_code, subject_name, department, semester, credits, subject_type, max_marks
-            FROM subjects
-        '''
-        params = []
+        if rebuild:
+            self.analytics_dept_combo['values'] = ["All"] + dept_list
+
+    def subject_filter_conditions(self, department, semester):
+        """WHERE conditions for the subject list filters"""
+        conditions, params = [], []
         
         if department and department != 'All':
-            dept_id = department.split(' - ')[0]
-            query += ' WHERE department = ?'
-            params.append(dept_id)
-            
-            if semester and semester != 'All':
-                query += ' AND semester = ?'
-                params.append(int(semester))
-        elif semester and semester != 'All':
-            query += ' WHERE semester = ?'
+            conditions.append('department = ?')
+            params.append(department.split(' - ')[0])
+        
+        if semester and semester != 'All':
+            conditions.append('semester = ?')
             params.append(int(semester))
         
-        query += ' ORDER BY department, semester, subject_code'
+        return conditions, params
+
+    def load_subjects(self, department=None, semester=None):
+        """Load subjects into treeview and comboboxes"""
+        self.subject_filter = (department, semester)
         
-        self.cursor.execute(query, params)
-        subjects = self.cursor.fetchall()
+        # Build query based on filters
+        query = queries.SUBJECT_LIST
+        conditions, params = self.subject_filter_conditions(department, semester)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
         
-        for subject in subjects:
-            self.subject_tree.insert("", tk.END, values=subject)
+        query += queries.SUBJECT_ORDER
         
-        # Update subject comboboxes for grade entry
-        theory_subjects = [f"{sub[0]} - {sub[1]}" for sub in subjects if sub[5] == 'Theory']
-        practical_subjects = [f"{sub[0]} - {sub[1]}" for sub in subjects if sub[5] == 'Practical']
+        self.cursor.execute(query, params)
+        self.subject_binder.set_rows((subject[0], subject) for subject in self.cursor.fetchall())
         
-        self.theory_subject_combo['values'] = theory_subjects
-        self.practical_subject_combo['values'] = practical_subjects
+        self.load_subject_combos()
+    
+    def refresh_subject_row(self, subject_code):
+        """Re-read one subject and update, add or remove its row in the list"""
+        conditions, params = self.subject_filter_conditions(*self.subject_filter)
+        self.cursor.execute(queries.SUBJECT_LIST + ' WHERE ' + ' AND '.join(['subject_code = ?'] + conditions),
+                            [subject_code] + params)
+        self.subject_binder.update_row(subject_code, self.cursor.fetchone())
+    
+    def load_subject_combos(self):
+        """Fill grade-entry subject comboboxes from the reference cache"""
+        # Update subject comboboxes for grade entry only when subjects changed
+        if self.subject_combo_generation != self.ref_cache.generation:
+            self.subject_combo_generation = self.ref_cache.generation
+            self.theory_subject_combo['values'] = self.ref_cache.subject_displays('Theory')
+            self.practical_subject_combo['values'] = self.ref_cache.subject_displays('Practical')
+            self.analytics_subject_combo['values'] = ["All"] + self.ref_cache.subject_displays()
 
     def load_students(self, department=None):
-        """Load students into treeview and comboboxes with section"""
-        # Clear treeview
-        for item in self.student_tree.get_children():
-            self.student_tree.delete(item)
+        """Load students into treeview with section"""
+        self.student_filter = department
         
         # Load students
         if department:
             dept_id = department.split(' - ')[0]
-            self.cursor.execute("SELECT student_id, name, department, batch, current_semester, section, email, phone, status FROM students WHERE department=?", (dept_id,))
+            self.cursor.execute(queries.STUDENT_LIST + " WHERE department=?", (dept_id,))
         else:
-            self.cursor.execute("SELECT student_id, name, department, batch, current_semester, section, email, phone, status FROM students")
+            self.cursor.execute(queries.STUDENT_LIST)
         
-        students = self.cursor.fetchall()
+        self.student_binder.set_rows((student[0], student) for student in self.cursor.fetchall())
         
-        for student in students:
-            self.student_tree.insert("", tk.END, values=student)
+        # Clear filter when showing all
+        if not department:
+            self.filter_stu_dept_combo.set('')
+    
+    def refresh_student_row(self, student_id):
+        """Re-read one student and update, add or remove its row in the list"""
+        query = queries.STUDENT_LIST + " WHERE student_id=?"
+        params = [student_id]
+        if self.student_filter:
+            query += " AND department=?"
+            params.append(self.student_filter.split(' - ')[0])
         
-        # Update student comboboxes
-        student_list = [f"{stu[0]} - {stu[1]}" for stu in students]
+        self.cursor.execute(query, params)
+        self.student_binder.update_row(student_id, self.cursor.fetchone())
+    
+    def load_student_combos(self):
+        """Fill the grade entry and report student comboboxes"""
+        self.cursor.execute("SELECT student_id, name FROM students")
+        student_list = [f"{stu[0]} - {stu[1]}" for stu in self.cursor.fetchall()]
         
         self.theory_student_combo['values'] = student_list
         self.practical_student_combo['values'] = student_list
         self.report_student_combo['values'] = student_list
-        
-        # Clear filter when showing all
-        if not department:
-            self.filter_stu_dept_combo.set('')
 
     def load_theory_grades(self):
         """Load current semester theory grades for selected student"""
-        for item in self.theory_grades_tree.get_children():
-            self.theory_grades_tree.delete(item)
-        
         student_display = self.theory_student_combo.get()
         semester = self.theory_semester_combo.get()
         
         if not student_display or not semester:
+            self.theory_grades_binder.clear()
             return
         
         student_id = student_display.split(' - ')[0]
         
-        self.cursor.execute('''
-            SELECT s.subject_name, t.internal1_marks, t.internal2_marks, t.presentation_marks,
-                   t.assignment1_marks, t.assignment2_marks, t.external_marks, t.total_marks,
-                   t.grade, t.result_status
-            FROM theory_grades t
-            JOIN subjects s ON t.subject_code = s.subject_code
-            WHERE t.student_id = ? AND t.semester = ?
-        ''', (student_id, semester))
-        
-        grades = self.cursor.fetchall()
-        for grade in grades:
-            self.theory_grades_tree.insert("", tk.END, values=grade)
+        self.cursor.execute(queries.THEORY_GRADE_LIST, (student_id, semester))
+        
+        self.theory_grades_binder.set_rows((grade[0], grade[1:]) for grade in self.cursor.fetchall())
+    
+    def refresh_theory_grade_row(self, student_id, subject_code, semester):
+        """Update one row of the theory grade list if it belongs to the shown student/semester"""
+        if (self.theory_student_combo.get().split(' - ')[0] != student_id or
+                self.theory_semester_combo.get() != str(semester)):
+            return
+        
+        self.cursor.execute(queries.THEORY_GRADE_LIST + " AND t.subject_code = ?", (student_id, semester, subject_code))
+        row = self.cursor.fetchone()
+        self.theory_grades_binder.update_row(subject_code, row[1:] if row else None)
 
     def load_practical_grades(self):
         """Load current semester practical grades for selected student"""
-        for item in self.practical_grades_tree.get_children():
-            self.practical_grades_tree.delete(item)
-        
         student_display = self.practical_student_combo.get()
         semester = self.practical_semester_combo.get()
         
         if not student_display or not semester:
+            self.practical_grades_binder.clear()
             return
         
         student_id = student_display.split(' - ')[0]
         
-        self.cursor.execute('''
-            SELECT s.subject_name, p.lab_copies_marks, p.viva_marks, p.practical_exam_marks,
-                   p.total_marks, p.grade, p.result_status
-            FROM practical_grades p
-            JOIN subjects s ON p.subject_code = s.subject_code
-            WHERE p.student_id = ? AND p.semester = ?
-        ''', (student_id, semester))
+        self.cursor.execute(queries.PRACTICAL_GRADE_LIST, (student_id, semester))
+        
+        self.practical_grades_binder.set_rows((grade[0], grade[1:]) for grade in self.cursor.fetchall())
+    
+    def refresh_practical_grade_row(self, student_id, subject_code, semester):
+        """Update one row of the practical grade list if it belongs to the shown student/semester"""
+        if (self.practical_student_combo.get().split(' - ')[0] != student_id or
+                self.practical_semester_combo.get() != str(semester)):
+            return
+        
+        self.cursor.execute(queries.PRACTICAL_GRADE_LIST + " AND p.subject_code = ?", (student_id, semester, subject_code))
+        row = self.cursor.fetchone()
+        self.practical_grades_binder.update_row(subject_code, row[1:] if row else None)
+    
+    # Change notification handlers
+    def setup_change_subscriptions(self):
+        """Subscribe the tabs to change events published by writes"""
+        self.dirty_tabs = set()
+        self.tab_refreshers = {
+            str(self.department_tab): self.load_departments,
+            str(self.section_tab): lambda: self.load_sections(self.section_filter),
+            str(self.subject_tab): lambda: self.load_subjects(*self.subject_filter),
+            str(self.student_tab): lambda: self.load_students(self.student_filter),
+            str(self.theory_grade_tab): self.refresh_theory_tab,
+            str(self.practical_grade_tab): self.refresh_practical_tab,
+            str(self.student_report_tab): self.refresh_report_tab,
+            str(self.rank_tab): self.refresh_rank_tab,
+            str(self.analytics_tab): self.refresh_analytics_tab,
+            str(self.back_paper_tab): self.refresh_back_paper_tab,
+        }
+        
+        bus = self.change_bus
+        bus.subscribe("department", self.on_department_changed, owner="ui")
+        bus.subscribe("section", self.on_section_changed, owner="ui")
+        bus.subscribe("subject", self.on_subject_changed, owner="ui")
+        bus.subscribe("student", self.on_student_changed, owner="ui")
+        bus.subscribe("theory_grade", self.on_theory_grade_changed, owner="ui")
+        bus.subscribe("practical_grade", self.on_practical_grade_changed, owner="ui")
         
-        grades = self.cursor.fetchall()
-        for grade in grades:
-            self.practical_grades_tree.insert("", tk.END, values=grade)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    
+    def start_journal_polling(self):
+        """Follow the change journal from its current end"""
+        self.journal_seq = current_seq(self.conn)
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.journal_job = self.root.after(self.JOURNAL_POLL_MS, self.poll_change_journal)
+    
+    def stop_journal_polling(self):
+        if self.journal_job is not None:
+            self.root.after_cancel(self.journal_job)
+            self.journal_job = None
+    
+    def poll_change_journal(self):
+        """Refresh the views affected by another process's writes, reading only the journal"""
+        # data_version only changes when another connection commits
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self.data_version:
+            self.data_version = data_version
+            try:
+                changes = changes_since(self.conn, self.journal_seq, collapse=True)
+                tables = {change.table for change in changes}
+                if changes:
+                    self.journal_seq = max(change.seq for change in changes)
+            except JournalGapError:
+                # Compacted past our position: refresh everything
+                tables = set(JOURNALED_TABLES)
+                self.journal_seq = current_seq(self.conn)
+            if tables:
+                self.apply_external_changes(tables)
+        self.journal_job = self.root.after(self.JOURNAL_POLL_MS, self.poll_change_journal)
+    
+    def apply_external_changes(self, tables):
+        """Invalidate caches and mark tabs dirty for tables changed outside this process"""
+        affected_tabs = {
+            "departments": [self.department_tab, self.student_report_tab],
+            "sections": [self.section_tab, self.student_report_tab],
+            "subjects": [self.subject_tab, self.theory_grade_tab, self.practical_grade_tab, self.rank_tab,
+                         self.analytics_tab],
+            "students": [self.student_tab, self.theory_grade_tab, self.practical_grade_tab, self.student_report_tab,
+                         self.rank_tab, self.analytics_tab, self.back_paper_tab],
+            "theory_grades": [self.theory_grade_tab, self.student_report_tab, self.rank_tab, self.analytics_tab,
+                              self.back_paper_tab],
+            "practical_grades": [self.practical_grade_tab, self.student_report_tab, self.rank_tab, self.analytics_tab,
+                                 self.back_paper_tab],
+            "supplementary_attempts": [self.back_paper_tab],
+        }
+        for table in ("departments", "sections", "subjects"):
+            if table in tables:
+                self.ref_cache.invalidate(table)
+        if "departments" in tables:
+            self.load_department_combos()
+        if "subjects" in tables:
+            self.load_subject_combos()
+        
+        tabs = {}
+        for table in tables:
+            for tab in affected_tabs.get(table, []):
+                tabs[str(tab)] = tab
+        self.mark_tabs_dirty(*tabs.values())
+    
+    def mark_tabs_dirty(self, *tabs):
+        """Refresh the visible tab now and the others when they are next shown"""
+        current = str(self.notebook.select())
+        for tab in tabs:
+            if str(tab) == current:
+                self.tab_refreshers[current]()
+            else:
+                self.dirty_tabs.add(str(tab))
+    
+    def on_tab_changed(self, event=None):
+        """Lazily refresh a tab that missed changes while hidden"""
+        current = str(self.notebook.select())
+        if current in self.dirty_tabs:
+            self.dirty_tabs.discard(current)
+            self.tab_refreshers[current]()
+    
+    def refresh_theory_tab(self):
+        self.load_student_combos()
+        self.load_theory_grades()
+        self.calculate_theory_sgpa()
+    
+    def refresh_practical_tab(self):
+        self.load_student_combos()
+        self.load_practical_grades()
+    
+    def refresh_rank_tab(self):
+        if self.rank_binder.rows:
+            self.show_rank_list()
+    
+    def refresh_analytics_tab(self):
+        if self.analytics_binder.rows:
+            self.show_result_analytics()
+    
+    def refresh_back_paper_tab(self):
+        if self.back_dept_combo.get():
+            self.show_pending_backs()
+    
+    def refresh_report_tab(self):
+        self.load_student_combos()
+        if self.report_student_combo.get():
+            self.generate_student_report()
+    
+    def on_department_changed(self, event):
+        self.refresh_department_row(event.key)
+        self.load_department_combos()
+    
+    def on_section_changed(self, event):
+        self.refresh_section_row(event.key)
+        self.mark_tabs_dirty(self.student_report_tab)
+    
+    def on_subject_changed(self, event):
+        self.refresh_subject_row(event.key)
+        self.load_subject_combos()
+        self.mark_tabs_dirty(self.theory_grade_tab, self.practical_grade_tab, self.student_report_tab,
+                             self.rank_tab, self.analytics_tab)
+    
+    def on_student_changed(self, event):
+        self.refresh_student_row(event.key)
+        # Student totals and name lists change; refresh those tabs when shown
+        self.mark_tabs_dirty(self.department_tab, self.section_tab, self.theory_grade_tab,
+                             self.practical_grade_tab, self.student_report_tab, self.rank_tab, self.analytics_tab,
+                             self.back_paper_tab)
+    
+    def on_theory_grade_changed(self, event):
+        student_id, subject_code, semester = event.key
+        self.refresh_theory_grade_row(student_id, subject_code, semester)
+        self.calculate_theory_sgpa()
+        self.mark_tabs_dirty(self.rank_tab, self.analytics_tab, self.back_paper_tab)
+        if self.report_student_combo.get().split(' - ')[0] == student_id:
+            self.mark_tabs_dirty(self.student_report_tab)
+    
+    def on_practical_grade_changed(self, event):
+        student_id, subject_code, semester = event.key
+        self.refresh_practical_grade_row(student_id, subject_code, semester)
+        self.mark_tabs_dirty(self.rank_tab, self.analytics_tab, self.back_paper_tab)
+        if self.report_student_combo.get().split(' - ')[0] == student_id:
+            self.mark_tabs_dirty(self.student_report_tab)
 
     # Database operations
     def add_department(self):
@@ -2269,7 +3386,7 @@ class ProfessionalCollegeGradeSystem:
             )
             self.conn.commit()
             messagebox.showinfo("Success", "Department added successfully!")
-            self.load_departments()
+            self.change_bus.publish("department", dept_id, INSERT)
             self.clear_department_form()
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Department ID already exists!")
@@ -2302,7 +3419,7 @@ class ProfessionalCollegeGradeSystem:
             
             self.conn.commit()
             messagebox.showinfo("Success", "Subject added successfully!")
-            self.load_subjects()
+            self.change_bus.publish("subject", subject_code, INSERT)
             self.clear_subject_form()
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Subject code already exists!")
@@ -2338,9 +3455,8 @@ class ProfessionalCollegeGradeSystem:
             
             self.conn.commit()
             messagebox.showinfo("Success", "Student added successfully!")
-            self.load_students()
+            self.change_bus.publish("student", student_id, INSERT)
             self.clear_student_form()
-            self.load_departments()  # Refresh department stats
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Student ID already exists!")
 
@@ -2364,7 +3480,7 @@ class ProfessionalCollegeGradeSystem:
             
             # Calculate grade based on total marks
             grade, grade_point = self.calculate_grade_and_point(total_marks)
-            status = "Pass" if total_marks >= 40 else "Fail"
+            status = grading.result_status(total_marks)
             
             # Update labels
             self.theory_internal_total_label.config(text=f"{internal_total:.2f}")
@@ -2390,11 +3506,11 @@ class ProfessionalCollegeGradeSystem:
             viva = float(self.practical_viva_entry.get() or 0)
             practical_exam = float(self.practical_exam_entry.get() or 0)
             
-            total_marks = lab_copies + viva + practical_exam
+            total_marks = grading.practical_total(lab_copies, viva, practical_exam)
             
             # Calculate grade based on total marks
             grade, grade_point = self.calculate_grade_and_point(total_marks)
-            status = "Pass" if total_marks >= 40 else "Fail"
+            status = grading.result_status(total_marks)
             
             # Update labels
             self.practical_total_marks_label.config(text=f"{total_marks:.2f}")
@@ -2414,24 +3530,7 @@ class ProfessionalCollegeGradeSystem:
 
     def calculate_grade_and_point(self, total_marks):
         """Calculate grade and grade point based on marks"""
-        if total_marks >= 90:
-            return "O", 10.0
-        elif total_marks >= 80:
-            return "A+", 9.0
-        elif total_marks >= 70:
-            return "A", 8.0
-        elif total_marks >= 60:
-            return "B+", 7.0
-        elif total_marks >= 55:
-            return "B", 6.0
-        elif total_marks >= 50:
-            return "C", 5.0
-        elif total_marks >= 45:
-            return "P", 4.0
-        elif total_marks >= 40:
-            return "P", 4.0
-        else:
-            return "F", 0.0
+        return grading.grade_and_point(total_marks)
 
     def save_theory_grade(self):
         """Save theory grade to database"""
@@ -2464,20 +3563,21 @@ class ProfessionalCollegeGradeSystem:
             academic_year = f"{datetime.now().year}-{datetime.now().year + 1}"
             
             # Insert or update grade
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO theory_grades 
-                (student_id, subject_code, semester, academic_year,
-                 internal1_marks, internal2_marks, presentation_marks, assignment1_marks, assignment2_marks,
-                 external_marks, total_marks, grade, grade_point, result_status, back_paper)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (student_id, subject_code, semester, academic_year,
+            self.cursor.execute(queries.THEORY_GRADE_SAVE, (student_id, subject_code, semester, academic_year,
                   internal1, internal2, presentation, assignment1, assignment2,
                   external, total_marks, grade, grade_point, status, back_paper))
             
+            # A relative grade depends on everyone who sat the paper
+            regraded = 0
+            scheme = grading.subject_grading_scheme(self.conn, subject_code)
+            if scheme != grading.ABSOLUTE:
+                regraded = grading.regrade_subject(self.conn, subject_code, scheme)
+            
             self.conn.commit()
             messagebox.showinfo("Success", "Theory grade saved successfully!")
-            self.load_theory_grades()
-            self.calculate_theory_sgpa()
+            self.change_bus.publish("theory_grade", (student_id, subject_code, int(semester)), UPDATE)
+            if regraded:
+                self.mark_tabs_dirty(self.student_report_tab)
             self.clear_theory_form()
             
         except ValueError:
@@ -2513,17 +3613,20 @@ class ProfessionalCollegeGradeSystem:
             academic_year = f"{datetime.now().year}-{datetime.now().year + 1}"
             
             # Insert or update grade
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO practical_grades 
-                (student_id, subject_code, semester, academic_year,
-                 lab_copies_marks, viva_marks, practical_exam_marks, total_marks, grade, grade_point, result_status, back_paper)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (student_id, subject_code, semester, academic_year,
+            self.cursor.execute(queries.PRACTICAL_GRADE_SAVE, (student_id, subject_code, semester, academic_year,
                   lab_copies, viva, practical_exam, total_marks, grade, grade_point, status, back_paper))
             
+            # A relative grade depends on everyone who sat the paper
+            regraded = 0
+            scheme = grading.subject_grading_scheme(self.conn, subject_code)
+            if scheme != grading.ABSOLUTE:
+                regraded = grading.regrade_subject(self.conn, subject_code, scheme)
+            
             self.conn.commit()
             messagebox.showinfo("Success", "Practical grade saved successfully!")
-            self.load_practical_grades()
+            self.change_bus.publish("practical_grade", (student_id, subject_code, int(semester)), UPDATE)
+            if regraded:
+                self.mark_tabs_dirty(self.student_report_tab)
             self.clear_practical_form()
             
         except ValueError:
@@ -2532,7 +3635,7 @@ class ProfessionalCollegeGradeSystem:
             messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
 
     def calculate_theory_sgpa(self):
-        """Calculate SGPA for theory subjects in current semester"""
+        """Show the semester's SGPA over theory and practical subjects"""
         student_display = self.theory_student_combo.get()
         semester = self.theory_semester_combo.get()
         
@@ -2542,24 +3645,10 @@ class ProfessionalCollegeGradeSystem:
         student_id = student_display.split(' - ')[0]
         
         try:
-            # Calculate SGPA for theory subjects
-            self.cursor.execute('''
-                SELECT SUM(s.credits * t.grade_point), SUM(s.credits)
-                FROM theory_grades t
-                JOIN subjects s ON t.subject_code = s.subject_code
-                WHERE t.student_id = ? AND t.semester = ? AND t.result_status = 'Pass'
-            ''', (student_id, semester))
-            
-            result = self.cursor.fetchone()
-            if result and result[1] and result[1] > 0:
-                total_grade_points, total_credits = result
-                sgpa = total_grade_points / total_credits
-                
-                self.theory_credits_label.config(text=str(total_credits))
-                self.theory_sgpa_label.config(text=f"{sgpa:.2f}")
-            else:
-                self.theory_credits_label.config(text="0")
-                self.theory_sgpa_label.config(text="0.00")
+            semesters, _, _ = grading.student_gpa(self.conn, student_id)
+            credits, sgpa = semesters.get(int(semester), (0, 0.0))
+            self.theory_credits_label.config(text=f"{credits:g}")
+            self.theory_sgpa_label.config(text=f"{sgpa:.2f}")
                 
         except sqlite3.Error:
             self.theory_credits_label.config(text="0")
@@ -2594,10 +3683,8 @@ class ProfessionalCollegeGradeSystem:
             
             # Find department display string
             dept_id = values[2]
-            self.cursor.execute("SELECT dept_name FROM departments WHERE dept_id=?", (dept_id,))
-            dept_data = self.cursor.fetchone()
-            if dept_data:
-                dept_display = f"{dept_id} - {dept_data[0]}"
+            dept_display = self.ref_cache.department_display(dept_id)
+            if dept_display:
                 self.sub_dept_combo.set(dept_display)
             
             self.sub_semester_combo.set(values[3])
@@ -2619,10 +3706,8 @@ class ProfessionalCollegeGradeSystem:
             
             # Find department display string
             dept_id = values[2]
-            self.cursor.execute("SELECT dept_name FROM departments WHERE dept_id=?", (dept_id,))
-            dept_data = self.cursor.fetchone()
-            if dept_data:
-                dept_display = f"{dept_id} - {dept_data[0]}"
+            dept_display = self.ref_cache.department_display(dept_id)
+            if dept_display:
                 self.stu_dept_combo.set(dept_display)
             
             self.stu_batch_combo.set(values[3])
@@ -2702,13 +3787,8 @@ class ProfessionalCollegeGradeSystem:
         if department and batch and semester:
             dept_id = department.split(' - ')[0]
             
-            # Query sections for the selected department, batch, and semester
-            self.cursor.execute('''
-                SELECT section_name FROM sections 
-                WHERE department = ? AND batch = ? AND semester = ?
-            ''', (dept_id, int(batch), int(semester)))
-            
-            sections = [row[0] for row in self.cursor.fetchall()]
+            # Sections for the selected department, batch, and semester
+            sections = self.ref_cache.section_names(dept_id, batch, semester)
             self.stu_section_combo['values'] = sections
             
             if sections:
@@ -2811,7 +3891,7 @@ class ProfessionalCollegeGradeSystem:
         
         self.conn.commit()
         messagebox.showinfo("Success", "Department updated successfully!")
-        self.load_departments()
+        self.change_bus.publish("department", dept_id, UPDATE)
         self.clear_department_form()
 
     def update_subject(self):
@@ -2841,7 +3921,7 @@ class ProfessionalCollegeGradeSystem:
         
         self.conn.commit()
         messagebox.showinfo("Success", "Subject updated successfully!")
-        self.load_subjects()
+        self.change_bus.publish("subject", subject_code, UPDATE)
         self.clear_subject_form()
 
     def update_student(self):
@@ -2872,9 +3952,104 @@ class ProfessionalCollegeGradeSystem:
         
         self.conn.commit()
         messagebox.showinfo("Success", "Student updated successfully!")
-        self.load_students()
+        self.change_bus.publish("student", student_id, UPDATE)
         self.clear_student_form()
-        self.load_departments()
+
+    def show_promotion_dialog(self):
+        """Promote a whole batch to its next semester, with a preview of who moves"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Semester Promotion")
+        dialog.transient(self.root)
+        
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        dept_list = self.ref_cache.department_displays()
+        ttk.Label(frame, text="Department *:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        dept_combo = ttk.Combobox(frame, width=25, values=dept_list, state="readonly")
+        dept_combo.grid(row=0, column=1, pady=5, padx=10, sticky=(tk.W, tk.E))
+        
+        ttk.Label(frame, text="Batch *:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        batch_combo = ttk.Combobox(frame, width=25, values=[str(i) for i in range(2020, 2030)], state="readonly")
+        batch_combo.grid(row=1, column=1, pady=5, padx=10, sticky=(tk.W, tk.E))
+        
+        ttk.Label(frame, text="From Semester *:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        semester_combo = ttk.Combobox(frame, width=25, values=[str(i) for i in range(1, promotion.FINAL_SEMESTER)],
+                                      state="readonly")
+        semester_combo.grid(row=2, column=1, pady=5, padx=10, sticky=(tk.W, tk.E))
+        
+        ttk.Label(frame, text="Max Back Papers:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        backs_combo = ttk.Combobox(frame, width=25, values=["No limit"] + [str(i) for i in range(0, 6)], state="readonly")
+        backs_combo.grid(row=3, column=1, pady=5, padx=10, sticky=(tk.W, tk.E))
+        backs_combo.set("No limit")
+        
+        # Pre-fill from the student form
+        if self.stu_dept_combo.get() in dept_list:
+            dept_combo.set(self.stu_dept_combo.get())
+        elif dept_list:
+            dept_combo.set(dept_list[0])
+        batch_combo.set(self.stu_batch_combo.get())
+        semester_combo.set(self.stu_semester_combo.get())
+        
+        preview_label = ttk.Label(frame, text="Choose a batch and semester, then preview.", justify=tk.LEFT)
+        preview_label.grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=10)
+        
+        def selection():
+            department, batch, semester = dept_combo.get(), batch_combo.get(), semester_combo.get()
+            if not department or not batch or not semester:
+                messagebox.showerror("Error", "Please select department, batch and semester!", parent=dialog)
+                return None
+            max_backs = None if backs_combo.get() == "No limit" else int(backs_combo.get())
+            return department.split(' - ')[0], int(batch), int(semester), max_backs
+        
+        def preview():
+            args = selection()
+            if args is None:
+                return None
+            result = promotion.preview_promotion(self.conn, *args)
+            sections = ", ".join(result.target_sections) or "none defined (create them before promoting)"
+            preview_label.config(text=f"Active students in semester {args[2]}: {result.candidates}\n"
+                                      f"Eligible for semester {args[2] + 1}: {result.eligible}\n"
+                                      f"Held back: {result.held_back}\n"
+                                      f"Sections in semester {args[2] + 1}: {sections}")
+            return args, result
+        
+        def promote():
+            previewed = preview()
+            if previewed is None:
+                return
+            (department, batch, semester, max_backs), result = previewed
+            if not result.eligible:
+                messagebox.showinfo("Info", "No students are eligible for promotion.", parent=dialog)
+                return
+            try:
+                promotion.check_target_sections(department, batch, semester, result.target_sections)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                return
+            if not messagebox.askyesno("Confirm", f"Promote {result.eligible} student(s) of {department} batch {batch} "
+                                                  f"to semester {semester + 1}?", parent=dialog):
+                return
+            try:
+                promoted = promotion.promote_batch(self.conn, department, batch, semester, max_backs,
+                                                   getattr(self, 'admin_username', None))
+                self.conn.commit()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                return
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                messagebox.showerror("Database Error", f"An error occurred: {str(e)}", parent=dialog)
+                return
+            messagebox.showinfo("Success", f"{promoted} student(s) promoted to semester {semester + 1}.", parent=dialog)
+            self.apply_external_changes({"students", "sections"})
+            preview()
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=10)
+        ttk.Button(button_frame, text="🔍 Preview", command=preview).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="🎓 Promote", command=promote, style='Action.TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
 
     def delete_department(self):
         """Delete department"""
@@ -2884,9 +4059,10 @@ class ProfessionalCollegeGradeSystem:
             messagebox.showerror("Error", "Please select a department to delete!")
             return
         
-        # Check if department has students
-        self.cursor.execute("SELECT COUNT(*) FROM students WHERE department=?", (dept_id,))
-        student_count = self.cursor.fetchone()[0]
+        # Check if department has students (counter maintained by triggers)
+        self.cursor.execute("SELECT total_students FROM departments WHERE dept_id=?", (dept_id,))
+        count_row = self.cursor.fetchone()
+        student_count = count_row[0] if count_row and count_row[0] else 0
         
         if student_count > 0:
             messagebox.showerror("Error", f"Cannot delete department! There are {student_count} students in this department.")
@@ -2897,7 +4073,7 @@ class ProfessionalCollegeGradeSystem:
             self.cursor.execute("DELETE FROM departments WHERE dept_id=?", (dept_id,))
             self.conn.commit()
             messagebox.showinfo("Success", "Department deleted successfully!")
-            self.load_departments()
+            self.change_bus.publish("department", dept_id, DELETE)
             self.clear_department_form()
 
     def delete_subject(self):
@@ -2909,10 +4085,10 @@ class ProfessionalCollegeGradeSystem:
             return
         
         # Check if subject has grades
-        self.cursor.execute("SELECT COUNT(*) FROM theory_grades WHERE subject_code=?", (subject_code,))
+        self.cursor.execute(queries.THEORY_GRADES_FOR_SUBJECT, (subject_code,))
         theory_count = self.cursor.fetchone()[0]
         
-        self.cursor.execute("SELECT COUNT(*) FROM practical_grades WHERE subject_code=?", (subject_code,))
+        self.cursor.execute(queries.PRACTICAL_GRADES_FOR_SUBJECT, (subject_code,))
         practical_count = self.cursor.fetchone()[0]
         
         if theory_count > 0 or practical_count > 0:
@@ -2924,7 +4100,7 @@ class ProfessionalCollegeGradeSystem:
             self.cursor.execute("DELETE FROM subjects WHERE subject_code=?", (subject_code,))
             self.conn.commit()
             messagebox.showinfo("Success", "Subject deleted successfully!")
-            self.load_subjects()
+            self.change_bus.publish("subject", subject_code, DELETE)
             self.clear_subject_form()
 
     def delete_student(self):
@@ -2936,10 +4112,10 @@ class ProfessionalCollegeGradeSystem:
             return
         
         # Check if student has grades
-        self.cursor.execute("SELECT COUNT(*) FROM theory_grades WHERE student_id=?", (student_id,))
+        self.cursor.execute(queries.THEORY_GRADES_FOR_STUDENT, (student_id,))
         theory_count = self.cursor.fetchone()[0]
         
-        self.cursor.execute("SELECT COUNT(*) FROM practical_grades WHERE student_id=?", (student_id,))
+        self.cursor.execute(queries.PRACTICAL_GRADES_FOR_STUDENT, (student_id,))
         practical_count = self.cursor.fetchone()[0]
         
         result = messagebox.askyesno("Confirm", 
@@ -2947,16 +4123,16 @@ class ProfessionalCollegeGradeSystem:
                                    f"This will also delete {theory_count} theory grades and {practical_count} practical grades.")
         if result:
             # Delete grades first
-            self.cursor.execute("DELETE FROM theory_grades WHERE student_id=?", (student_id,))
-            self.cursor.execute("DELETE FROM practical_grades WHERE student_id=?", (student_id,))
+            self.cursor.execute(queries.THEORY_GRADES_DELETE_STUDENT, (student_id,))
+            self.cursor.execute(queries.PRACTICAL_GRADES_DELETE_STUDENT, (student_id,))
+            self.cursor.execute(queries.SUPPLEMENTARY_ATTEMPTS_DELETE_STUDENT, (student_id,))
             
             # Delete student
             self.cursor.execute("DELETE FROM students WHERE student_id=?", (student_id,))
             self.conn.commit()
             messagebox.showinfo("Success", "Student deleted successfully!")
-            self.load_students()
+            self.change_bus.publish("student", student_id, DELETE)
             self.clear_student_form()
-            self.load_departments()
 
     def export_all_students(self):
         """Export all students data to CSV"""
@@ -2968,13 +4144,7 @@ class ProfessionalCollegeGradeSystem:
             )
             
             if filename:
-                self.cursor.execute('''
-                    SELECT s.student_id, s.name, s.department, d.dept_name, s.batch, s.current_semester, 
-                           s.section, s.email, s.phone, s.address, s.blood_group, s.admission_date, s.status
-                    FROM students s
-                    LEFT JOIN departments d ON s.department = d.dept_id
-                    ORDER BY s.department, s.batch, s.current_semester, s.student_id
-                ''')
+                self.cursor.execute(queries.STUDENT_EXPORT)
                 
                 students = self.cursor.fetchall()
                 
@@ -2996,6 +4166,27 @@ class ProfessionalCollegeGradeSystem:
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export data: {str(e)}")
 
+    def export_changes(self):
+        """Export students and grades changed since the last export to the configured target"""
+        output_dir = filedialog.askdirectory(title="Select Export Directory")
+        if not output_dir:
+            return
+        
+        target = self.get_setting("export_target", incremental_export.DEFAULT_TARGET)
+        fmt = self.get_setting("export_format", "csv")
+        
+        def show_summary(summary):
+            lines = [f"{name}: {result['upserts']} changed, {result['deletes']} deleted"
+                     for name, result in summary["datasets"].items()]
+            self.log_security_event("DATA_EXPORT", f"{summary['mode'].title()} export for {target} "
+                                                   f"up to change {summary['to_seq']}")
+            messagebox.showinfo("Success", f"{summary['mode'].title()} export for {target} written to "
+                                           f"{output_dir}\n\n" + "\n".join(lines))
+        
+        self.run_in_background(incremental_export.export_changes, self.db_path, output_dir, target, fmt,
+                               on_done=show_summary,
+                               on_error=lambda e: messagebox.showerror("Export Error", f"Failed to export changes: {str(e)}"))
+    
     def export_student_report(self):
         """Export detailed student report for selected student"""
         student_display = self.report_student_combo.get()
@@ -3013,39 +4204,11 @@ class ProfessionalCollegeGradeSystem:
             if filename:
                 student_id = student_display.split(' - ')[0]
                 
-                # Get student basic info
-                self.cursor.execute('''
-                    SELECT s.*, d.dept_name 
-                    FROM students s 
-                    LEFT JOIN departments d ON s.department = d.dept_id 
-                    WHERE s.student_id = ?
-                ''', (student_id,))
-                student_info = self.cursor.fetchone()
-                
-                # Get all theory grades
-                self.cursor.execute('''
-                    SELECT t.semester, s.subject_code, s.subject_name, s.credits, s.subject_type,
-                           t.internal1_marks, t.internal2_marks, t.presentation_marks, 
-                           t.assignment1_marks, t.assignment2_marks, t.external_marks,
-                           t.total_marks, t.grade, t.grade_point, t.result_status
-                    FROM theory_grades t
-                    JOIN subjects s ON t.subject_code = s.subject_code
-                    WHERE t.student_id = ?
-                    ORDER BY t.semester, s.subject_code
-                ''', (student_id,))
-                theory_grades = self.cursor.fetchall()
-                
-                # Get all practical grades
-                self.cursor.execute('''
-                    SELECT p.semester, s.subject_code, s.subject_name, s.credits, s.subject_type,
-                           p.lab_copies_marks, p.viva_marks, p.practical_exam_marks,
-                           p.total_marks, p.grade, p.grade_point, p.result_status
-                    FROM practical_grades p
-                    JOIN subjects s ON p.subject_code = s.subject_code
-                    WHERE p.student_id = ?
-                    ORDER BY p.semester, s.subject_code
-                ''', (student_id,))
-                practical_grades = self.cursor.fetchall()
+                # Student info and all theory and practical grades, cached per grade version
+                report = self.report_cache.report(student_id)
+                student_info = report.student
+                theory_grades = report.theory_rows
+                practical_grades = report.practical_rows
                 
                 with open(filename, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
@@ -3101,16 +4264,9 @@ class ProfessionalCollegeGradeSystem:
         
         student_id = student_display.split(' - ')[0]
         
-        # Get student info with section
-        self.cursor.execute('''
-            SELECT s.*, d.dept_name, sec.class_teacher 
-            FROM students s 
-            LEFT JOIN departments d ON s.department = d.dept_id 
-            LEFT JOIN sections sec ON s.section = sec.section_name AND s.department = sec.department 
-                                   AND s.batch = sec.batch AND s.current_semester = sec.semester
-            WHERE s.student_id = ?
-        ''', (student_id,))
-        student_data = self.cursor.fetchone()
+        # Student info with section, grades and SGPA/CGPA, cached per grade version
+        report = self.report_cache.report(student_id)
+        student_data = report.student
         
         if student_data:
             info_text = f"Student ID: {student_data[0]}\n"
@@ -3132,26 +4288,12 @@ class ProfessionalCollegeGradeSystem:
         for tab in self.report_notebook.tabs():
             self.report_notebook.forget(tab)
         
-        # Calculate overall statistics
-        total_credits_all = 0
-        total_grade_points_all = 0
         current_semester = student_data[4] if student_data else 1
         
         # Generate semester-wise reports
         semesters_with_data = []
         
-        # Check theory grades for semesters
-        self.cursor.execute("SELECT DISTINCT semester FROM theory_grades WHERE student_id=? ORDER BY semester", (student_id,))
-        theory_semesters = [row[0] for row in self.cursor.fetchall()]
-        
-        # Check practical grades for semesters  
-        self.cursor.execute("SELECT DISTINCT semester FROM practical_grades WHERE student_id=? ORDER BY semester", (student_id,))
-        practical_semesters = [row[0] for row in self.cursor.fetchall()]
-        
-        # Combine and get unique semesters
-        all_semesters = sorted(set(theory_semesters + practical_semesters))
-        
-        for semester in all_semesters:
+        for semester, rows, semester_credits, sgpa in report.semesters:
             semesters_with_data.append(semester)
             
             # Create frame for this semester
@@ -3181,51 +4323,12 @@ class ProfessionalCollegeGradeSystem:
             
             tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
             
-            semester_credits = 0
-            semester_grade_points = 0
-            
-            # Add theory grades
-            self.cursor.execute('''
-                SELECT s.subject_name, s.credits, t.total_marks, t.grade, t.grade_point, t.result_status
-                FROM theory_grades t
-                JOIN subjects s ON t.subject_code = s.subject_code
-                WHERE t.student_id = ? AND t.semester = ?
-            ''', (student_id, semester))
-            
-            theory_grades = self.cursor.fetchall()
-            for grade in theory_grades:
-                subject_name, credits, total, grade_val, grade_point, status = grade
-                tree.insert("", tk.END, values=("Theory", subject_name, credits, total, grade_val, grade_point, status))
-                
-                if status == "Pass":
-                    semester_credits += credits
-                    semester_grade_points += credits * grade_point
-                    total_credits_all += credits
-                    total_grade_points_all += credits * grade_point
+            # Add theory and practical grades
+            for row in rows:
+                tree.insert("", tk.END, values=row)
             
-            # Add practical grades
-            self.cursor.execute('''
-                SELECT s.subject_name, s.credits, p.total_marks, p.grade, p.grade_point, p.result_status
-                FROM practical_grades p
-                JOIN subjects s ON p.subject_code = s.subject_code
-                WHERE p.student_id = ? AND p.semester = ?
-            ''', (student_id, semester))
-            
-            practical_grades = self.cursor.fetchall()
-            for grade in practical_grades:
-                subject_name, credits, total, grade_val, grade_point, status = grade
-                tree.insert("", tk.END, values=("Practical", subject_name, credits, total, grade_val, grade_point, status))
-                
-                if status == "Pass":
-                    semester_credits += credits
-                    semester_grade_points += credits * grade_point
-                    total_credits_all += credits
-                    total_grade_points_all += credits * grade_point
-            
-            # Calculate semester SGPA
+            # Semester SGPA
             if semester_credits > 0:
-                sgpa = semester_grade_points / semester_credits
-                
                 sgpa_frame = ttk.Frame(semester_frame)
                 sgpa_frame.pack(fill=tk.X, pady=5)
                 
@@ -3233,13 +4336,8 @@ class ProfessionalCollegeGradeSystem:
                          font=('Arial', 12, 'bold'), foreground="blue").pack()
         
         # Update overall statistics
-        if total_credits_all > 0:
-            cgpa = total_grade_points_all / total_credits_all
-            self.cgpa_label.config(text=f"{cgpa:.2f}")
-            self.total_credits_label.config(text=str(total_credits_all))
-        else:
-            self.cgpa_label.config(text="0.00")
-            self.total_credits_label.config(text="0")
+        self.cgpa_label.config(text=f"{report.cgpa:.2f}")
+        self.total_credits_label.config(text=f"{report.total_credits:g}")
         
         self.current_semester_label.config(text=str(current_semester))
         
@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+import grading
+import queries
+
+# Grade table -> (the 60-mark exam component a re-attempt replaces, components the total is built from)
+GRADE_TABLES = {
+    "theory_grades": ("external_marks", ["internal1_marks", "internal2_marks", "presentation_marks",
+                                         "assignment1_marks", "assignment2_marks", "external_marks"]),
+    "practical_grades": ("practical_exam_marks", ["lab_copies_marks", "viva_marks", "practical_exam_marks"]),
+}
+MAX_EXAM_MARKS = 60
+
+# Result of one recorded re-attempt; cleared means the back paper is no longer outstanding
+Attempt = namedtuple("Attempt", ["attempt_no", "total_marks", "grade", "grade_point", "result_status", "cleared"])
+
+
+def pending_backs(conn, department, semester=None, subject_code=None):
+    """Outstanding back papers of a department's students, read through the partial back_paper indexes"""
+    sql = queries.BACK_PAPER_PENDING
+    params = [department]
+    if semester:
+        sql += queries.BACK_PAPER_SEMESTER_FILTER
+        params.append(int(semester))
+    if subject_code:
+        sql += queries.BACK_PAPER_SUBJECT_FILTER
+        params.append(subject_code)
+    return conn.execute(sql + queries.BACK_PAPER_ORDER, params).fetchall()
+
+
+def record_attempt(conn, grade_table, grade_id, exam_marks, exam_date=None, recorded_by=None):
+    """Record a supplementary exam for a failed grade row; a pass clears the back paper.
+
+    The re-attempt replaces the exam component and keeps the internal
+    marks. Supplementary results use the absolute scale. A pass rewrites
+    the grade row, so semester_results (SGPA, CGPA, ranks) follow through
+    its triggers. The caller commits. Raises ValueError if the row has
+    no outstanding back paper or the marks are out of range.
+    """
+    exam_column, components = GRADE_TABLES[grade_table]
+    if not 0 <= exam_marks <= MAX_EXAM_MARKS:
+        raise ValueError(f"Exam marks must be between 0 and {MAX_EXAM_MARKS}")
+
+    row = conn.execute(f'''
+        SELECT student_id, subject_code, semester, back_paper, {", ".join(components)}
+        FROM {grade_table} WHERE id = ?
+    ''', (grade_id,)).fetchone()
+    if row is None or not row[3]:
+        raise ValueError("This grade has no outstanding back paper")
+    student_id, subject_code, semester = row[:3]
+
+    marks = dict(zip(components, (value or 0 for value in row[4:])))
+    marks[exam_column] = exam_marks
+    if grade_table == "theory_grades":
+        total = grading.theory_total(*(marks[column] for column in components))
+    else:
+        total = grading.practical_total(*(marks[column] for column in components))
+    grade, grade_point = grading.grade_and_point(total)
+    status = grading.result_status(total)
+
+    attempt_no = conn.execute(queries.SUPPLEMENTARY_ATTEMPT_COUNT, (grade_table, grade_id)).fetchone()[0] + 1
+    conn.execute('''
+        INSERT INTO supplementary_attempts
+        (grade_table, grade_id, student_id, subject_code, semester, attempt_no, exam_date,
+         exam_marks, total_marks, grade, grade_point, result_status, recorded_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (grade_table, grade_id, student_id, subject_code, semester, attempt_no, exam_date,
+          exam_marks, total, grade, grade_point, status, recorded_by))
+
+    cleared = status == "Pass"
+    if cleared:
+        conn.execute(f'''
+            UPDATE {grade_table}
+            SET {exam_column} = ?, total_marks = ?, grade = ?, grade_point = ?, result_status = ?,
+                back_paper = 0, grading_scheme = ?
+            WHERE id = ?
+        ''', (exam_marks, total, grade, grade_point, status, grading.ABSOLUTE, grade_id))
+    return Attempt(attempt_no, total, grade, grade_point, status, cleared)
+
+
+def attempts_for(conn, grade_table, grade_id):
+    return conn.execute(queries.SUPPLEMENTARY_ATTEMPT_LIST, (grade_table, grade_id)).fetchall()
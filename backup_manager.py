@@ -0,0 +1,272 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from change_journal import acknowledge, current_seq, write_changeset
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_BACKUP_DIR = "backups"
+DEFAULT_INTERVAL_HOURS = 24
+DEFAULT_KEEP_COUNT = 7
+DEFAULT_KEEP_DAYS = 30
+DEFAULT_INCREMENTAL_MINUTES = 60
+
+# change_consumers name: journal entries after the last backup must survive compaction
+JOURNAL_CONSUMER = "incremental_backups"
+
+
+class BackupManager:
+    """Online backups of the live database, copied a few pages at a time.
+
+    run_backup() opens its own connections, so it is meant for a worker
+    thread. The copy proceeds pages_per_step pages at a time inside one read
+    transaction: with WAL enabled that pins a consistent snapshot, so grade
+    entry keeps writing throughout and the copy never has to restart.
+    Every copy is checked with PRAGMA quick_check and recorded in the
+    backups table. Scheduled copies are pruned by count and age; manual
+    copies saved elsewhere are left alone.
+
+    Between full copies, run_incremental() writes only the rows changed
+    since the previous backup (from the change journal) to a small
+    changeset file; restore_backup.py replays the chain onto a full copy.
+    """
+
+    def __init__(self, db_path, backup_dir=DEFAULT_BACKUP_DIR, keep_count=DEFAULT_KEEP_COUNT,
+                 keep_days=DEFAULT_KEEP_DAYS, pages_per_step=256):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep_count = keep_count
+        self.keep_days = keep_days
+        self.pages_per_step = pages_per_step
+        self.running = False
+        self.progress = None  # (pages copied, total pages) while a backup runs
+
+    def _progress(self, status, remaining, total):
+        self.progress = (total - remaining, total)
+
+    def backup_path(self, conn, backup_dir, started, extension=".db"):
+        """Unique file name for a backup started at the given time.
+
+        Names of pruned backups are not reused, so retention can never
+        delete a newer file recorded under an old row's path.
+        """
+        stem = os.path.join(backup_dir, f"college_system_backup_{started.strftime('%Y%m%d_%H%M%S')}")
+        path, suffix = stem + extension, 1
+        while os.path.exists(path) or conn.execute("SELECT 1 FROM backups WHERE file_path = ?", (path,)).fetchone():
+            path = f"{stem}_{suffix}{extension}"
+            suffix += 1
+        return path
+
+    @staticmethod
+    def _record(conn, record):
+        cursor = conn.execute('''
+            INSERT INTO backups
+            (kind, file_path, started_at, finished_at, duration_ms, pages, size_bytes, status, check_result,
+             base_seq, change_seq)
+            VALUES (:kind, :file_path, :started_at, :finished_at, :duration_ms, :pages, :size_bytes,
+                    :status, :check_result, :base_seq, :change_seq)
+        ''', record)
+        record["id"] = cursor.lastrowid
+
+    def run_backup(self, kind="scheduled", backup_dir=None):
+        """Copy the database, verify the copy and record it; returns the backups row as a dict"""
+        self.running = True
+        self.progress = (0, 0)
+        backup_dir = backup_dir or self.backup_dir
+        started = datetime.now()
+        start = time.perf_counter()
+        path = None
+        change_seq = None
+        source = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            try:
+                os.makedirs(backup_dir, exist_ok=True)
+                path = self.backup_path(source, backup_dir, started)
+                target = sqlite3.connect(path)
+                try:
+                    source.execute("BEGIN")
+                    change_seq = current_seq(source)
+                    try:
+                        source.backup(target, pages=self.pages_per_step, progress=self._progress)
+                    finally:
+                        source.execute("COMMIT")
+                    # The copy inherits WAL mode; a backup should be one self-contained file
+                    target.execute("PRAGMA journal_mode=DELETE")
+                    check = target.execute("PRAGMA quick_check").fetchone()[0]
+                    pages = target.execute("PRAGMA page_count").fetchone()[0]
+                finally:
+                    target.close()
+                status = "ok" if check == "ok" else "corrupt"
+            except (sqlite3.Error, OSError) as e:
+                status, check, pages = "failed", str(e), 0
+
+            if status != "ok" and path and os.path.exists(path):
+                # Never leave a copy behind that would fail a restore
+                os.remove(path)
+
+            record = {
+                "kind": kind,
+                "file_path": path,
+                "started_at": started.strftime(TIME_FORMAT),
+                "finished_at": datetime.now().strftime(TIME_FORMAT),
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "pages": pages,
+                "size_bytes": os.path.getsize(path) if status == "ok" else 0,
+                "status": status,
+                "check_result": check,
+                "base_seq": None,
+                "change_seq": change_seq,
+            }
+            self._record(source, record)
+            if status == "ok" and kind == "scheduled":
+                acknowledge(source, JOURNAL_CONSUMER, change_seq)
+
+            record["pruned"] = self.apply_retention(source) if kind == "scheduled" else []
+            return record
+        finally:
+            source.close()
+            self.running = False
+            self.progress = None
+
+    def run_incremental(self):
+        """Write the rows changed since the last scheduled backup to a changeset file.
+
+        Returns the backups row as a dict, or None if there is no full
+        backup to build on yet or nothing has changed since the last one.
+        """
+        self.running = True
+        source = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            row = source.execute('''
+                SELECT change_seq FROM backups
+                WHERE kind IN ('scheduled', 'incremental') AND status = 'ok' AND change_seq IS NOT NULL
+                ORDER BY change_seq DESC LIMIT 1
+            ''').fetchone()
+            if row is None or row[0] == current_seq(source):
+                return None
+
+            started = datetime.now()
+            start = time.perf_counter()
+            path = None
+            try:
+                os.makedirs(self.backup_dir, exist_ok=True)
+                path = self.backup_path(source, self.backup_dir, started, ".changes.jsonl.gz")
+                # One read transaction: the changed rows, counts and range form a snapshot
+                source.execute("BEGIN")
+                try:
+                    change_seq, changes = write_changeset(source, path, row[0])
+                finally:
+                    source.execute("COMMIT")
+                status, check = "ok", f"{changes} changes"
+            except (sqlite3.Error, OSError) as e:
+                status, check, change_seq = "failed", str(e), None
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+            record = {
+                "kind": "incremental",
+                "file_path": path,
+                "started_at": started.strftime(TIME_FORMAT),
+                "finished_at": datetime.now().strftime(TIME_FORMAT),
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "pages": None,
+                "size_bytes": os.path.getsize(path) if status == "ok" else 0,
+                "status": status,
+                "check_result": check,
+                "base_seq": row[0],
+                "change_seq": change_seq,
+                "pruned": [],
+            }
+            self._record(source, record)
+            if status == "ok":
+                acknowledge(source, JOURNAL_CONSUMER, change_seq)
+            return record
+        finally:
+            source.close()
+            self.running = False
+
+    def apply_retention(self, conn, now=None):
+        """Delete scheduled backups beyond keep_count or older than keep_days.
+
+        The newest good copy is always kept, however old. Changesets that
+        start before the oldest remaining full copy can no longer be
+        replayed and are removed with it. Returns the paths that were removed.
+        """
+        cutoff = ((now or datetime.now()) - timedelta(days=self.keep_days)).strftime(TIME_FORMAT)
+        rows = conn.execute('''
+            SELECT id, file_path, started_at FROM backups
+            WHERE kind = 'scheduled' AND status = 'ok'
+            ORDER BY started_at DESC, id DESC
+        ''').fetchall()
+
+        pruned = []
+        for index, (backup_id, path, started_at) in enumerate(rows):
+            if index == 0 or (index < self.keep_count and started_at >= cutoff):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not remove old backup {path}: {e}")
+                continue
+            conn.execute("UPDATE backups SET status = 'pruned' WHERE id = ?", (backup_id,))
+            pruned.append(path)
+
+        orphaned = conn.execute('''
+            SELECT id, file_path FROM backups
+            WHERE kind = 'incremental' AND status = 'ok' AND base_seq < (
+                SELECT MIN(change_seq) FROM backups WHERE kind = 'scheduled' AND status = 'ok')
+        ''').fetchall()
+        for backup_id, path in orphaned:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not remove old backup {path}: {e}")
+                continue
+            conn.execute("UPDATE backups SET status = 'pruned' WHERE id = ?", (backup_id,))
+            pruned.append(path)
+        if conn.in_transaction:
+            conn.commit()
+        return pruned
+
+    @staticmethod
+    def last_backup(conn):
+        """(finished_at, file_path) of the newest verified backup, or None"""
+        return conn.execute('''
+            SELECT finished_at, file_path FROM backups
+            WHERE status IN ('ok', 'pruned')
+            ORDER BY id DESC LIMIT 1
+        ''').fetchone()
+
+    @staticmethod
+    def incremental_due(conn, interval_minutes, now=None):
+        """True if the last scheduled full or incremental backup is older than the interval"""
+        row = conn.execute('''
+            SELECT MAX(started_at) FROM backups
+            WHERE kind IN ('scheduled', 'incremental') AND status IN ('ok', 'pruned', 'failed')
+        ''').fetchone()
+        if row[0] is None:
+            return False
+        return (now or datetime.now()) - datetime.strptime(row[0], TIME_FORMAT) >= timedelta(minutes=interval_minutes)
+
+    def is_due(self, conn, interval_hours, retry_minutes=60, now=None):
+        """True if no scheduled backup has succeeded within the interval.
+
+        After a failed attempt the next one waits retry_minutes, so a full
+        disk does not mean a failing backup every scheduler tick.
+        """
+        now = now or datetime.now()
+        last_ok, last_failed = conn.execute('''
+            SELECT MAX(CASE WHEN status IN ('ok', 'pruned') THEN started_at END),
+                   MAX(CASE WHEN status IN ('failed', 'corrupt') THEN started_at END)
+            FROM backups WHERE kind = 'scheduled'
+        ''').fetchone()
+        if last_ok and now - datetime.strptime(last_ok, TIME_FORMAT) < timedelta(hours=interval_hours):
+            return False
+        if last_failed and now - datetime.strptime(last_failed, TIME_FORMAT) < timedelta(minutes=retry_minutes):
+            return False
+        return True
@@ -0,0 +1,276 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import grade_history
+import grading
+import queries
+import report_cache
+from generate_dataset import DatasetGenerator, open_for_bulk_load
+
+DEFAULT_THRESHOLD = 0.10
+SECURITY_LOG_ROWS = 50000
+EVENT_TYPES = ["LOGIN_SUCCESS", "LOGIN_FAILED", "LOGOUT", "PASSWORD_CHANGE", "DATABASE_BACKUP"]
+
+
+def percentile(samples, fraction):
+    """Linear-interpolated percentile of a list of samples"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples, operations=1):
+    """Latency summary in milliseconds; throughput if each sample covers several operations"""
+    summary = {
+        "runs": len(samples),
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "min_ms": min(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+    if operations > 1:
+        summary["ops_per_sec"] = operations / percentile(samples, 0.50)
+    return summary
+
+
+class GradeSystemBenchmark:
+    """Times the application's hot paths against a copy of a generated database.
+
+    Each benchmark runs the same SQL the UI runs (see queries.py) so results
+    track real changes to statements, indexes and schema. Widget updates are
+    not included; the numbers are database and Python time only.
+    """
+
+    def __init__(self, db_path, runs=30, seed=7):
+        self.workdir = tempfile.mkdtemp(prefix="grade-bench-")
+        self.db_path = os.path.join(self.workdir, "bench.db")
+        shutil.copyfile(db_path, self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        grade_history.register_changed_by(self.conn)
+        self.runs = runs
+        self.rng = random.Random(seed)
+
+        self.student_ids = [row[0] for row in self.conn.execute("SELECT student_id FROM students")]
+        self.departments = [row[0] for row in self.conn.execute("SELECT dept_id FROM departments")]
+        self.seed_security_logs()
+
+    def close(self):
+        self.conn.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def seed_security_logs(self):
+        """Generated databases have no activity log; add a realistic volume"""
+        count = self.conn.execute("SELECT COUNT(*) FROM security_logs").fetchone()[0]
+        if count >= SECURITY_LOG_ROWS:
+            return
+        start = datetime(2024, 1, 1).timestamp()
+        rows = []
+        for index in range(SECURITY_LOG_ROWS - count):
+            stamp = datetime.fromtimestamp(start + index * 600).strftime("%Y-%m-%d %H:%M:%S")
+            rows.append((self.rng.choice(EVENT_TYPES), "Benchmark activity", "admin", stamp))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO security_logs (event_type, description, username, timestamp) VALUES (?, ?, ?, ?)",
+                rows)
+
+    def time_runs(self, func, runs=None):
+        samples = []
+        for _ in range(runs or self.runs):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    # Benchmarks
+    def bench_load_students(self):
+        return summarize(self.time_runs(lambda: self.conn.execute(queries.STUDENT_LIST).fetchall()))
+
+    def bench_load_students_by_department(self):
+        def run():
+            dept_id = self.rng.choice(self.departments)
+            self.conn.execute(queries.STUDENT_LIST + " WHERE department=?", (dept_id,)).fetchall()
+        return summarize(self.time_runs(run))
+
+    def bench_load_subjects(self):
+        return summarize(self.time_runs(
+            lambda: self.conn.execute(queries.SUBJECT_LIST + queries.SUBJECT_ORDER).fetchall()))
+
+    def bench_load_security_logs(self):
+        def run():
+            event_type = self.rng.choice(EVENT_TYPES)
+            self.conn.execute(queries.SECURITY_LOG_LIST + queries.SECURITY_LOG_EVENT_FILTER + queries.SECURITY_LOG_ORDER,
+                              (event_type,)).fetchall()
+        return summarize(self.time_runs(run))
+
+    def bench_student_report(self):
+        """Building one student's report model, as a report cache miss does"""
+        def run():
+            student_id = self.rng.choice(self.student_ids)
+            report_cache.build_report(self.conn, student_id)
+        return summarize(self.time_runs(run, runs=self.runs * 10))
+
+    def bench_student_report_cached(self):
+        """Reopening reports already in the report cache: one version lookup each"""
+        cache = report_cache.ReportCache(self.conn)
+        student_ids = self.student_ids[:cache.max_entries]
+        for student_id in student_ids:
+            cache.report(student_id)
+
+        def run():
+            cache.report(self.rng.choice(student_ids))
+        return summarize(self.time_runs(run, runs=self.runs * 10))
+
+    def bench_export_all_students(self):
+        path = os.path.join(self.workdir, "students.csv")
+
+        def run():
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerows(self.conn.execute(queries.STUDENT_EXPORT))
+        return summarize(self.time_runs(run, runs=max(self.runs // 3, 3)))
+
+    def bench_grade_save(self):
+        """One committed upsert per save, as the grade entry form does"""
+        subjects = [row[0] for row in self.conn.execute("SELECT subject_code FROM subjects WHERE subject_type='Theory'")]
+        saves = 200
+
+        def run():
+            for _ in range(saves):
+                student_id = self.rng.choice(self.student_ids)
+                marks = [self.rng.uniform(0, maximum) for maximum in (20, 20, 10, 5, 5, 60)]
+                total = grading.theory_total(*marks)
+                grade, grade_point = grading.grade_and_point(total)
+                status = grading.result_status(total)
+                self.conn.execute(queries.THEORY_GRADE_SAVE, (
+                    student_id, self.rng.choice(subjects), 1, "2025-2026", *marks, total,
+                    grade, grade_point, status, 1 if status == "Fail" else 0))
+                self.conn.commit()
+        return summarize(self.time_runs(run, runs=max(self.runs // 3, 3)), operations=saves)
+
+    def bench_grade_calculation(self):
+        totals = [self.rng.uniform(0, 100) for _ in range(100000)]
+
+        def run():
+            for total in totals:
+                grading.grade_and_point(total)
+        return summarize(self.time_runs(run, runs=max(self.runs // 3, 3)), operations=len(totals))
+
+    def bench_backup(self):
+        path = os.path.join(self.workdir, "backup.db")
+
+        def run():
+            if os.path.exists(path):
+                os.remove(path)
+            target = sqlite3.connect(path)
+            self.conn.backup(target)
+            target.close()
+        return summarize(self.time_runs(run, runs=max(self.runs // 6, 3)))
+
+    def run_all(self, only=None):
+        results = {}
+        for name in sorted(dir(self)):
+            if not name.startswith("bench_"):
+                continue
+            short_name = name[len("bench_"):]
+            if only and short_name not in only:
+                continue
+            results[short_name] = getattr(self, name)()
+            print(f"  {short_name:<28} p50 {results[short_name]['p50_ms']:10.2f} ms   "
+                  f"p95 {results[short_name]['p95_ms']:10.2f} ms")
+        return results
+
+    def metadata(self):
+        counts = {}
+        for table in ("students", "subjects", "theory_grades", "practical_grades", "security_logs"):
+            counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "runs": self.runs,
+            "rows": counts,
+        }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (name, metric, old, new, change) for every p50/p95 slower than baseline by more than threshold"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            change = (current[metric] - previous[metric]) / previous[metric] if previous[metric] else 0
+            if change > threshold:
+                regressions.append((name, metric, previous[metric], current[metric], change))
+    return regressions
+
+
+def build_database(path, students, seed):
+    conn = open_for_bulk_load(path)
+    DatasetGenerator(conn, seed=seed, students=students).generate()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the grade system's hot paths")
+    parser.add_argument("--db", help="generated database to benchmark (copied, never modified)")
+    parser.add_argument("--students", type=int, default=5000, help="size of the database built when --db is not given")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before flagging a regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    db_path = args.db
+    build_dir = None
+    if not db_path:
+        build_dir = tempfile.mkdtemp(prefix="grade-bench-db-")
+        db_path = os.path.join(build_dir, "generated.db")
+        print(f"Building {args.students}-student database (seed {args.seed})")
+        build_database(db_path, args.students, args.seed)
+
+    benchmark = GradeSystemBenchmark(db_path, runs=args.runs)
+    try:
+        print("Running benchmarks")
+        report = {"meta": benchmark.metadata(), "results": benchmark.run_all(args.only)}
+    finally:
+        benchmark.close()
+        if build_dir:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(report["results"], baseline, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for name, metric, old, new, change in regressions:
+                print(f"  {name} {metric}: {old:.2f} ms -> {new:.2f} ms (+{change:.0%})")
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
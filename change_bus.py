@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+# Operations carried by change events
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+# entity: "department", "section", "subject", "student", "theory_grade", ...
+# key: primary key of the changed row (a tuple for composite keys)
+ChangeEvent = namedtuple("ChangeEvent", ["entity", "key", "op"])
+
+
+class ChangeBus:
+    """Publish/subscribe hub that tells interested views which rows a write touched"""
+
+    def __init__(self):
+        self.subscribers = {}  # entity -> [(handler, owner)]
+
+    def subscribe(self, entity, handler, owner=None):
+        """Call handler(event) for every change to entity ("*" for all entities)"""
+        self.subscribers.setdefault(entity, []).append((handler, owner))
+
+    def unsubscribe_owner(self, owner):
+        """Drop every subscription registered with the given owner tag"""
+        for entity, handlers in self.subscribers.items():
+            self.subscribers[entity] = [h for h in handlers if h[1] != owner]
+
+    def publish(self, entity, key, op):
+        """Notify subscribers that a row of entity was inserted, updated or deleted"""
+        event = ChangeEvent(entity, key, op)
+        handlers = self.subscribers.get(entity, []) + self.subscribers.get("*", [])
+        for handler, _ in handlers:
+            handler(event)
+        return event
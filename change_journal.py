@@ -0,0 +1,246 @@
+import gzip
+import json
+from collections import namedtuple
+from datetime import datetime
+
+import schema
+
+# Tables whose changes are journaled; together they hold everything a
+# restore needs (counter tables are recomputed, backups/change_log are local)
+JOURNALED_TABLES = ['admin_users', 'system_settings', 'departments', 'sections', 'subjects',
+                    'students', 'theory_grades', 'practical_grades', 'supplementary_attempts', 'moderations',
+                    'moderation_changes', 'grade_events', 'grade_snapshots', 'security_logs']
+
+CHANGESET_FORMAT = 1
+
+# One journal entry; key is the list of the row's primary key values
+JournalChange = namedtuple("JournalChange", ["seq", "table", "key", "op", "changed_at"])
+
+
+class JournalGapError(Exception):
+    """The requested changes were compacted away; the reader must resync in full"""
+
+
+def primary_key_columns(cursor, table):
+    """Declared primary key columns of a table, in key order"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = sorted((row[5], row[1]) for row in cursor.fetchall() if row[5])
+    return [name for _, name in columns]
+
+
+def install_change_journal(cursor):
+    """Create change_log and the triggers that append one row per changed row.
+
+    change_log.row_key is the JSON array of the row's primary key values.
+    An update that changes the key is journaled as a delete of the old key
+    plus an update of the new one.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,      -- JSON array of primary key values
+            op TEXT NOT NULL,           -- 'I', 'U' or 'D'
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Readers of the journal and how far each has read; compaction keeps
+    # every entry some consumer still needs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_consumers (
+            name TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    for table in JOURNALED_TABLES:
+        key_columns = primary_key_columns(cursor, table)
+        new_key = "json_array(" + ", ".join(f"NEW.{column}" for column in key_columns) + ")"
+        old_key = "json_array(" + ", ".join(f"OLD.{column}" for column in key_columns) + ")"
+
+        cursor.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_journal_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_key, op) VALUES ('{table}', {new_key}, 'I');
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_journal_update AFTER UPDATE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_key, op)
+                SELECT '{table}', {old_key}, 'D' WHERE {old_key} IS NOT {new_key};
+                INSERT INTO change_log (table_name, row_key, op) VALUES ('{table}', {new_key}, 'U');
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_journal_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_key, op) VALUES ('{table}', {old_key}, 'D');
+            END;
+        ''')
+
+
+def current_seq(conn):
+    """Highest sequence number ever assigned (survives deleting old journal rows)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(conn, since_seq, until_seq=None, tables=None, collapse=False, limit=None):
+    """Journal entries after since_seq (up to until_seq), oldest first.
+
+    With collapse=True each row appears once, as its latest entry, which
+    is all an exporter or cache needs. Raises JournalGapError if entries
+    after since_seq have already been compacted away.
+    """
+    oldest = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+    if since_seq < current_seq(conn) and (oldest is None or oldest > since_seq + 1):
+        raise JournalGapError(f"change journal has been compacted past sequence {since_seq}")
+
+    conditions = ["seq > ?"]
+    params = [since_seq]
+    if until_seq is not None:
+        conditions.append("seq <= ?")
+        params.append(until_seq)
+    if tables:
+        conditions.append(f"table_name IN ({', '.join('?' * len(tables))})")
+        params.extend(tables)
+    where = " AND ".join(conditions)
+
+    if collapse:
+        # SQLite takes the bare columns from the row holding MAX(seq)
+        sql = (f"SELECT MAX(seq), table_name, row_key, op, changed_at FROM change_log WHERE {where} "
+               f"GROUP BY table_name, row_key ORDER BY MAX(seq)")
+    else:
+        sql = f"SELECT seq, table_name, row_key, op, changed_at FROM change_log WHERE {where} ORDER BY seq"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+
+    return [JournalChange(seq, table, json.loads(row_key), op, changed_at)
+            for seq, table, row_key, op, changed_at in conn.execute(sql, params)]
+
+
+def register_consumer(conn, name, start_seq=None):
+    """Start tracking a consumer; a new one starts at the current sequence (after its full read)"""
+    conn.execute("INSERT OR IGNORE INTO change_consumers (name, last_seq) VALUES (?, ?)",
+                 (name, current_seq(conn) if start_seq is None else start_seq))
+
+
+def consumer_seq(conn, name):
+    row = conn.execute("SELECT last_seq FROM change_consumers WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def acknowledge(conn, name, seq):
+    """Record that a consumer has processed every change up to seq"""
+    conn.execute('''
+        INSERT INTO change_consumers (name, last_seq, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(name) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq), updated_at = CURRENT_TIMESTAMP
+    ''', (name, seq))
+
+
+def drop_consumer(conn, name):
+    conn.execute("DELETE FROM change_consumers WHERE name = ?", (name,))
+
+
+def compact(conn, keep_days=7):
+    """Delete journal entries every consumer has read and that are older than keep_days.
+
+    keep_days leaves recent history for consumers registered later or
+    resyncing. Returns the number of entries removed.
+    """
+    floor = conn.execute("SELECT MIN(last_seq) FROM change_consumers").fetchone()[0]
+    if floor is None:
+        floor = current_seq(conn)
+    cursor = conn.execute("DELETE FROM change_log WHERE seq <= ? AND changed_at < datetime('now', ?)",
+                          (floor, f"-{keep_days} days"))
+    return cursor.rowcount
+
+
+def journaled_row_counts(conn):
+    """Row count of every journaled table, from the maintained counters where exact"""
+    maintained = schema.table_row_counts(conn.cursor())
+    counts = {}
+    for table in JOURNALED_TABLES:
+        count, exact = maintained.get(table, (None, False))
+        counts[table] = count if exact else conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return counts
+
+
+def write_changeset(conn, path, since_seq):
+    """Write every row changed after since_seq to a gzipped JSON Lines changeset.
+
+    Several changes to one row collapse into its final state: an upsert of
+    the current row, or a delete if it no longer exists. The first line is
+    a header with the sequence range and the table row counts at the end
+    of the range. Call inside a read transaction so rows, counts and the
+    range come from one snapshot. Returns (to_seq, changes written).
+    """
+    to_seq = current_seq(conn)
+    changes = changes_since(conn, since_seq, to_seq, collapse=True)
+
+    key_columns = {table: primary_key_columns(conn.cursor(), table) for table in JOURNALED_TABLES}
+    written = 0
+    with gzip.open(path, "wt", encoding="utf-8") as changeset:
+        header = {
+            "type": "header",
+            "format": CHANGESET_FORMAT,
+            "base_seq": since_seq,
+            "seq": to_seq,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "row_counts": journaled_row_counts(conn),
+        }
+        changeset.write(json.dumps(header) + "\n")
+
+        for change in changes:
+            table, key = change.table, change.key
+            where = " AND ".join(f"{column} = ?" for column in key_columns[table])
+            cursor = conn.execute(f"SELECT * FROM {table} WHERE {where}", key)
+            row = cursor.fetchone()
+            if row is None:
+                change = {"op": "delete", "table": table, "key": key}
+            else:
+                columns = [description[0] for description in cursor.description]
+                change = {"op": "upsert", "table": table, "key": key, "row": dict(zip(columns, row))}
+            changeset.write(json.dumps(change) + "\n")
+            written += 1
+    return to_seq, written
+
+
+def read_changeset_header(path):
+    with gzip.open(path, "rt", encoding="utf-8") as changeset:
+        header = json.loads(changeset.readline())
+    if header.get("type") != "header":
+        raise ValueError(f"{path} is not a changeset file")
+    return header
+
+
+def apply_changeset(conn, path, expected_base_seq):
+    """Replay a changeset; deletes first so upserts never collide with removed rows.
+
+    Returns the header. Raises ValueError if the changeset does not start
+    where the previous one (or the full backup) ended.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as changeset:
+        header = json.loads(changeset.readline())
+        if header.get("type") != "header" or header.get("format") != CHANGESET_FORMAT:
+            raise ValueError(f"{path} is not a changeset file")
+        if header["base_seq"] != expected_base_seq:
+            raise ValueError(f"{path} starts at sequence {header['base_seq']}, "
+                             f"expected {expected_base_seq}: the chain has a gap")
+        changes = [json.loads(line) for line in changeset]
+
+    key_columns = {}
+    for table in {change["table"] for change in changes}:
+        key_columns[table] = primary_key_columns(conn.cursor(), table)
+
+    for change in changes:
+        if change["op"] == "delete":
+            where = " AND ".join(f"{column} = ?" for column in key_columns[change["table"]])
+            conn.execute(f"DELETE FROM {change['table']} WHERE {where}", change["key"])
+    for change in changes:
+        if change["op"] == "upsert":
+            columns = list(change["row"])
+            conn.execute(f"INSERT OR REPLACE INTO {change['table']} ({', '.join(columns)}) "
+                         f"VALUES ({', '.join('?' * len(columns))})", [change["row"][c] for c in columns])
+    return header
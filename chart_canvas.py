@@ -0,0 +1,242 @@
+import time
+import tkinter as tk
+
+try:
+    import numpy as np
+except ImportError:  # series are downsampled in pure Python instead
+    np = None
+
+# Drawing must fit in one frame at 60 Hz to keep the window responsive
+FRAME_BUDGET_MS = 16
+
+SERIES_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f"]
+
+
+def merge_bins(counts, edges, max_bins):
+    """Sum adjacent bins so at most max_bins remain (bars narrower than a pixel cannot be drawn)"""
+    if len(counts) <= max_bins:
+        return list(counts), list(edges)
+    step = -(-len(counts) // max_bins)
+    if np is not None:
+        merged = np.add.reduceat(np.asarray(counts), np.arange(0, len(counts), step))
+        return merged.tolist(), list(edges[::step]) + ([edges[-1]] if (len(edges) - 1) % step else [])
+    merged = [sum(counts[start:start + step]) for start in range(0, len(counts), step)]
+    return merged, list(edges[::step]) + ([edges[-1]] if (len(edges) - 1) % step else [])
+
+
+def downsample(xs, ys, buckets):
+    """Keep the first, minimum, maximum and last point of each of buckets equal slices.
+
+    A line through the result looks the same as through every point at
+    one bucket per pixel column, so peaks and dips survive.
+    """
+    if len(xs) <= buckets * 4:
+        return list(xs), list(ys)
+    if np is not None:
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        bounds = np.linspace(0, len(xs), buckets + 1).astype(np.int64)
+        starts, ends = bounds[:-1], bounds[1:] - 1
+        slice_ids = np.repeat(np.arange(buckets), np.diff(bounds))
+        min_at = _first_match(ys == np.minimum.reduceat(ys, starts)[slice_ids], starts, len(xs))
+        max_at = _first_match(ys == np.maximum.reduceat(ys, starts)[slice_ids], starts, len(xs))
+        keep = np.unique(np.concatenate((starts, ends, min_at, max_at)))
+        return xs[keep].tolist(), ys[keep].tolist()
+
+    keep = set()
+    size = len(xs) / buckets
+    for bucket in range(buckets):
+        start, end = int(bucket * size), int((bucket + 1) * size) - 1
+        chunk = range(start, end + 1)
+        keep.update((start, end, min(chunk, key=ys.__getitem__), max(chunk, key=ys.__getitem__)))
+    keep = sorted(keep)
+    return [xs[index] for index in keep], [ys[index] for index in keep]
+
+
+def _first_match(matches, starts, length):
+    """Index of the first True in each slice beginning at starts (every slice has one)"""
+    return np.minimum.reduceat(np.where(matches, np.arange(length), length), starts)
+
+
+class ChartCanvas(tk.Canvas):
+    """tk.Canvas base for simple charts: axes, title and redraw bookkeeping.
+
+    Subclasses implement draw_plot(). A redraw happens only when the data
+    or the canvas size has changed since the last one, and bursts of
+    resize events collapse into a single redraw from after_idle. The time
+    the last redraw took is kept in last_draw_ms.
+    """
+
+    MARGIN_LEFT = 45
+    MARGIN_RIGHT = 15
+    MARGIN_TOP = 25
+    MARGIN_BOTTOM = 30
+
+    def __init__(self, master, title="", **kw):
+        kw.setdefault("background", "white")
+        kw.setdefault("highlightthickness", 0)
+        super().__init__(master, **kw)
+        self.title = title
+        self.data_version = 0
+        self.drawn_state = None  # (data_version, width, height) last drawn
+        self.redraw_job = None
+        self.last_draw_ms = None
+        self.bind("<Configure>", lambda event: self.schedule_redraw())
+
+    def set_title(self, title):
+        if title != self.title:
+            self.title = title
+            self.data_changed()
+
+    def data_changed(self):
+        self.data_version += 1
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        if self.redraw_job is None:
+            self.redraw_job = self.after_idle(self.redraw)
+
+    def redraw(self):
+        self.redraw_job = None
+        width, height = self.winfo_width(), self.winfo_height()
+        state = (self.data_version, width, height)
+        if state == self.drawn_state or width < self.MARGIN_LEFT + self.MARGIN_RIGHT + 10:
+            return
+        start = time.perf_counter()
+        self.delete("all")
+        plot = (self.MARGIN_LEFT, self.MARGIN_TOP, width - self.MARGIN_RIGHT, height - self.MARGIN_BOTTOM)
+        if self.title:
+            self.create_text(width / 2, self.MARGIN_TOP / 2, text=self.title, font=('Arial', 10, 'bold'))
+        if not self.draw_plot(*plot):
+            self.create_text(width / 2, height / 2, text="No data", fill="gray")
+        self.drawn_state = state
+        self.last_draw_ms = (time.perf_counter() - start) * 1000
+
+    def draw_plot(self, left, top, right, bottom):
+        """Draw into the plot area; return False when there is nothing to draw"""
+        raise NotImplementedError
+
+    def draw_axes(self, left, top, right, bottom, y_max, y_ticks=4, y_format="{:g}"):
+        self.create_line(left, top, left, bottom, right, bottom, fill="black")
+        for tick in range(y_ticks + 1):
+            value = y_max * tick / y_ticks
+            y = bottom - (bottom - top) * tick / y_ticks
+            self.create_line(left - 4, y, left, y, fill="black")
+            if tick:
+                self.create_line(left + 1, y, right, y, fill="#e8e8e8")
+            self.create_text(left - 6, y, text=y_format.format(value), anchor=tk.E, font=('Arial', 8))
+
+
+class HistogramChart(ChartCanvas):
+    """Bar chart of pre-binned counts (marks bins from histogram_bins, or grade letters)"""
+
+    def __init__(self, master, title="", bar_color="#4a90d9", **kw):
+        super().__init__(master, title, **kw)
+        self.bar_color = bar_color
+        self.counts = []
+        self.labels = []
+        self.edges = None
+
+    def set_bins(self, counts, edges=None, labels=None):
+        """Show counts; edges (len(counts) + 1 numbers) or labels (one per bar) name the bars"""
+        counts = list(counts)
+        edges = list(edges) if edges is not None else None
+        labels = list(labels) if labels is not None else None
+        if (counts, edges, labels) == (self.counts, self.edges, self.labels):
+            return
+        self.counts, self.edges, self.labels = counts, edges, labels
+        self.data_changed()
+
+    def draw_plot(self, left, top, right, bottom):
+        if not self.counts or not any(self.counts):
+            return False
+        counts, edges, labels = self.counts, self.edges, self.labels
+        if edges is not None:
+            counts, edges = merge_bins(counts, edges, max(int(right - left) // 2, 1))
+        y_max = max(counts)
+        self.draw_axes(left, top, right, bottom, y_max, y_ticks=min(4, y_max), y_format="{:.0f}")
+
+        bar_width = (right - left) / len(counts)
+        label_every = max(1, -(-len(counts) * 40 // int(right - left)))
+        for index, count in enumerate(counts):
+            x0 = left + index * bar_width
+            if count:
+                y0 = bottom - (bottom - top) * count / y_max
+                self.create_rectangle(x0 + 1, y0, x0 + bar_width - 1, bottom, fill=self.bar_color, outline="")
+            if index % label_every == 0:
+                if labels is not None:
+                    text, x = labels[index], x0 + bar_width / 2
+                else:
+                    text, x = f"{edges[index]:g}", x0
+                self.create_text(x, bottom + 4, text=text, anchor=tk.N, font=('Arial', 8))
+        if labels is None:
+            self.create_text(right, bottom + 4, text=f"{edges[-1]:g}", anchor=tk.N, font=('Arial', 8))
+        return True
+
+
+class TrendChart(ChartCanvas):
+    """Line chart of one or more named (x, y) series on a shared scale"""
+
+    def __init__(self, master, title="", y_max=None, **kw):
+        super().__init__(master, title, **kw)
+        self.y_max = y_max
+        self.series = {}
+        self.series_y_max = 0
+
+    def set_series(self, series):
+        """Show {name: (xs, ys)}, xs ascending"""
+        if np is not None:
+            # Converted once here, not on every redraw
+            series = {name: (np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+                      for name, (xs, ys) in series.items()}
+        else:
+            series = {name: (list(xs), list(ys)) for name, (xs, ys) in series.items()}
+        if self._same_series(series):
+            return
+        self.series = series
+        self.series_y_max = max((max(ys) for _, ys in series.values() if len(ys)), default=0)
+        self.data_changed()
+
+    def _same_series(self, series):
+        if list(series) != list(self.series):
+            return False
+        if np is None:
+            return series == self.series
+        return all(np.array_equal(xs, self.series[name][0]) and np.array_equal(ys, self.series[name][1])
+                   for name, (xs, ys) in series.items())
+
+    def draw_plot(self, left, top, right, bottom):
+        points = [(xs, ys) for xs, ys in self.series.values() if len(xs)]
+        if not points:
+            return False
+        x_min = min(xs[0] for xs, _ in points)
+        x_max = max(xs[-1] for xs, _ in points)
+        y_max = self.y_max or self.series_y_max or 1
+        x_span = (x_max - x_min) or 1
+        self.draw_axes(left, top, right, bottom, y_max)
+
+        buckets = max(int(right - left), 1)
+        legend_y = top
+        for index, (name, (xs, ys)) in enumerate(self.series.items()):
+            if not len(xs):
+                continue
+            color = SERIES_COLORS[index % len(SERIES_COLORS)]
+            xs, ys = downsample(xs, ys, buckets)
+            coords = []
+            for x, y in zip(xs, ys):
+                coords.append(left + (right - left) * (x - x_min) / x_span)
+                coords.append(bottom - (bottom - top) * y / y_max)
+            if len(xs) > 1:
+                # One line item for the whole series: item count, not point count, drives Tk's cost
+                self.create_line(*coords, fill=color, width=2)
+            if len(xs) <= 50:
+                for x, y in zip(coords[::2], coords[1::2]):
+                    self.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=color)
+            self.create_text(right - 4, legend_y, text=str(name), fill=color, anchor=tk.NE, font=('Arial', 8, 'bold'))
+            legend_y += 12
+
+        # x labels: every value if few, else the ends
+        x_values = sorted({x for xs, _ in points for x in xs}) if sum(len(xs) for xs, _ in points) <= 50 else [x_min, x_max]
+        for x in x_values:
+            self.create_text(left + (right - left) * (x - x_min) / x_span, bottom + 4, text=f"{x:g}",
+                             anchor=tk.N, font=('Arial', 8))
+        return True
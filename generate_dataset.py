@@ -0,0 +1,279 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+import grading
+import schema
+from change_journal import install_change_journal
+from grade_history import install_grade_history
+
+KNOWN_DEPARTMENTS = [
+    ('CSE', 'Computer Science & Engineering'),
+    ('ECE', 'Electronics & Communication Engineering'),
+    ('ME', 'Mechanical Engineering'),
+    ('CE', 'Civil Engineering'),
+    ('EE', 'Electrical Engineering'),
+    ('IT', 'Information Technology'),
+    ('CHE', 'Chemical Engineering'),
+    ('BT', 'Biotechnology'),
+]
+
+FIRST_NAMES = ['Aarav', 'Aditi', 'Amit', 'Ananya', 'Arjun', 'Divya', 'Farhan', 'Isha', 'Karan', 'Kavya',
+               'Manish', 'Meera', 'Neha', 'Nikhil', 'Pooja', 'Rahul', 'Riya', 'Rohan', 'Sakshi', 'Sneha',
+               'Soumen', 'Tanvi', 'Varun', 'Vikram', 'Zoya']
+LAST_NAMES = ['Banerjee', 'Bose', 'Chatterjee', 'Das', 'Ghosh', 'Gupta', 'Iyer', 'Jain', 'Khan', 'Kumar',
+              'Mehta', 'Mukherjee', 'Nair', 'Patel', 'Rao', 'Reddy', 'Roy', 'Sen', 'Sharma', 'Singh']
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-']
+
+SEMESTERS = range(1, 9)
+
+
+class DatasetGenerator:
+    """Deterministic synthetic college database for scale testing.
+
+    Everything is drawn from one seeded random.Random in a fixed order, so the
+    same arguments always produce the same database. Rows are streamed into
+    executemany() in large transactions, and the student counter triggers
+    are installed only after the bulk load.
+    """
+
+    def __init__(self, conn, seed=42, departments=5, students=1000, batches=4,
+                 sections_per_batch=3, theory_per_semester=5, practical_per_semester=2,
+                 current_year=2025, batch_size=50000):
+        self.conn = conn
+        self.rng = random.Random(seed)
+        self.department_count = departments
+        self.student_count = students
+        self.batches = [current_year - offset for offset in range(batches)]
+        self.sections_per_batch = sections_per_batch
+        self.theory_per_semester = theory_per_semester
+        self.practical_per_semester = practical_per_semester
+        self.current_year = current_year
+        self.batch_size = batch_size
+
+        self.departments = []
+        self.students = []  # (student_id, dept_id, batch, current_semester, ability)
+        self.subjects = {}  # (dept_id, semester) -> [(subject_code, subject_type, difficulty)]
+        self.counts = {}
+
+    def current_semester(self, batch):
+        """Odd semester a batch is in this academic year (1, 3, 5, 7)"""
+        return min(2 * (self.current_year - batch) + 1, 8)
+
+    def generate(self):
+        cursor = self.conn.cursor()
+        schema.create_tables(cursor)
+        schema.add_column_if_missing(cursor, "sections", "total_students", "INTEGER DEFAULT 0")
+
+        self._load("departments", self._department_rows(),
+                   "INSERT INTO departments (dept_id, dept_name, hod_name, established_year) VALUES (?, ?, ?, ?)")
+        self._load("sections", self._section_rows(), '''
+            INSERT INTO sections (section_name, department, semester, batch, class_teacher, room_number)
+            VALUES (?, ?, ?, ?, ?, ?)''')
+        self._load("subjects", self._subject_rows(), '''
+            INSERT INTO subjects
+            (subject_code, subject_name, credits, semester, department, subject_type, max_marks, min_pass_marks, teaching_hours)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''')
+
+        self._load("students", self._student_rows(), '''
+            INSERT INTO students
+            (student_id, name, department, batch, current_semester, section, email, phone, address, blood_group, admission_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''')
+        self._load("theory_grades", self._grade_rows("Theory", self._theory_row), '''
+            INSERT INTO theory_grades
+            (student_id, subject_code, semester, academic_year,
+             internal1_marks, internal2_marks, presentation_marks, assignment1_marks, assignment2_marks,
+             external_marks, total_marks, grade, grade_point, result_status, back_paper)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''')
+        self._load("practical_grades", self._grade_rows("Practical", self._practical_row), '''
+            INSERT INTO practical_grades
+            (student_id, subject_code, semester, academic_year,
+             lab_copies_marks, viva_marks, practical_exam_marks, total_marks, grade, grade_point, result_status, back_paper)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''')
+
+        # Indexes are cheaper to build once over the loaded rows
+        start = time.perf_counter()
+        schema.create_indexes(cursor)
+        schema.install_student_counters(cursor)
+        schema.install_row_counters(cursor)
+        schema.install_semester_results(cursor)
+        schema.install_student_versions(cursor)
+        install_grade_history(cursor)
+        install_change_journal(cursor)
+        self.conn.commit()
+        print(f"  indexes and counters: installed in {time.perf_counter() - start:.1f}s")
+        return self.counts
+
+    def _load(self, table, rows, sql):
+        """executemany rows in batch_size chunks, one transaction per chunk"""
+        start = time.perf_counter()
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.batch_size:
+                total += self._insert_chunk(sql, chunk)
+                chunk = []
+        if chunk:
+            total += self._insert_chunk(sql, chunk)
+        self.counts[table] = total
+        print(f"  {table}: {total} rows in {time.perf_counter() - start:.1f}s")
+
+    def _insert_chunk(self, sql, chunk):
+        with self.conn:
+            self.conn.executemany(sql, chunk)
+        return len(chunk)
+
+    # Row generators
+    def _department_rows(self):
+        for index in range(self.department_count):
+            if index < len(KNOWN_DEPARTMENTS):
+                dept_id, dept_name = KNOWN_DEPARTMENTS[index]
+            else:
+                dept_id, dept_name = f"D{index + 1:02d}", f"Department {index + 1}"
+            self.departments.append(dept_id)
+            yield (dept_id, dept_name, f"Dr. {self._name()}", self.rng.randint(1990, 2015))
+
+    def _section_rows(self):
+        room = 100
+        for dept_id in self.departments:
+            for batch in self.batches:
+                for letter in self._section_letters():
+                    room += 1
+                    yield (f"{dept_id}-{letter}", dept_id, self.current_semester(batch), batch,
+                           f"Dr. {self.rng.choice(LAST_NAMES)}", f"Room {room}")
+
+    def _section_letters(self):
+        return [chr(ord('A') + i) for i in range(self.sections_per_batch)]
+
+    def _subject_rows(self):
+        for dept_id in self.departments:
+            for semester in SEMESTERS:
+                catalog = []
+                for number in range(1, self.theory_per_semester + 1):
+                    code = f"{dept_id}{semester}{number:02d}"
+                    catalog.append((code, "Theory", self.rng.gauss(0, 6)))
+                    yield (code, f"{dept_id} Theory {semester}.{number}", self.rng.choice([3, 4]),
+                           semester, dept_id, "Theory", 100, 40, self.rng.choice([3, 4]) * 12)
+                for number in range(1, self.practical_per_semester + 1):
+                    code = f"{dept_id}{semester}L{number}"
+                    catalog.append((code, "Practical", self.rng.gauss(-4, 4)))
+                    yield (code, f"{dept_id} Lab {semester}.{number}", 2,
+                           semester, dept_id, "Practical", 100, 40, 24)
+                self.subjects[(dept_id, semester)] = catalog
+
+    def _student_rows(self):
+        rng = self.rng
+        letters = self._section_letters()
+        for index in range(self.student_count):
+            dept_id = self.departments[index % len(self.departments)]
+            batch = self.batches[(index // len(self.departments)) % len(self.batches)]
+            semester = self.current_semester(batch)
+            student_id = f"{dept_id}{batch % 100:02d}{index:07d}"
+            name = self._name()
+            cohort_index = index // (len(self.departments) * len(self.batches))
+            section = f"{dept_id}-{letters[cohort_index % len(letters)]}" if letters else None
+
+            yield (student_id, name, dept_id, batch, semester, section,
+                   f"{student_id.lower()}@college.edu", f"9{rng.randint(100000000, 999999999)}",
+                   f"{rng.randint(1, 200)} Park Street", rng.choice(BLOOD_GROUPS),
+                   f"{batch}-08-01", "Active" if rng.random() > 0.02 else "Inactive")
+
+            # Ability shifts the student's whole transcript up or down
+            self.students.append((student_id, dept_id, batch, semester, rng.gauss(0, 1)))
+
+    def _grade_rows(self, subject_type, make_row):
+        """Grades for every completed semester (those before the current one)"""
+        for student_id, dept_id, batch, semester, ability in self.students:
+            for graded_semester in range(1, semester):
+                academic_year = self._academic_year(batch, graded_semester)
+                for code, code_type, difficulty in self.subjects[(dept_id, graded_semester)]:
+                    if code_type == subject_type:
+                        yield make_row(student_id, code, graded_semester, academic_year, ability, difficulty)
+
+    def _academic_year(self, batch, semester):
+        year = batch + (semester - 1) // 2
+        return f"{year}-{year + 1}"
+
+    def _score(self, ability, difficulty):
+        """Fraction of full marks: centred near 62%, ~8% of papers below the pass mark"""
+        return min(max(self.rng.gauss(0.62 + 0.13 * ability - difficulty / 100, 0.09), 0.0), 1.0)
+
+    def _marks(self, fraction, maximum):
+        """Component marks around the overall fraction, rounded to half marks"""
+        value = self.rng.gauss(fraction, 0.06) * maximum
+        return round(min(max(value, 0), maximum) * 2) / 2
+
+    def _theory_row(self, student_id, code, semester, academic_year, ability, difficulty):
+        fraction = self._score(ability, difficulty)
+        marks = [self._marks(fraction, maximum) for maximum in (20, 20, 10, 5, 5, 60)]
+        total = grading.theory_total(*marks)
+        grade, grade_point = grading.grade_and_point(total)
+        status = grading.result_status(total)
+        return (student_id, code, semester, academic_year, *marks, total, grade, grade_point,
+                status, 1 if status == "Fail" else 0)
+
+    def _practical_row(self, student_id, code, semester, academic_year, ability, difficulty):
+        fraction = self._score(ability, difficulty)
+        marks = [self._marks(fraction, maximum) for maximum in (20, 20, 60)]
+        total = grading.practical_total(*marks)
+        grade, grade_point = grading.grade_and_point(total)
+        status = grading.result_status(total)
+        return (student_id, code, semester, academic_year, *marks, total, grade, grade_point,
+                status, 1 if status == "Fail" else 0)
+
+    def _name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+
+def open_for_bulk_load(path):
+    """Connection tuned for building a database from scratch"""
+    conn = sqlite3.connect(path)
+    # The file is rebuilt from scratch on failure, so skip the journal during the load
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic college database for scale testing")
+    parser.add_argument("--output", default="generated_college_system.db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--batches", type=int, default=4, help="admission years currently enrolled")
+    parser.add_argument("--sections-per-batch", type=int, default=3)
+    parser.add_argument("--theory-per-semester", type=int, default=5)
+    parser.add_argument("--practical-per-semester", type=int, default=2)
+    parser.add_argument("--current-year", type=int, default=2025)
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per transaction")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing output file")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        if not args.force:
+            parser.error(f"{args.output} already exists (use --force to overwrite)")
+        os.remove(args.output)
+
+    conn = open_for_bulk_load(args.output)
+
+    start = time.perf_counter()
+    print(f"Generating {args.output} (seed {args.seed})")
+    generator = DatasetGenerator(conn, seed=args.seed, departments=args.departments, students=args.students,
+                                 batches=args.batches, sections_per_batch=args.sections_per_batch,
+                                 theory_per_semester=args.theory_per_semester,
+                                 practical_per_semester=args.practical_per_semester,
+                                 current_year=args.current_year, batch_size=args.batch_size)
+    counts = generator.generate()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    grades = counts.get("theory_grades", 0) + counts.get("practical_grades", 0)
+    print(f"Done in {time.perf_counter() - start:.1f}s: {counts['students']} students, {grades} grades")
+
+
+if __name__ == "__main__":
+    main()
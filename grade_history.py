@@ -0,0 +1,265 @@
+import json
+from collections import namedtuple
+
+import queries
+from back_papers import GRADE_TABLES
+
+# Students need at least this many events since their last snapshot before
+# take_snapshots writes a new one
+SNAPSHOT_MIN_EVENTS = 20
+# Most snapshots one scheduler tick writes
+SNAPSHOT_BATCH = 200
+
+# A student's grade in one subject at some point in time; marks maps each
+# component column to its value
+GradeState = namedtuple("GradeState", ["grade_table", "subject_code", "semester", "total_marks", "grade",
+                                       "grade_point", "result_status", "marks"])
+
+# One recorded change. op is 'I', 'U' or 'D' (a deleted grade has no
+# values), or 'B': the values a grade had when the history began, logged
+# just before its first change and dated when the grade was created
+GradeEvent = namedtuple("GradeEvent", ["id", "grade_table", "subject_code", "semester", "op", "total_marks",
+                                       "grade", "grade_point", "result_status", "marks", "changed_by", "changed_at"])
+
+# Author of each connection's grade writes, by id(conn); the history
+# triggers read it through the connection's grade_changed_by() function
+_changed_by = {}
+
+EVENT_COLUMNS = ("grade_table, student_id, subject_code, semester, op, total_marks, grade, grade_point, "
+                 "result_status, marks, changed_by, changed_at")
+
+
+def _marks_json(grade_table, row):
+    """json_object() of a grade table's component columns of row (NEW, OLD or a table name)"""
+    return "json_object(" + ", ".join(f"'{column}', {row}.{column}" for column in GRADE_TABLES[grade_table][1]) + ")"
+
+
+def _event_values(grade_table, row, op, changed_by="grade_changed_by()", changed_at="CURRENT_TIMESTAMP"):
+    return (f"'{grade_table}', {row}.student_id, {row}.subject_code, {row}.semester, '{op}', {row}.total_marks, "
+            f"{row}.grade, {row}.grade_point, {row}.result_status, {_marks_json(grade_table, row)}, "
+            f"{changed_by}, {changed_at}")
+
+
+def _baseline(grade_table):
+    """Log OLD as it was before the history began, if this is the first change to it"""
+    return f'''
+                INSERT INTO grade_events ({EVENT_COLUMNS})
+                SELECT {_event_values(grade_table, "OLD", "B", "NULL", "COALESCE(OLD.created_date, '')")}
+                WHERE NOT EXISTS (SELECT 1 FROM grade_events e
+                                  WHERE e.student_id = OLD.student_id AND e.grade_table = '{grade_table}'
+                                    AND e.subject_code = OLD.subject_code AND e.semester = OLD.semester);'''
+
+
+def install_grade_history(cursor):
+    """Create grade_events, grade_snapshots and the triggers that log every grade write.
+
+    Each insert, update and delete of a theory or practical grade appends
+    an event with the row's values and the writing connection's user (see
+    register_changed_by); updates that change nothing are not logged. A
+    grade that predates the history gets a 'B' event with its old values
+    on its first change, so no up-front copy of the grade tables is needed.
+    The installing connection is registered.
+    """
+    register_changed_by(cursor.connection)
+
+    # Older databases read the author from one row shared by every connection
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_%_history_%' "
+                   "AND sql LIKE '%grade_history_context%'")
+    if cursor.fetchone():
+        for grade_table in GRADE_TABLES:
+            for event in ("insert", "update", "delete"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS trg_{grade_table}_history_{event}")
+    cursor.execute("DROP TABLE IF EXISTS grade_history_context")
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'grade_snapshot_due'")
+    due_existed = cursor.fetchone() is not None
+
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS grade_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            grade_table TEXT NOT NULL,
+            student_id TEXT NOT NULL,
+            subject_code TEXT NOT NULL,
+            semester INTEGER NOT NULL,
+            op TEXT NOT NULL,               -- 'B', 'I', 'U' or 'D'
+            total_marks REAL,
+            grade TEXT,
+            grade_point REAL,
+            result_status TEXT,
+            marks TEXT,                     -- JSON object of the component marks
+            changed_by TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        -- Replay reads one student's events after a snapshot, in order
+        CREATE INDEX IF NOT EXISTS idx_grade_events_student ON grade_events(student_id, id);
+
+        -- A student's complete grades as of one of their events (last_event_id)
+        CREATE TABLE IF NOT EXISTS grade_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            last_event_id INTEGER NOT NULL,
+            taken_at TIMESTAMP NOT NULL,    -- time of that event: the snapshot holds from then on
+            grades TEXT NOT NULL            -- JSON array of [grade_table, subject_code, semester, total_marks,
+                                            --                grade, grade_point, result_status, marks]
+        );
+        CREATE INDEX IF NOT EXISTS idx_grade_snapshots_student ON grade_snapshots(student_id, taken_at);
+
+        -- Events per student since their last snapshot, so take_snapshots
+        -- reads only the students that are due
+        CREATE TABLE IF NOT EXISTS grade_snapshot_due (
+            student_id TEXT PRIMARY KEY,
+            events INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_grade_snapshot_due_events ON grade_snapshot_due(events);
+    ''')
+
+    if not due_existed:
+        cursor.execute('''
+            INSERT INTO grade_snapshot_due (student_id, events)
+            SELECT e.student_id, COUNT(*)
+            FROM grade_events e
+            WHERE e.id > COALESCE((SELECT MAX(s.last_event_id) FROM grade_snapshots s
+                                   WHERE s.student_id = e.student_id), 0)
+            GROUP BY e.student_id
+        ''')
+
+    script = '''
+        CREATE TRIGGER IF NOT EXISTS trg_grade_events_snapshot_due AFTER INSERT ON grade_events
+        BEGIN
+            INSERT INTO grade_snapshot_due (student_id, events) VALUES (NEW.student_id, 1)
+            ON CONFLICT(student_id) DO UPDATE SET events = events + 1;
+        END;
+    '''
+    for grade_table, (_, components) in GRADE_TABLES.items():
+        values = ["student_id", "subject_code", "semester", "total_marks", "grade", "grade_point",
+                  "result_status"] + components
+        old_values = "json_array(" + ", ".join(f"OLD.{column}" for column in values) + ")"
+        new_values = "json_array(" + ", ".join(f"NEW.{column}" for column in values) + ")"
+        script += f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{grade_table}_history_insert AFTER INSERT ON {grade_table}
+            BEGIN
+                INSERT INTO grade_events ({EVENT_COLUMNS}) VALUES ({_event_values(grade_table, "NEW", "I")});
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{grade_table}_history_update AFTER UPDATE ON {grade_table}
+            WHEN {old_values} IS NOT {new_values}
+            BEGIN{_baseline(grade_table)}
+                -- A grade moved to another student, subject or semester leaves its old key
+                INSERT INTO grade_events ({EVENT_COLUMNS})
+                SELECT {_event_values(grade_table, "OLD", "D")}
+                WHERE json_array(OLD.student_id, OLD.subject_code, OLD.semester)
+                      IS NOT json_array(NEW.student_id, NEW.subject_code, NEW.semester);
+                INSERT INTO grade_events ({EVENT_COLUMNS}) VALUES ({_event_values(grade_table, "NEW", "U")});
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{grade_table}_history_delete AFTER DELETE ON {grade_table}
+            BEGIN{_baseline(grade_table)}
+                INSERT INTO grade_events ({EVENT_COLUMNS}) VALUES ({_event_values(grade_table, "OLD", "D")});
+            END;
+        '''
+    cursor.executescript(script)
+
+
+def _current_grades():
+    """One student's grade rows (both tables) as JSON states, with created_date and whether they have events"""
+    return "\n            UNION ALL".join(f'''
+            SELECT json_array('{grade_table}', g.subject_code, g.semester, g.total_marks, g.grade, g.grade_point,
+                              g.result_status, {_marks_json(grade_table, "g")}) AS state,
+                   COALESCE(g.created_date, '') AS created_date,
+                   EXISTS (SELECT 1 FROM grade_events e
+                           WHERE e.student_id = g.student_id AND e.grade_table = '{grade_table}'
+                             AND e.subject_code = g.subject_code AND e.semester = g.semester) AS logged
+            FROM {grade_table} g WHERE g.student_id = ?''' for grade_table in GRADE_TABLES)
+
+
+def register_changed_by(conn):
+    """Define grade_changed_by() on conn, starting with no author.
+
+    The history triggers call it, so every connection that writes grades
+    must be registered once, before its first grade write.
+    """
+    key = id(conn)
+    _changed_by[key] = None
+    conn.create_function("grade_changed_by", 0, lambda: _changed_by.get(key))
+
+
+def set_changed_by(conn, username):
+    """Record username as the author of the grade changes that follow on conn (a registered connection)"""
+    _changed_by[id(conn)] = username
+
+
+def take_snapshots(conn, min_events=SNAPSHOT_MIN_EVENTS, limit=None):
+    """Snapshot the grades of students with at least min_events events since their last snapshot.
+
+    This is the history's compaction: reconstruction starts from the
+    latest snapshot, so it replays at most about min_events events per
+    student. The events themselves are kept. Due students come from
+    grade_snapshot_due, most events first, at most limit of them. The
+    caller commits. Returns the number of snapshots written.
+    """
+    due = conn.execute(queries.GRADE_SNAPSHOTS_DUE, (min_events, -1 if limit is None else limit)).fetchall()
+
+    for student_id, in due:
+        # The grade tables hold exactly the state after the student's latest event
+        last_event_id = conn.execute(queries.GRADE_EVENTS_LAST_ID, (student_id,)).fetchone()[0]
+        conn.execute(f'''
+            INSERT INTO grade_snapshots (student_id, last_event_id, taken_at, grades)
+            SELECT ?, ?, (SELECT changed_at FROM grade_events WHERE id = ?),
+                   (SELECT json_group_array(json(state)) FROM ({_current_grades()}))
+        ''', (student_id, last_event_id, last_event_id) + (student_id,) * len(GRADE_TABLES))
+        conn.execute(queries.GRADE_SNAPSHOT_DUE_CLEAR, (student_id,))
+    return len(due)
+
+
+def _as_of_bound(as_of):
+    """A date means the end of that day"""
+    return f"{as_of} 23:59:59" if len(as_of) == 10 else as_of
+
+
+def _grade_state(values):
+    grade_table, subject_code, semester, total_marks, grade, grade_point, result_status, marks = values
+    return GradeState(grade_table, subject_code, semester, total_marks, grade, grade_point, result_status, marks)
+
+
+def grades_as_of(conn, student_id, as_of):
+    """A student's grades at time as_of ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'), as GradeStates.
+
+    Starts from the latest snapshot taken at or before as_of and replays
+    only the student's events after it, so the work is bounded by the
+    events since that snapshot. Without one, grades never changed since
+    the history began are read from the grade tables (present if created
+    by as_of) and the logged ones are replayed from their first event.
+    """
+    bound = _as_of_bound(as_of)
+    state = {}
+    snapshot = conn.execute(queries.GRADE_SNAPSHOT_LATEST, (student_id, bound)).fetchone()
+
+    if snapshot is not None:
+        after_event = snapshot[0]
+        grades = [_grade_state(values) for values in json.loads(snapshot[1])]
+    else:
+        after_event = 0
+        grades = [_grade_state(json.loads(values)) for values, created_date, logged in
+                  conn.execute(_current_grades(), (student_id,) * len(GRADE_TABLES))
+                  if not logged and created_date <= bound]
+    for grade in grades:
+        state[grade.grade_table, grade.subject_code, grade.semester] = grade
+
+    for event in events_for(conn, student_id, after_event, bound):
+        key = (event.grade_table, event.subject_code, event.semester)
+        if event.op == "D":
+            state.pop(key, None)
+        else:
+            state[key] = GradeState(*key, event.total_marks, event.grade, event.grade_point,
+                                    event.result_status, event.marks)
+    return sorted(state.values(), key=lambda grade: (grade.semester, grade.grade_table, grade.subject_code))
+
+
+def events_for(conn, student_id, after_event=0, until=None):
+    """A student's grade events after event id after_event (up to time until), oldest first"""
+    sql = queries.GRADE_EVENTS_FOR_STUDENT
+    params = [student_id, after_event]
+    if until:
+        sql += queries.GRADE_EVENTS_UNTIL_FILTER
+        params.append(_as_of_bound(until))
+    return [GradeEvent(*row[:9], json.loads(row[9]) if row[9] else {}, *row[10:])
+            for row in conn.execute(sql + queries.GRADE_EVENTS_ORDER, params)]
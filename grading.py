@@ -0,0 +1,173 @@
+import bisect
+
+try:
+    import numpy as np
+except ImportError:  # cohorts are graded one mark at a time instead
+    np = None
+
+import queries
+
+# Absolute grade scale: (minimum total marks, grade, grade point), highest first
+GRADE_SCALE = [
+    (90, "O", 10.0),
+    (80, "A+", 9.0),
+    (70, "A", 8.0),
+    (60, "B+", 7.0),
+    (55, "B", 6.0),
+    (50, "C", 5.0),
+    (40, "P", 4.0),
+]
+FAIL_GRADE = ("F", 0.0)
+PASS_MARKS = 40
+
+
+def grade_and_point(total_marks):
+    """Grade and grade point for a total out of 100"""
+    for minimum, grade, grade_point in GRADE_SCALE:
+        if total_marks >= minimum:
+            return grade, grade_point
+    return FAIL_GRADE
+
+
+def result_status(total_marks):
+    return "Pass" if total_marks >= PASS_MARKS else "Fail"
+
+
+def theory_total(internal1, internal2, presentation, assignment1, assignment2, external):
+    """Internal average of the two tests + presentation + assignments + external (out of 100)"""
+    internal_total = (internal1 + internal2) / 2 + presentation + assignment1 + assignment2
+    return internal_total + external
+
+
+def practical_total(lab_copies, viva, practical_exam):
+    """Lab copies + viva + practical exam (out of 100)"""
+    return lab_copies + viva + practical_exam
+
+
+# Grading schemes stored per subject and per grade row
+ABSOLUTE = "absolute"
+PERCENTILE = "percentile"
+ZSCORE = "zscore"
+GRADING_SCHEMES = [ABSOLUTE, PERCENTILE, ZSCORE]
+
+# Relative bands: (minimum score, grade, grade point), highest first. The
+# score is the percentage of the passing cohort scoring strictly lower, or
+# the z-score within the passing cohort. Marks below PASS_MARKS still fail.
+PERCENTILE_BANDS = [
+    (90, "O", 10.0),
+    (75, "A+", 9.0),
+    (60, "A", 8.0),
+    (45, "B+", 7.0),
+    (30, "B", 6.0),
+    (15, "C", 5.0),
+    (0, "P", 4.0),
+]
+ZSCORE_BANDS = [
+    (1.5, "O", 10.0),
+    (1.0, "A+", 9.0),
+    (0.5, "A", 8.0),
+    (0.0, "B+", 7.0),
+    (-0.5, "B", 6.0),
+    (-1.0, "C", 5.0),
+    (float("-inf"), "P", 4.0),
+]
+SCHEME_BANDS = {ABSOLUTE: GRADE_SCALE, PERCENTILE: PERCENTILE_BANDS, ZSCORE: ZSCORE_BANDS}
+
+
+def cohort_grades(marks, scheme=ABSOLUTE):
+    """Grades and grade points for every total in one cohort (everyone who took the paper).
+
+    One vectorized pass: sort the passing marks once, score every row
+    against them and look the scores up in the scheme's bands.
+    """
+    bands = SCHEME_BANDS[scheme]
+    if np is None:
+        return _cohort_grades_python(list(marks), scheme, bands)
+
+    marks = np.asarray(marks, dtype=float)
+    passed = marks >= PASS_MARKS
+    cohort = np.sort(marks[passed])
+    if scheme == PERCENTILE:
+        scores = np.searchsorted(cohort, marks, side="left") * 100 / max(len(cohort), 1)
+    elif scheme == ZSCORE:
+        std = cohort.std() if len(cohort) else 0.0
+        scores = (marks - cohort.mean()) / std if std > 0 else np.zeros(len(marks))
+    else:
+        scores = marks
+
+    thresholds = np.array([minimum for minimum, _, _ in reversed(bands)])
+    band_index = len(bands) - np.searchsorted(thresholds, scores, side="right")
+    letters = np.array([grade for _, grade, _ in bands] + [FAIL_GRADE[0]], dtype=object)
+    points = np.array([point for _, _, point in bands] + [FAIL_GRADE[1]])
+    band_index[~passed] = len(bands)
+    return letters[band_index].tolist(), points[band_index].tolist()
+
+
+def _cohort_grades_python(marks, scheme, bands):
+    cohort = sorted(mark for mark in marks if mark >= PASS_MARKS)
+    if scheme == ZSCORE and cohort:
+        mean = sum(cohort) / len(cohort)
+        std = (sum((mark - mean) ** 2 for mark in cohort) / len(cohort)) ** 0.5
+    grades, points = [], []
+    for mark in marks:
+        if mark < PASS_MARKS:
+            grades.append(FAIL_GRADE[0])
+            points.append(FAIL_GRADE[1])
+            continue
+        if scheme == PERCENTILE:
+            score = bisect.bisect_left(cohort, mark) * 100 / len(cohort)
+        elif scheme == ZSCORE:
+            score = (mark - mean) / std if std > 0 else 0.0
+        else:
+            score = mark
+        grade, point = next((grade, point) for minimum, grade, point in bands if score >= minimum)
+        grades.append(grade)
+        points.append(point)
+    return grades, points
+
+
+def regrade_subject(conn, subject_code, scheme):
+    """Regrade every recorded result of a subject under scheme and make it the subject's scheme.
+
+    Each (semester, academic year) sitting of the paper is its own cohort.
+    Only rows whose grade actually changes are written. The caller
+    commits. Returns the number of rows changed.
+    """
+    if scheme not in SCHEME_BANDS:
+        raise ValueError(f"Unknown grading scheme: {scheme}")
+    conn.execute(queries.SUBJECT_SET_GRADING_SCHEME, (scheme, subject_code))
+
+    changed = 0
+    for select_sql, update_sql in ((queries.THEORY_GRADES_TO_REGRADE, queries.THEORY_GRADE_REGRADE),
+                                   (queries.PRACTICAL_GRADES_TO_REGRADE, queries.PRACTICAL_GRADE_REGRADE)):
+        cohorts = {}
+        for row in conn.execute(select_sql, (subject_code,)):
+            cohorts.setdefault((row[1], row[2]), []).append(row)
+
+        updates = []
+        for rows in cohorts.values():
+            grades, points = cohort_grades([row[3] or 0.0 for row in rows], scheme)
+            for row, grade, point in zip(rows, grades, points):
+                if (row[4], row[5], row[6]) != (grade, point, scheme):
+                    updates.append((grade, point, scheme, row[0]))
+        conn.executemany(update_sql, updates)
+        changed += len(updates)
+    return changed
+
+
+def subject_grading_scheme(conn, subject_code):
+    row = conn.execute(queries.SUBJECT_GRADING_SCHEME, (subject_code,)).fetchone()
+    return row[0] if row and row[0] else ABSOLUTE
+
+
+def student_gpa(conn, student_id):
+    """({semester: (passed credits, SGPA)}, total passed credits, CGPA) over theory and practical grades.
+
+    One aggregate query; only passed subjects count, weighted by credits,
+    the same definition semester_results is maintained with.
+    """
+    semesters = {}
+    cgpa = 0.0
+    for semester, credits, sgpa, cgpa in conn.execute(queries.STUDENT_SEMESTER_GPA, (student_id,)):
+        semesters[semester] = (credits, sgpa)
+    return semesters, sum(credits for credits, _ in semesters.values()), cgpa
@@ -0,0 +1,191 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+
+from change_journal import JournalGapError, acknowledge, changes_since, consumer_seq, current_seq, drop_consumer
+
+DEFAULT_TARGET = "university_portal"
+FORMATS = ("csv", "jsonl")
+
+# dataset -> (table, key column, exported columns); grade rows are identified by id
+DATASETS = {
+    "students": ("students", "student_id", [
+        "student_id", "name", "department", "batch", "current_semester", "section",
+        "email", "phone", "address", "blood_group", "admission_date", "status"]),
+    "theory_grades": ("theory_grades", "id", [
+        "id", "student_id", "subject_code", "semester", "academic_year",
+        "internal1_marks", "internal2_marks", "presentation_marks", "assignment1_marks", "assignment2_marks",
+        "external_marks", "total_marks", "grade", "grade_point", "result_status", "back_paper"]),
+    "practical_grades": ("practical_grades", "id", [
+        "id", "student_id", "subject_code", "semester", "academic_year",
+        "lab_copies_marks", "viva_marks", "practical_exam_marks",
+        "total_marks", "grade", "grade_point", "result_status", "back_paper"]),
+}
+
+KEY_BATCH = 500
+
+
+class DeltaWriter:
+    """Write upserts and delete tombstones to a CSV or JSON Lines file.
+
+    Rows carry an "_op" field ("upsert" or "delete"); a tombstone has only
+    the key column set. The file appears under its final name only once
+    it has been written completely.
+    """
+
+    def __init__(self, path, columns, key_column, fmt):
+        self.path = path
+        self.columns = columns
+        self.key_column = key_column
+        self.fmt = fmt
+        self.upserts = 0
+        self.deletes = 0
+        self.file = open(path + ".part", "w", newline="", encoding="utf-8")
+        if fmt == "csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["_op"] + columns)
+
+    def upsert(self, row):
+        self.upserts += 1
+        if self.fmt == "csv":
+            self.writer.writerow(["upsert"] + list(row))
+        else:
+            self.file.write(json.dumps({"_op": "upsert", **dict(zip(self.columns, row))}) + "\n")
+
+    def delete(self, key):
+        self.deletes += 1
+        if self.fmt == "csv":
+            self.writer.writerow(["delete"] + [key if column == self.key_column else "" for column in self.columns])
+        else:
+            self.file.write(json.dumps({"_op": "delete", self.key_column: key}) + "\n")
+
+    def close(self):
+        self.file.close()
+        os.replace(self.path + ".part", self.path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.path + ".part")
+
+
+def export_consumer(target, name):
+    """change_consumers name holding target's high-water mark for one dataset"""
+    return f"export:{target}:{name}"
+
+
+def export_changes(db_path, output_dir, target=DEFAULT_TARGET, fmt="csv", datasets=None, full=False):
+    """Export what changed for target since its last export; a first run exports everything.
+
+    Each dataset has its own high-water mark (a change_consumers entry),
+    so exporting some datasets never skips changes to the others. Marks of
+    the exported datasets are advanced only after every file is written.
+    A dataset whose mark the journal has been compacted past gets a full
+    export instead. Returns a summary dict with the mode, sequence range
+    and per-dataset mode, counts and paths.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    datasets = datasets or list(DATASETS)
+    os.makedirs(output_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        # One read transaction: the rows and the new high-water marks form a snapshot
+        conn.execute("BEGIN")
+        to_seq = current_seq(conn)
+        # Marks from before per-dataset marks covered every dataset at once
+        legacy_seq = consumer_seq(conn, f"export:{target}")
+
+        summary = {"target": target, "to_seq": to_seq, "datasets": {}}
+        for name in datasets:
+            table, key_column, columns = DATASETS[name]
+            since = None
+            if not full:
+                since = consumer_seq(conn, export_consumer(target, name))
+                if since is None:
+                    since = legacy_seq
+            changes = None
+            if since is not None:
+                try:
+                    changes = changes_since(conn, since, to_seq, tables=[table], collapse=True)
+                except JournalGapError:
+                    since = None
+
+            result = {"mode": "full" if changes is None else "incremental", "from_seq": since,
+                      "upserts": 0, "deletes": 0, "path": None}
+            summary["datasets"][name] = result
+            if changes is not None:
+                keys = [change.key[0] for change in changes]
+                if not keys:
+                    continue
+                suffix = f"{since}-{to_seq}"
+            else:
+                suffix = f"full-{to_seq}"
+
+            path = os.path.join(output_dir, f"{target}_{name}_{suffix}.{fmt}")
+            writer = DeltaWriter(path, columns, key_column, fmt)
+            try:
+                if changes is None:
+                    for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {key_column}"):
+                        writer.upsert(row)
+                else:
+                    write_changed_rows(conn, writer, table, key_column, columns, keys)
+            except Exception:
+                writer.discard()
+                raise
+            writer.close()
+            result.update(upserts=writer.upserts, deletes=writer.deletes, path=path)
+        conn.execute("COMMIT")
+
+        modes = {result["mode"] for result in summary["datasets"].values()}
+        summary["mode"] = modes.pop() if len(modes) == 1 else "mixed"
+        starts = {result["from_seq"] for result in summary["datasets"].values()}
+        summary["from_seq"] = starts.pop() if len(starts) == 1 else None
+
+        conn.execute("BEGIN IMMEDIATE")
+        for name in datasets:
+            acknowledge(conn, export_consumer(target, name), to_seq)
+        if legacy_seq is not None and all(consumer_seq(conn, export_consumer(target, name)) is not None
+                                          for name in DATASETS):
+            drop_consumer(conn, f"export:{target}")
+        conn.execute("COMMIT")
+        return summary
+    finally:
+        conn.close()
+
+
+def write_changed_rows(conn, writer, table, key_column, columns, keys):
+    """Upsert the keys that still exist, tombstone the rest"""
+    for start in range(0, len(keys), KEY_BATCH):
+        batch = keys[start:start + KEY_BATCH]
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table} "
+                            f"WHERE {key_column} IN ({', '.join('?' * len(batch))})", batch).fetchall()
+        key_index = columns.index(key_column)
+        found = {row[key_index]: row for row in rows}
+        for key in batch:
+            if key in found:
+                writer.upsert(found[key])
+            else:
+                writer.delete(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export students and grades changed since the last export")
+    parser.add_argument("--db", default="professional_college_system.db")
+    parser.add_argument("--output-dir", default="exports")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="name whose high-water mark is used")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--datasets", nargs="*", choices=list(DATASETS))
+    parser.add_argument("--full", action="store_true", help="export everything and reset the high-water mark")
+    args = parser.parse_args()
+
+    summary = export_changes(args.db, args.output_dir, args.target, args.format, args.datasets, args.full)
+    print(f"{summary['mode'].title()} export for {summary['target']} up to sequence {summary['to_seq']}")
+    for name, result in summary["datasets"].items():
+        print(f"  {name:<18} {result['upserts']:>8} upserts {result['deletes']:>6} deletes  {result['path'] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from collections import namedtuple
+
+import grading
+import queries
+from back_papers import GRADE_TABLES, MAX_EXAM_MARKS
+
+FLAT = "flat"
+CAP = "cap"
+PASS_LIFT = "pass_lift"
+
+# Rule -> change to a row's exam component, in terms of its total_marks and
+# exam marks and the moderation :amount
+RULES = {
+    # Grace marks for everyone
+    FLAT: ":amount",
+    # Totals above :amount come down to it
+    CAP: "MIN(:amount - total_marks, 0)",
+    # Fails within :amount marks of passing are lifted to the pass mark
+    PASS_LIFT: f'''CASE WHEN total_marks < {grading.PASS_MARKS} AND total_marks >= {grading.PASS_MARKS} - :amount
+                   THEN {grading.PASS_MARKS} - total_marks ELSE 0 END''',
+}
+
+# Grade table -> (statement applying a moderation's changes to it,
+# statement copying its regraded grades back to the audit)
+APPLY_STATEMENTS = {
+    "theory_grades": (queries.THEORY_MODERATION_APPLY, queries.THEORY_MODERATION_REGRADED),
+    "practical_grades": (queries.PRACTICAL_MODERATION_APPLY, queries.PRACTICAL_MODERATION_REGRADED),
+}
+
+# What a moderation would change: grade rows, and results turning Pass or Fail
+ModerationPreview = namedtuple("ModerationPreview", ["rows", "newly_passed", "newly_failed"])
+
+
+def _absolute_grade(total, column):
+    """CASE expression for the grade (column 0) or grade point (column 1) of a total on the absolute scale"""
+    whens = " ".join(f"WHEN {total} >= {minimum} THEN {(grade, point)[column]!r}"
+                     for minimum, grade, point in grading.GRADE_SCALE)
+    return f"CASE {whens} ELSE {grading.FAIL_GRADE[column]!r} END"
+
+
+def _changes(grade_table, rule, semester):
+    """SELECT of every row of the subject the rule changes, with its values before and after.
+
+    The rule moves the exam component, kept within 0..MAX_EXAM_MARKS; the
+    total moves with it, and grade, grade point and result follow from the
+    new total on the absolute scale.
+    """
+    exam_column = GRADE_TABLES[grade_table][0]
+    semester_filter = " AND semester = :semester" if semester else ""
+    return f'''
+        SELECT id AS grade_id, student_id, exam AS exam_before, new_exam AS exam_after,
+               total_marks AS total_before, new_total AS total_after,
+               grade AS grade_before, {_absolute_grade("new_total", 0)} AS grade_after,
+               grade_point AS grade_point_before, {_absolute_grade("new_total", 1)} AS grade_point_after,
+               result_status AS status_before,
+               CASE WHEN new_total >= {grading.PASS_MARKS} THEN 'Pass' ELSE 'Fail' END AS status_after
+        FROM (SELECT *, total_marks - exam + new_exam AS new_total
+              FROM (SELECT id, student_id, exam, total_marks, grade, grade_point, result_status,
+                           MIN(MAX(exam + ({RULES[rule]}), 0), {MAX_EXAM_MARKS}) AS new_exam
+                    FROM (SELECT id, student_id, COALESCE({exam_column}, 0) AS exam,
+                                 COALESCE(total_marks, 0) AS total_marks, grade, grade_point, result_status
+                          FROM {grade_table}
+                          WHERE subject_code = :subject_code{semester_filter})))
+        WHERE new_exam <> exam
+    '''
+
+
+def check_rule(rule, amount):
+    if rule not in RULES:
+        raise ValueError(f"Unknown moderation rule: {rule}")
+    if amount < 0:
+        raise ValueError("Moderation amount must not be negative")
+
+
+def preview_moderation(conn, subject_code, rule, amount, semester=None):
+    """Count the rows moderate_subject would change, without changing anything"""
+    check_rule(rule, amount)
+    params = {"subject_code": subject_code, "semester": semester and int(semester), "amount": amount}
+    rows = newly_passed = newly_failed = 0
+    for grade_table in GRADE_TABLES:
+        row = conn.execute(f'''
+            SELECT COUNT(*), COALESCE(SUM(status_before <> 'Pass' AND status_after = 'Pass'), 0),
+                   COALESCE(SUM(status_before = 'Pass' AND status_after <> 'Pass'), 0)
+            FROM ({_changes(grade_table, rule, semester)})
+        ''', params).fetchone()
+        rows, newly_passed, newly_failed = rows + row[0], newly_passed + row[1], newly_failed + row[2]
+    return ModerationPreview(rows, newly_passed, newly_failed)
+
+
+def moderate_subject(conn, subject_code, rule, amount, semester=None, username=None):
+    """Apply a moderation rule to every result of a subject (one semester, or all) in one transaction.
+
+    The changed rows and their before/after values go to moderation_changes
+    under a new moderations entry first; each grade table is then updated
+    from it in one statement, so the audit is exactly what was applied.
+    Subjects on a relative grading scheme are regraded afterwards and the
+    audit's grades follow. The caller commits. Returns (moderation id,
+    rows changed).
+    """
+    check_rule(rule, amount)
+    semester = semester and int(semester)
+    moderation_id = conn.execute(queries.MODERATION_INSERT,
+                                 (subject_code, semester, rule, amount, username)).lastrowid
+    params = {"subject_code": subject_code, "semester": semester, "amount": amount, "moderation_id": moderation_id}
+
+    changed = 0
+    for grade_table, (apply_sql, _) in APPLY_STATEMENTS.items():
+        conn.execute(f'''
+            INSERT INTO moderation_changes
+            (moderation_id, grade_table, grade_id, student_id, exam_before, exam_after, total_before, total_after,
+             grade_before, grade_after, grade_point_before, grade_point_after, status_before, status_after)
+            SELECT :moderation_id, '{grade_table}', * FROM ({_changes(grade_table, rule, semester)})
+        ''', params)
+        changed += conn.execute(apply_sql, (grading.ABSOLUTE, moderation_id)).rowcount
+
+    scheme = grading.subject_grading_scheme(conn, subject_code)
+    if changed and scheme != grading.ABSOLUTE:
+        grading.regrade_subject(conn, subject_code, scheme)
+        for _, regraded_sql in APPLY_STATEMENTS.values():
+            conn.execute(regraded_sql, (moderation_id,))
+
+    conn.execute(queries.MODERATION_ROWS_CHANGED, (changed, moderation_id))
+    return moderation_id, changed
+
+
+def moderation_changes(conn, moderation_id):
+    """Before/after values of every row one moderation changed"""
+    return conn.execute(queries.MODERATION_CHANGES_LIST, (moderation_id,)).fetchall()
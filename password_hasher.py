@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import hmac
+import secrets
+import time
+
+DEFAULT_SCHEME = "pbkdf2_sha256"
+DEFAULT_TARGET_SECONDS = 0.25
+
+
+class LegacySha256Scheme:
+    """Single salted SHA-256 used before the work-factor KDF (verify only)"""
+    name = "sha256"
+
+    def encode(self, password, salt):
+        return hashlib.sha256((password + salt).encode()).hexdigest()
+
+    def verify(self, password, salt, stored_hash):
+        return hmac.compare_digest(self.encode(password, salt), stored_hash)
+
+    def stored_cost(self, stored_hash):
+        return 0
+
+
+class Pbkdf2Scheme:
+    """PBKDF2-HMAC-SHA256, cost is the iteration count"""
+    name = "pbkdf2_sha256"
+    min_cost = 10000
+
+    def __init__(self, cost=200000):
+        self.cost = max(int(cost), self.min_cost)
+
+    def _digest(self, password, salt, iterations):
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+
+    def encode(self, password, salt):
+        return f"{self.name}${self.cost}${self._digest(password, salt, self.cost)}"
+
+    def verify(self, password, salt, stored_hash):
+        _, iterations, digest = stored_hash.split("$")
+        return hmac.compare_digest(self._digest(password, salt, int(iterations)), digest)
+
+    def stored_cost(self, stored_hash):
+        return int(stored_hash.split("$")[1])
+
+
+class ScryptScheme:
+    """scrypt with r=8, p=1, cost is the CPU/memory parameter n (a power of two)"""
+    name = "scrypt"
+    min_cost = 2 ** 12
+
+    def __init__(self, cost=2 ** 14, r=8, p=1):
+        cost = max(int(cost), self.min_cost)
+        self.cost = 1 << (cost.bit_length() - 1)
+        self.r = r
+        self.p = p
+
+    def _digest(self, password, salt, n, r, p):
+        maxmem = 256 * r * n + 1024 * 1024
+        return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                              maxmem=maxmem, dklen=32).hex()
+
+    def encode(self, password, salt):
+        digest = self._digest(password, salt, self.cost, self.r, self.p)
+        return f"{self.name}${self.cost}${self.r}${self.p}${digest}"
+
+    def verify(self, password, salt, stored_hash):
+        _, n, r, p, digest = stored_hash.split("$")
+        return hmac.compare_digest(self._digest(password, salt, int(n), int(r), int(p)), digest)
+
+    def stored_cost(self, stored_hash):
+        return int(stored_hash.split("$")[1])
+
+
+SCHEMES = {
+    Pbkdf2Scheme.name: Pbkdf2Scheme,
+    ScryptScheme.name: ScryptScheme,
+}
+
+
+def make_scheme(name=DEFAULT_SCHEME, cost=None):
+    """Create a hashing scheme by name, optionally with an explicit cost"""
+    if name not in SCHEMES:
+        raise ValueError(f"Unknown password scheme: {name}")
+    return SCHEMES[name]() if cost is None else SCHEMES[name](cost)
+
+
+class PasswordHasher:
+    """Hash and verify admin passwords with a pluggable work-factor scheme"""
+
+    def __init__(self, scheme=None):
+        self.scheme = scheme or make_scheme()
+        self.legacy = LegacySha256Scheme()
+
+    def hash(self, password):
+        """Return (password_hash, salt) for a new password"""
+        salt = secrets.token_hex(16)
+        return self.scheme.encode(password, salt), salt
+
+    def identify(self, stored_hash):
+        """Find the scheme that produced a stored hash"""
+        for name, scheme_class in SCHEMES.items():
+            if stored_hash.startswith(name + "$"):
+                return self.scheme if name == self.scheme.name else scheme_class()
+        return self.legacy
+
+    def verify(self, password, salt, stored_hash):
+        """Check a password against a stored hash of any known scheme"""
+        try:
+            return self.identify(stored_hash).verify(password, salt, stored_hash)
+        except (ValueError, TypeError):
+            return False
+
+    def needs_rehash(self, stored_hash):
+        """True if the stored hash is legacy, another scheme or a lower cost"""
+        scheme = self.identify(stored_hash)
+        if scheme.name != self.scheme.name:
+            return True
+        return scheme.stored_cost(stored_hash) < self.scheme.cost
+
+    def verify_and_upgrade(self, password, salt, stored_hash):
+        """Verify a login and, if it succeeds on an outdated hash, rehash it.
+
+        Returns (ok, upgrade) where upgrade is a new (password_hash, salt)
+        pair to store, or None. Meant to run on a worker thread.
+        """
+        if not self.verify(password, salt, stored_hash):
+            return False, None
+        if self.needs_rehash(stored_hash):
+            return True, self.hash(password)
+        return True, None
+
+
+def time_scheme(scheme, rounds=3):
+    """Best-of-rounds time in seconds for hashing one password"""
+    salt = secrets.token_hex(16)
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        scheme.encode("calibration-password", salt)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(name=DEFAULT_SCHEME, target_seconds=DEFAULT_TARGET_SECONDS):
+    """Pick the cost for a scheme so one hash takes about target_seconds here"""
+    scheme_class = SCHEMES[name]
+    if scheme_class is Pbkdf2Scheme:
+        # PBKDF2 time is linear in iterations: scale from a probe, then
+        # re-measure once at the estimate to correct for warm-up effects
+        scheme = Pbkdf2Scheme(50000)
+        for _ in range(2):
+            elapsed = max(time_scheme(scheme), 1e-6)
+            scheme = Pbkdf2Scheme(int(scheme.cost * target_seconds / elapsed) // 1000 * 1000)
+        return scheme
+
+    # scrypt only takes powers of two; double n until we reach the target
+    scheme = scheme_class(scheme_class.min_cost)
+    while time_scheme(scheme, rounds=1) < target_seconds and scheme.cost < 2 ** 20:
+        scheme = scheme_class(scheme.cost * 2)
+    return scheme
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password hashing cost on this host")
+    parser.add_argument("--scheme", default=DEFAULT_SCHEME, choices=sorted(SCHEMES))
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_SECONDS * 1000)
+    args = parser.parse_args()
+
+    scheme = calibrate(args.scheme, args.target_ms / 1000)
+    print(f"Scheme: {scheme.name}")
+    print(f"Target: {args.target_ms:.0f} ms")
+    print(f"Chosen cost: {scheme.cost}")
+
+    # Show timings around the chosen cost
+    for factor in (0.5, 1, 2):
+        candidate = make_scheme(scheme.name, scheme.cost * factor)
+        print(f"  cost {candidate.cost:>10}: {time_scheme(candidate) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class EventLoopLagMonitor:
+    """Measure Tk event-loop lag from the jitter of a repeating after() callback.
+
+    A callback is scheduled every interval_ms; the difference between when
+    it was due and when it actually ran is time the loop spent busy with
+    something else (a long query, a big treeview reload, ...).
+    """
+
+    def __init__(self, widget, interval_ms=250, keep=240):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.lags_ms = deque(maxlen=keep)
+        self.job = None
+        self.due = None
+
+    def start(self):
+        if self.job is None:
+            self._schedule()
+
+    def stop(self):
+        if self.job is not None:
+            try:
+                self.widget.after_cancel(self.job)
+            except Exception:
+                pass
+            self.job = None
+
+    def _schedule(self):
+        self.due = time.perf_counter() + self.interval_ms / 1000
+        self.job = self.widget.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        self.lags_ms.append(max(time.perf_counter() - self.due, 0) * 1000)
+        self._schedule()
+
+    def summary(self):
+        """(p50, p95, max) lag in ms over the recent window, or None before the first sample"""
+        if not self.lags_ms:
+            return None
+        ordered = sorted(self.lags_ms)
+        return (ordered[len(ordered) // 2],
+                ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+                ordered[-1])
+
+
+def process_rss_bytes():
+    """Resident set size of this process (peak RSS where the current value is unavailable)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    return None
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def format_bytes(size):
+    if size is None:
+        return "Unknown"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.2f} {unit}"
+        size /= 1024
+
+
+def ratio_text(hits, misses):
+    total = hits + misses
+    return f"{hits / total:.1%} ({hits}/{total})" if total else "No lookups yet"
@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+import queries
+
+FINAL_SEMESTER = 8
+
+# What a promotion would do: active students in the semester, how many meet
+# the rules, and the sections defined for the next semester
+PromotionPreview = namedtuple("PromotionPreview", ["candidates", "eligible", "held_back", "target_sections"])
+
+
+def _eligibility(department, batch, from_semester, max_back_papers):
+    """WHERE clause and parameters selecting the students a promotion moves"""
+    sql = queries.PROMOTION_SCOPE
+    params = [department, int(batch), int(from_semester)]
+    if max_back_papers is not None:
+        sql += queries.PROMOTION_BACK_PAPER_RULE
+        params.append(int(max_back_papers))
+    return sql, params
+
+
+def _check_semester(from_semester):
+    if not 1 <= int(from_semester) < FINAL_SEMESTER:
+        raise ValueError(f"Students can be promoted from semesters 1 to {FINAL_SEMESTER - 1} only")
+
+
+def check_target_sections(department, batch, from_semester, target_sections):
+    """Students must land in a section that exists in their new semester"""
+    if not target_sections:
+        raise ValueError(f"Semester {int(from_semester) + 1} of {department} batch {batch} has no sections. "
+                         f"Create its sections before promoting.")
+
+
+def _target_sections(conn, department, batch, from_semester):
+    return [name for name, in conn.execute(queries.PROMOTION_TARGET_SECTIONS,
+                                           (department, int(batch), int(from_semester) + 1))]
+
+
+def preview_promotion(conn, department, batch, from_semester, max_back_papers=None):
+    """Count the students promote_batch would move, without changing anything.
+
+    max_back_papers is the most outstanding back papers (theory and
+    practical, any semester) a promoted student may have; None for no limit.
+    """
+    _check_semester(from_semester)
+    scope, scope_params = _eligibility(department, batch, from_semester, None)
+    candidates = conn.execute(queries.PROMOTION_COUNT + scope, scope_params).fetchone()[0]
+    rules, params = _eligibility(department, batch, from_semester, max_back_papers)
+    eligible = conn.execute(queries.PROMOTION_COUNT + rules, params).fetchone()[0]
+    sections = _target_sections(conn, department, batch, from_semester)
+    return PromotionPreview(candidates, eligible, candidates - eligible, sections)
+
+
+def promote_batch(conn, department, batch, from_semester, max_back_papers=None, username=None):
+    """Move every eligible student of a batch to the next semester in one UPDATE.
+
+    Each student keeps their section name if the new semester has one by
+    that name, otherwise goes to the new semester's first section. One
+    PROMOTION entry for the whole batch goes to security_logs. The caller
+    commits. Returns the number of students promoted. Raises ValueError
+    if the new semester has no sections.
+    """
+    _check_semester(from_semester)
+    check_target_sections(department, batch, from_semester, _target_sections(conn, department, batch, from_semester))
+    to_semester = int(from_semester) + 1
+    rules, params = _eligibility(department, batch, from_semester, max_back_papers)
+    promoted = conn.execute(queries.PROMOTE_STUDENTS + rules, [to_semester] * 3 + params).rowcount
+
+    rule = "no back paper limit" if max_back_papers is None else f"at most {max_back_papers} back paper(s)"
+    conn.execute("INSERT INTO security_logs (event_type, description, username) VALUES (?, ?, ?)", (
+        "PROMOTION",
+        f"Promoted {promoted} student(s) of {department} batch {batch} "
+        f"from semester {from_semester} to {to_semester} ({rule})",
+        username or "Unknown"))
+    return promoted
@@ -0,0 +1,338 @@
+# SQL for the hot paths, shared by the application and benchmark.py so the
+# benchmark always times exactly what the UI runs
+
+# Student list (Student Management tab)
+STUDENT_LIST = '''
+    SELECT student_id, name, department, batch, current_semester, section, email, phone, status
+    FROM students
+'''
+
+# Subject list (Subject Management tab); filters and ORDER BY are appended
+SUBJECT_LIST = '''
+    SELECT subject_code, subject_name, department, semester, credits, subject_type, max_marks
+    FROM subjects
+'''
+SUBJECT_ORDER = ' ORDER BY department, semester, subject_code'
+
+# Security log viewer; filters are appended after WHERE 1=1
+SECURITY_LOG_LIST = '''
+    SELECT id, timestamp, event_type, username, description
+    FROM security_logs
+    WHERE 1=1
+'''
+SECURITY_LOG_ORDER = ' ORDER BY timestamp DESC LIMIT 1000'
+# Date filters compare the raw timestamp so the timestamp index can be used
+SECURITY_LOG_EVENT_FILTER = " AND event_type = ?"
+SECURITY_LOG_FROM_FILTER = " AND timestamp >= ?"
+SECURITY_LOG_TO_FILTER = " AND timestamp < date(?, '+1 day')"
+
+# Student report
+REPORT_STUDENT = '''
+    SELECT s.*, d.dept_name, sec.class_teacher
+    FROM students s
+    LEFT JOIN departments d ON s.department = d.dept_id
+    LEFT JOIN sections sec ON s.section = sec.section_name AND s.department = sec.department
+                           AND s.batch = sec.batch AND s.current_semester = sec.semester
+    WHERE s.student_id = ?
+'''
+# Version of one student's report; no row means version 0
+STUDENT_GRADE_VERSION = "SELECT version FROM student_grade_versions WHERE student_id = ?"
+
+# Export all students to CSV
+STUDENT_EXPORT = '''
+    SELECT s.student_id, s.name, s.department, d.dept_name, s.batch, s.current_semester,
+           s.section, s.email, s.phone, s.address, s.blood_group, s.admission_date, s.status
+    FROM students s
+    LEFT JOIN departments d ON s.department = d.dept_id
+    ORDER BY s.department, s.batch, s.current_semester, s.student_id
+'''
+
+# Grade entry saves. An upsert updates the existing row in place (REPLACE
+# would delete and re-insert it without firing the delete triggers). The
+# absolute grade is stored; relatively graded subjects are regraded after
+THEORY_GRADE_SAVE = '''
+    INSERT INTO theory_grades
+    (student_id, subject_code, semester, academic_year,
+     internal1_marks, internal2_marks, presentation_marks, assignment1_marks, assignment2_marks,
+     external_marks, total_marks, grade, grade_point, result_status, back_paper)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(student_id, subject_code, semester) DO UPDATE SET
+        academic_year = excluded.academic_year,
+        internal1_marks = excluded.internal1_marks,
+        internal2_marks = excluded.internal2_marks,
+        presentation_marks = excluded.presentation_marks,
+        assignment1_marks = excluded.assignment1_marks,
+        assignment2_marks = excluded.assignment2_marks,
+        external_marks = excluded.external_marks,
+        total_marks = excluded.total_marks,
+        grade = excluded.grade,
+        grade_point = excluded.grade_point,
+        result_status = excluded.result_status,
+        back_paper = excluded.back_paper,
+        grading_scheme = 'absolute'
+'''
+PRACTICAL_GRADE_SAVE = '''
+    INSERT INTO practical_grades
+    (student_id, subject_code, semester, academic_year,
+     lab_copies_marks, viva_marks, practical_exam_marks, total_marks, grade, grade_point, result_status, back_paper)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(student_id, subject_code, semester) DO UPDATE SET
+        academic_year = excluded.academic_year,
+        lab_copies_marks = excluded.lab_copies_marks,
+        viva_marks = excluded.viva_marks,
+        practical_exam_marks = excluded.practical_exam_marks,
+        total_marks = excluded.total_marks,
+        grade = excluded.grade,
+        grade_point = excluded.grade_point,
+        result_status = excluded.result_status,
+        back_paper = excluded.back_paper,
+        grading_scheme = 'absolute'
+'''
+
+# Grade entry list for one student and semester (theory)
+THEORY_GRADE_LIST = '''
+    SELECT t.subject_code, s.subject_name, t.internal1_marks, t.internal2_marks, t.presentation_marks,
+           t.assignment1_marks, t.assignment2_marks, t.external_marks, t.total_marks,
+           t.grade, t.result_status
+    FROM theory_grades t
+    JOIN subjects s ON t.subject_code = s.subject_code
+    WHERE t.student_id = ? AND t.semester = ?
+'''
+
+# Grade entry list for one student and semester (practical)
+PRACTICAL_GRADE_LIST = '''
+    SELECT p.subject_code, s.subject_name, p.lab_copies_marks, p.viva_marks, p.practical_exam_marks,
+           p.total_marks, p.grade, p.result_status
+    FROM practical_grades p
+    JOIN subjects s ON p.subject_code = s.subject_code
+    WHERE p.student_id = ? AND p.semester = ?
+'''
+
+# Passed credits, SGPA and CGPA per semester over theory and practical grades
+# (see grading.student_gpa). Only passed subjects count, weighted by credits,
+# rounded as semester_results rounds; CGPA repeats on every row
+STUDENT_SEMESTER_GPA = '''
+    SELECT g.semester,
+           COALESCE(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits END), 0),
+           COALESCE(ROUND(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits * g.grade_point END)
+                          / SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits END), 2), 0),
+           COALESCE(ROUND(SUM(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits * g.grade_point END)) OVER ()
+                          / SUM(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits END)) OVER (), 2), 0)
+    FROM all_grades g
+    JOIN subjects s ON g.subject_code = s.subject_code
+    WHERE g.student_id = ?
+    GROUP BY g.semester
+    ORDER BY g.semester
+'''
+
+# Delete checks and cascades
+THEORY_GRADES_FOR_SUBJECT = "SELECT COUNT(*) FROM theory_grades WHERE subject_code=?"
+PRACTICAL_GRADES_FOR_SUBJECT = "SELECT COUNT(*) FROM practical_grades WHERE subject_code=?"
+THEORY_GRADES_FOR_STUDENT = "SELECT COUNT(*) FROM theory_grades WHERE student_id=?"
+PRACTICAL_GRADES_FOR_STUDENT = "SELECT COUNT(*) FROM practical_grades WHERE student_id=?"
+THEORY_GRADES_DELETE_STUDENT = "DELETE FROM theory_grades WHERE student_id=?"
+PRACTICAL_GRADES_DELETE_STUDENT = "DELETE FROM practical_grades WHERE student_id=?"
+
+# Student report CSV export
+REPORT_EXPORT_THEORY = '''
+    SELECT t.semester, s.subject_code, s.subject_name, s.credits, s.subject_type,
+           t.internal1_marks, t.internal2_marks, t.presentation_marks,
+           t.assignment1_marks, t.assignment2_marks, t.external_marks,
+           t.total_marks, t.grade, t.grade_point, t.result_status
+    FROM theory_grades t
+    JOIN subjects s ON t.subject_code = s.subject_code
+    WHERE t.student_id = ?
+    ORDER BY t.semester, s.subject_code
+'''
+REPORT_EXPORT_PRACTICAL = '''
+    SELECT p.semester, s.subject_code, s.subject_name, s.credits, s.subject_type,
+           p.lab_copies_marks, p.viva_marks, p.practical_exam_marks,
+           p.total_marks, p.grade, p.grade_point, p.result_status
+    FROM practical_grades p
+    JOIN subjects s ON p.subject_code = s.subject_code
+    WHERE p.student_id = ?
+    ORDER BY p.semester, s.subject_code
+'''
+
+# Security log export and cleanup
+SECURITY_LOG_EXPORT = '''
+    SELECT timestamp, event_type, username, description
+    FROM security_logs
+    ORDER BY timestamp DESC
+'''
+SECURITY_LOG_PURGE = '''
+    DELETE FROM security_logs
+    WHERE timestamp < datetime('now', '-90 days')
+'''
+
+# Rank list for one department, batch and semester from semester_results.
+# Batch rank needs every department, so the department filter is applied
+# after ranking; top-N keeps ties by filtering on rank instead of LIMIT
+RANK_LIST = '''
+    WITH ranked AS (
+        SELECT r.student_id, st.name, st.department, st.section, r.sgpa, r.credits, r.failed,
+               RANK() OVER (PARTITION BY st.department, st.section ORDER BY r.sgpa DESC) AS section_rank,
+               RANK() OVER (PARTITION BY st.department ORDER BY r.sgpa DESC) AS department_rank,
+               RANK() OVER (ORDER BY r.sgpa DESC) AS batch_rank
+        FROM semester_results r
+        JOIN students st ON st.student_id = r.student_id
+        WHERE r.semester = ? AND st.batch = ?
+    )
+    SELECT department_rank, section_rank, batch_rank, student_id, name, section, sgpa, credits, failed
+    FROM ranked
+    WHERE department = ? AND department_rank <= ?
+    ORDER BY department_rank, student_id
+'''
+RANK_SCOPE_VERSION = '''
+    SELECT MAX(CASE WHEN department = ? THEN version END), SUM(version)
+    FROM result_scope_versions
+    WHERE batch = ? AND semester = ?
+'''
+
+# Outstanding back papers of one department's students. Both arms read the
+# partial back_paper indexes; optional filters and the order are appended
+BACK_PAPER_PENDING = '''
+    SELECT kind, grade_table, grade_id, student_id, name, section, subject_code, subject_name,
+           semester, total_marks, attempts
+    FROM (
+        SELECT 'Theory' AS kind, 'theory_grades' AS grade_table, t.id AS grade_id, t.student_id, st.name,
+               st.department, st.section, t.subject_code, s.subject_name, t.semester, t.total_marks,
+               (SELECT COUNT(*) FROM supplementary_attempts a
+                WHERE a.grade_table = 'theory_grades' AND a.grade_id = t.id) AS attempts
+        FROM theory_grades t
+        JOIN students st ON st.student_id = t.student_id
+        LEFT JOIN subjects s ON s.subject_code = t.subject_code
+        WHERE t.back_paper = 1
+        UNION ALL
+        SELECT 'Practical', 'practical_grades', p.id, p.student_id, st.name,
+               st.department, st.section, p.subject_code, s.subject_name, p.semester, p.total_marks,
+               (SELECT COUNT(*) FROM supplementary_attempts a
+                WHERE a.grade_table = 'practical_grades' AND a.grade_id = p.id)
+        FROM practical_grades p
+        JOIN students st ON st.student_id = p.student_id
+        LEFT JOIN subjects s ON s.subject_code = p.subject_code
+        WHERE p.back_paper = 1
+    )
+    WHERE department = ?
+'''
+BACK_PAPER_SEMESTER_FILTER = " AND semester = ?"
+BACK_PAPER_SUBJECT_FILTER = " AND subject_code = ?"
+BACK_PAPER_ORDER = " ORDER BY semester, subject_code, student_id"
+
+# Supplementary attempts at one failed grade row
+SUPPLEMENTARY_ATTEMPT_COUNT = '''
+    SELECT COUNT(*) FROM supplementary_attempts WHERE grade_table = ? AND grade_id = ?
+'''
+SUPPLEMENTARY_ATTEMPT_LIST = '''
+    SELECT attempt_no, exam_date, exam_marks, total_marks, grade, result_status, recorded_by, recorded_at
+    FROM supplementary_attempts
+    WHERE grade_table = ? AND grade_id = ?
+    ORDER BY attempt_no
+'''
+SUPPLEMENTARY_ATTEMPTS_DELETE_STUDENT = "DELETE FROM supplementary_attempts WHERE student_id=?"
+
+# Semester promotion (see promotion.py): the scope and eligibility rules are
+# appended to both the count and the UPDATE, so the preview counts exactly
+# the rows the promotion changes
+PROMOTION_COUNT = "SELECT COUNT(*) FROM students"
+PROMOTE_STUDENTS = '''
+    UPDATE students SET
+        current_semester = ?,
+        -- Same section name in the new semester if it exists, else its first section
+        -- (promote_batch refuses semesters without sections)
+        section = COALESCE(
+            (SELECT sec.section_name FROM sections sec
+             WHERE sec.department = students.department AND sec.batch = students.batch
+               AND sec.semester = ? AND sec.section_name = students.section),
+            (SELECT MIN(sec.section_name) FROM sections sec
+             WHERE sec.department = students.department AND sec.batch = students.batch AND sec.semester = ?))
+'''
+PROMOTION_SCOPE = " WHERE department = ? AND batch = ? AND current_semester = ? AND status = 'Active'"
+# Outstanding back papers, counted per table through the partial back_paper
+# indexes (a correlated subquery over all_grades is not pushed into its arms)
+PROMOTION_BACK_PAPER_RULE = '''
+      AND (SELECT COUNT(*) FROM theory_grades t WHERE t.student_id = students.student_id AND t.back_paper = 1)
+        + (SELECT COUNT(*) FROM practical_grades p WHERE p.student_id = students.student_id AND p.back_paper = 1) <= ?
+'''
+PROMOTION_TARGET_SECTIONS = '''
+    SELECT section_name FROM sections WHERE department = ? AND batch = ? AND semester = ? ORDER BY section_name
+'''
+
+# Relative grading (see grading.regrade_subject): a subject's results are
+# read per table by subject and only the grades that change are written back
+SUBJECT_GRADING_SCHEME = "SELECT grading_scheme FROM subjects WHERE subject_code = ?"
+SUBJECT_SET_GRADING_SCHEME = "UPDATE subjects SET grading_scheme = ? WHERE subject_code = ?"
+THEORY_GRADES_TO_REGRADE = '''
+    SELECT id, semester, academic_year, total_marks, grade, grade_point, grading_scheme
+    FROM theory_grades WHERE subject_code = ?
+'''
+PRACTICAL_GRADES_TO_REGRADE = '''
+    SELECT id, semester, academic_year, total_marks, grade, grade_point, grading_scheme
+    FROM practical_grades WHERE subject_code = ?
+'''
+THEORY_GRADE_REGRADE = "UPDATE theory_grades SET grade = ?, grade_point = ?, grading_scheme = ? WHERE id = ?"
+PRACTICAL_GRADE_REGRADE = "UPDATE practical_grades SET grade = ?, grade_point = ?, grading_scheme = ? WHERE id = ?"
+
+# Moderation (see moderation.py). The rows a rule changes are generated per
+# rule; applying them reads back the audited changes, one statement per table
+MODERATION_INSERT = '''
+    INSERT INTO moderations (subject_code, semester, rule, amount, applied_by) VALUES (?, ?, ?, ?, ?)
+'''
+MODERATION_ROWS_CHANGED = "UPDATE moderations SET rows_changed = ? WHERE id = ?"
+THEORY_MODERATION_APPLY = '''
+    UPDATE theory_grades
+    SET external_marks = m.exam_after, total_marks = m.total_after, grade = m.grade_after,
+        grade_point = m.grade_point_after, result_status = m.status_after,
+        back_paper = m.status_after <> 'Pass', grading_scheme = ?
+    FROM moderation_changes m
+    WHERE m.moderation_id = ? AND m.grade_table = 'theory_grades' AND m.grade_id = theory_grades.id
+'''
+PRACTICAL_MODERATION_APPLY = '''
+    UPDATE practical_grades
+    SET practical_exam_marks = m.exam_after, total_marks = m.total_after, grade = m.grade_after,
+        grade_point = m.grade_point_after, result_status = m.status_after,
+        back_paper = m.status_after <> 'Pass', grading_scheme = ?
+    FROM moderation_changes m
+    WHERE m.moderation_id = ? AND m.grade_table = 'practical_grades' AND m.grade_id = practical_grades.id
+'''
+# After a relative regrade the audit takes the grades the rows ended up with
+THEORY_MODERATION_REGRADED = '''
+    UPDATE moderation_changes
+    SET grade_after = g.grade, grade_point_after = g.grade_point, status_after = g.result_status
+    FROM theory_grades g
+    WHERE moderation_changes.moderation_id = ? AND moderation_changes.grade_table = 'theory_grades'
+      AND g.id = moderation_changes.grade_id
+'''
+PRACTICAL_MODERATION_REGRADED = '''
+    UPDATE moderation_changes
+    SET grade_after = g.grade, grade_point_after = g.grade_point, status_after = g.result_status
+    FROM practical_grades g
+    WHERE moderation_changes.moderation_id = ? AND moderation_changes.grade_table = 'practical_grades'
+      AND g.id = moderation_changes.grade_id
+'''
+MODERATION_CHANGES_LIST = '''
+    SELECT student_id, grade_table, exam_before, exam_after, total_before, total_after,
+           grade_before, grade_after, status_before, status_after
+    FROM moderation_changes WHERE moderation_id = ? ORDER BY student_id
+'''
+
+# Grade history (see grade_history.py)
+GRADE_SNAPSHOT_LATEST = '''
+    SELECT last_event_id, grades FROM grade_snapshots
+    WHERE student_id = ? AND taken_at <= ?
+    ORDER BY taken_at DESC, last_event_id DESC LIMIT 1
+'''
+# One student's events after an event id; the time bound and order are appended
+GRADE_EVENTS_FOR_STUDENT = '''
+    SELECT id, grade_table, subject_code, semester, op, total_marks, grade, grade_point, result_status,
+           marks, changed_by, changed_at
+    FROM grade_events WHERE student_id = ? AND id > ?
+'''
+GRADE_EVENTS_UNTIL_FILTER = " AND changed_at <= ?"
+GRADE_EVENTS_ORDER = " ORDER BY id"
+GRADE_EVENTS_LAST_ID = "SELECT MAX(id) FROM grade_events WHERE student_id = ?"
+# Students owing a snapshot, most events first
+GRADE_SNAPSHOTS_DUE = '''
+    SELECT student_id FROM grade_snapshot_due WHERE events >= ? ORDER BY events DESC LIMIT ?
+'''
+GRADE_SNAPSHOT_DUE_CLEAR = "DELETE FROM grade_snapshot_due WHERE student_id = ?"
@@ -0,0 +1,278 @@
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+DEFAULT_SLOW_MS = 100.0
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_THIS_FILE = os.path.normcase(os.path.abspath(__file__))
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """Collapse whitespace so the same statement always maps to one key"""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def caller_site():
+    """'file.py:line function' of the first frame outside this module"""
+    frame = sys._getframe(1)
+    while frame and os.path.normcase(os.path.abspath(frame.f_code.co_filename)) == _THIS_FILE:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class StatementStats:
+    """Latency histogram, row count and call sites for one statement"""
+    __slots__ = ("sql", "calls", "total_ms", "max_ms", "rows", "buckets", "call_sites")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.call_sites = {}
+
+    def add(self, elapsed_ms, rows, call_site):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        index = 0
+        while index < len(BUCKET_BOUNDS_MS) and elapsed_ms > BUCKET_BOUNDS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.call_sites[call_site] = self.call_sites.get(call_site, 0) + 1
+
+    def percentile(self, fraction):
+        """Upper bound of the histogram bucket holding the given percentile"""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def top_call_site(self):
+        return max(self.call_sites, key=self.call_sites.get) if self.call_sites else ""
+
+
+class QueryStats:
+    """Process-wide statement statistics and slow-query log"""
+
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS, log_path=None, keep_slow=50):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.statements = {}                    # normalized sql -> StatementStats
+        self.slow_queries = deque(maxlen=keep_slow)
+        self.lock = threading.Lock()
+
+    def record(self, conn, sql, params, elapsed_ms, rows, call_site):
+        key = normalize_sql(sql)
+        with self.lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = StatementStats(key)
+            stats.add(elapsed_ms, rows, call_site)
+
+        if self.slow_ms is not None and elapsed_ms >= self.slow_ms:
+            self.log_slow(conn, key, params, elapsed_ms, rows, call_site)
+
+    def log_slow(self, conn, sql, params, elapsed_ms, rows, call_site):
+        """Keep a slow statement with its query plan and append it to the log file"""
+        plan = explain_query_plan(conn, sql, params)
+        entry = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_ms": elapsed_ms,
+            "rows": rows,
+            "call_site": call_site,
+            "sql": sql,
+            "plan": plan,
+        }
+        self.slow_queries.append(entry)
+
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as log_file:
+                    log_file.write(f"[{entry['time']}] {elapsed_ms:.1f} ms, {rows} rows, {call_site}\n")
+                    log_file.write(f"  {sql}\n")
+                    for line in plan:
+                        log_file.write(f"    {line}\n")
+            except OSError as e:
+                print(f"Could not write slow query log: {e}")
+
+    def snapshot(self, order_by="total_ms", limit=None):
+        """Statement stats sorted by a StatementStats attribute, largest first"""
+        with self.lock:
+            statements = list(self.statements.values())
+        statements.sort(key=lambda stats: getattr(stats, order_by), reverse=True)
+        return statements[:limit] if limit else statements
+
+    def overall(self):
+        """(calls, p50, p95, p99) across all statements from the merged histograms"""
+        merged = StatementStats("*")
+        with self.lock:
+            for stats in self.statements.values():
+                merged.calls += stats.calls
+                merged.max_ms = max(merged.max_ms, stats.max_ms)
+                merged.buckets = [a + b for a, b in zip(merged.buckets, stats.buckets)]
+        return merged.calls, merged.percentile(0.5), merged.percentile(0.95), merged.percentile(0.99)
+
+    def reset(self):
+        with self.lock:
+            self.statements.clear()
+            self.slow_queries.clear()
+
+
+def explain_query_plan(conn, sql, params):
+    """EXPLAIN QUERY PLAN lines for a statement (empty for statements it cannot explain)"""
+    if sql.split(None, 1)[0].upper() not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"):
+        return []
+    try:
+        # A plain cursor, so explaining is not itself recorded
+        cursor = sqlite3.Cursor(conn)
+        if params is None or not isinstance(params, (tuple, list, dict)):
+            # executemany parameters are gone by now; any values give the same plan
+            params = [None] * sql.count("?")
+        rows = cursor.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        cursor.close()
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+    return [row[-1] for row in rows]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's latency, rows and call site to QueryStats.
+
+    Time spent fetching is added to the statement's execute time, so a
+    SELECT is recorded when its rows are exhausted, when the cursor moves
+    on to the next statement, or when it is closed or garbage collected
+    (conn.execute(...).fetchone() cursors are dropped right away).
+    """
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._pending = None  # [sql, params, elapsed_ms, rows, call_site]
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            sql, params, elapsed_ms, rows, call_site = pending
+            self.connection.query_stats.record(self.connection, sql, params, elapsed_ms, rows, call_site)
+
+    def _timed(self, method, sql, params, call_site):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            method(sql, params)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Statements without a result set are complete now
+            rows = max(self.rowcount, 0)
+            self._pending = [sql, params, elapsed_ms, rows, call_site]
+            if self.description is None:
+                self._finish()
+        return self
+
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params, caller_site())
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed(super().executemany, sql, seq_of_params, caller_site())
+
+    def executescript(self, script):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.connection.query_stats.record(self.connection, script, None, elapsed_ms, 0, caller_site())
+
+    def _fetched(self, start, rows, exhausted):
+        if self._pending:
+            self._pending[2] += (time.perf_counter() - start) * 1000
+            self._pending[3] += rows
+            if exhausted:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # conn.execute() cursors are dropped as soon as the caller is done with them
+        try:
+            self._finish()
+        except (AttributeError, sqlite3.Error):
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented"""
+
+    query_stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+def connect(database, query_stats, **kwargs):
+    """sqlite3.connect() returning an instrumented connection reporting to query_stats"""
+    conn = sqlite3.connect(database, factory=InstrumentedConnection, **kwargs)
+    conn.query_stats = query_stats
+    return conn
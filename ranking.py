@@ -0,0 +1,57 @@
+import queries
+
+# Rank limit meaning "everyone"; SQLite integers are 64-bit
+ALL_RANKS = 2 ** 62
+
+
+class RankCache:
+    """Rank lists per (department, batch, semester), recomputed only when results change.
+
+    Each list is stored with the scope's version token from
+    result_scope_versions, which the semester_results triggers bump on
+    every change. A lookup costs one small version query; the window
+    function query runs again only when the token has moved.
+    """
+
+    def __init__(self, conn, max_entries=64):
+        self.conn = conn
+        self.max_entries = max_entries
+        self.entries = {}  # (department, batch, semester) -> (token, rows)
+        self.hits = 0
+        self.misses = 0
+
+    def version_token(self, department, batch, semester):
+        """Department scope version plus the batch total (batch ranks span departments)"""
+        return tuple(self.conn.execute(queries.RANK_SCOPE_VERSION, (department, batch, semester)).fetchone())
+
+    def rank_list(self, department, batch, semester, top_n=None):
+        """[(department_rank, section_rank, batch_rank, student_id, name, section, sgpa, credits, failed)]
+
+        top_n keeps everyone ranked within the top N of the department,
+        so ties at the cut-off are all included.
+        """
+        key = (department, int(batch), int(semester))
+        token = self.version_token(*key)
+        entry = self.entries.get(key)
+        if entry and entry[0] == token:
+            self.hits += 1
+            rows = entry[1]
+        else:
+            self.misses += 1
+            rows = self.conn.execute(queries.RANK_LIST, (key[2], key[1], key[0], ALL_RANKS)).fetchall()
+            if len(self.entries) >= self.max_entries and key not in self.entries:
+                self.entries.pop(next(iter(self.entries)))
+            self.entries[key] = (token, rows)
+        if top_n:
+            return [row for row in rows if row[0] <= top_n]
+        return rows
+
+    def student_rank(self, student_id, department, batch, semester):
+        """The student's rank row in their scope, or None if they have no result"""
+        for row in self.rank_list(department, batch, semester):
+            if row[3] == student_id:
+                return row
+        return None
+
+    def clear(self):
+        self.entries.clear()
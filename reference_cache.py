@@ -0,0 +1,147 @@
+class Department:
+    """Cached row from the departments table"""
+    __slots__ = ("dept_id", "dept_name", "hod_name", "established_year")
+
+    def __init__(self, dept_id, dept_name, hod_name, established_year):
+        self.dept_id = dept_id
+        self.dept_name = dept_name
+        self.hod_name = hod_name
+        self.established_year = established_year
+
+    @property
+    def display(self):
+        return f"{self.dept_id} - {self.dept_name}"
+
+
+class Section:
+    """Cached row from the sections table"""
+    __slots__ = ("section_id", "section_name", "department", "semester", "batch",
+                 "class_teacher", "room_number")
+
+    def __init__(self, section_id, section_name, department, semester, batch,
+                 class_teacher, room_number):
+        self.section_id = section_id
+        self.section_name = section_name
+        self.department = department
+        self.semester = semester
+        self.batch = batch
+        self.class_teacher = class_teacher
+        self.room_number = room_number
+
+
+class Subject:
+    """Cached row from the subjects table"""
+    __slots__ = ("subject_code", "subject_name", "credits", "semester", "department",
+                 "subject_type", "max_marks", "min_pass_marks")
+
+    def __init__(self, subject_code, subject_name, credits, semester, department,
+                 subject_type, max_marks, min_pass_marks):
+        self.subject_code = subject_code
+        self.subject_name = subject_name
+        self.credits = credits
+        self.semester = semester
+        self.department = department
+        self.subject_type = subject_type
+        self.max_marks = max_marks
+        self.min_pass_marks = min_pass_marks
+
+    @property
+    def display(self):
+        return f"{self.subject_code} - {self.subject_name}"
+
+
+class ReferenceCache:
+    """In-process cache of departments, sections and subjects for UI lookups.
+
+    Tables are loaded lazily and indexed in dictionaries. Every write goes
+    through invalidate(), which marks the table stale and bumps generation so
+    widgets built from the cache know when they need rebuilding.
+    """
+
+    TABLES = ("departments", "sections", "subjects")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = set(self.TABLES)
+
+        # Indexes
+        self.departments = {}        # dept_id -> Department
+        self.sections = {}           # section_id -> Section
+        self.sections_by_scope = {}  # (dept_id, batch, semester) -> [Section]
+        self.subjects = {}           # subject_code -> Subject
+
+    def invalidate(self, table=None):
+        """Mark one table (or all) as changed; it is reloaded on next access"""
+        self.stale.update([table] if table else self.TABLES)
+        self.generation += 1
+
+    def _ensure(self, table):
+        if table not in self.stale:
+            self.hits += 1
+            return
+        self.misses += 1
+        getattr(self, f"_load_{table}")()
+        self.stale.discard(table)
+
+    def _load_departments(self):
+        cursor = self.conn.execute('''
+            SELECT dept_id, dept_name, hod_name, established_year
+            FROM departments ORDER BY dept_id
+        ''')
+        self.departments = {row[0]: Department(*row) for row in cursor}
+
+    def _load_sections(self):
+        cursor = self.conn.execute('''
+            SELECT section_id, section_name, department, semester, batch, class_teacher, room_number
+            FROM sections ORDER BY department, batch, semester, section_name
+        ''')
+        self.sections = {}
+        self.sections_by_scope = {}
+        for row in cursor:
+            section = Section(*row)
+            self.sections[section.section_id] = section
+            scope = (section.department, int(section.batch), int(section.semester))
+            self.sections_by_scope.setdefault(scope, []).append(section)
+
+    def _load_subjects(self):
+        cursor = self.conn.execute('''
+            SELECT subject_code, subject_name, credits, semester, department,
+                   subject_type, max_marks, min_pass_marks
+            FROM subjects ORDER BY department, semester, subject_code
+        ''')
+        self.subjects = {row[0]: Subject(*row) for row in cursor}
+
+    # Department lookups
+    def department(self, dept_id):
+        self._ensure("departments")
+        return self.departments.get(dept_id)
+
+    def department_display(self, dept_id):
+        """'ID - Name' string used by the department comboboxes, or None"""
+        department = self.department(dept_id)
+        return department.display if department else None
+
+    def department_displays(self):
+        self._ensure("departments")
+        return [department.display for department in self.departments.values()]
+
+    # Section lookups
+    def sections_for(self, dept_id, batch, semester):
+        self._ensure("sections")
+        return self.sections_by_scope.get((dept_id, int(batch), int(semester)), [])
+
+    def section_names(self, dept_id, batch, semester):
+        return [section.section_name for section in self.sections_for(dept_id, batch, semester)]
+
+    # Subject lookups
+    def subject(self, subject_code):
+        self._ensure("subjects")
+        return self.subjects.get(subject_code)
+
+    def subject_displays(self, subject_type=None):
+        self._ensure("subjects")
+        return [subject.display for subject in self.subjects.values()
+                if subject_type is None or subject.subject_type == subject_type]
@@ -0,0 +1,71 @@
+from collections import OrderedDict, namedtuple
+
+import grading
+import queries
+
+# Everything the report tab shows and the report export writes for one student.
+# student is the REPORT_STUDENT row (None for an unknown student); semesters
+# is [(semester, rows, credits, sgpa)] with rows of (type, subject, credits,
+# total, grade, grade point, status); theory_rows and practical_rows are the
+# REPORT_EXPORT_THEORY / REPORT_EXPORT_PRACTICAL rows
+ReportModel = namedtuple("ReportModel", ["student", "semesters", "total_credits", "cgpa",
+                                         "theory_rows", "practical_rows"])
+
+
+def student_version(conn, student_id):
+    row = conn.execute(queries.STUDENT_GRADE_VERSION, (student_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def build_report(conn, student_id):
+    """Read one student's ReportModel: four queries, whatever the number of semesters"""
+    student = conn.execute(queries.REPORT_STUDENT, (student_id,)).fetchone()
+    semester_gpas, total_credits, cgpa = grading.student_gpa(conn, student_id)
+    theory_rows = conn.execute(queries.REPORT_EXPORT_THEORY, (student_id,)).fetchall()
+    practical_rows = conn.execute(queries.REPORT_EXPORT_PRACTICAL, (student_id,)).fetchall()
+
+    # The report tab's rows are the export rows without the component marks
+    by_semester = {semester: [] for semester in semester_gpas}
+    for row in theory_rows:
+        by_semester.setdefault(row[0], []).append(("Theory", row[2], row[3]) + tuple(row[11:15]))
+    for row in practical_rows:
+        by_semester.setdefault(row[0], []).append(("Practical", row[2], row[3]) + tuple(row[8:12]))
+    semesters = [(semester, by_semester[semester]) + semester_gpas.get(semester, (0, 0))
+                 for semester in sorted(by_semester)]
+    return ReportModel(student, semesters, total_credits, cgpa, theory_rows, practical_rows)
+
+
+class ReportCache:
+    """Least recently used ReportModels, keyed by student and their student_grade_versions version.
+
+    The version triggers move a student's version on every write to their
+    grades or report details, so a model cached under an older version is
+    never returned. A hit costs one primary key lookup; a miss rebuilds the
+    model with build_report.
+    """
+
+    def __init__(self, conn, max_entries=128):
+        self.conn = conn
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # student_id -> (version, model), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def report(self, student_id):
+        version = student_version(self.conn, student_id)
+        entry = self.entries.get(student_id)
+        if entry and entry[0] == version:
+            self.hits += 1
+            self.entries.move_to_end(student_id)
+            return entry[1]
+
+        self.misses += 1
+        model = build_report(self.conn, student_id)
+        self.entries[student_id] = (version, model)
+        self.entries.move_to_end(student_id)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return model
+
+    def clear(self):
+        self.entries.clear()
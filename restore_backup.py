@@ -0,0 +1,100 @@
+import argparse
+import glob
+import os
+import shutil
+import sqlite3
+
+import schema
+from change_journal import JOURNALED_TABLES, apply_changeset, current_seq, read_changeset_header
+
+
+def find_chain(full_path, directory):
+    """Changesets in directory that continue, one after another, from the full backup"""
+    conn = sqlite3.connect(full_path)
+    seq = current_seq(conn)
+    conn.close()
+
+    by_base = {}
+    for path in glob.glob(os.path.join(directory, "*.changes.jsonl.gz")):
+        header = read_changeset_header(path)
+        # A later changeset from the same base covers more; prefer it
+        if header["seq"] > by_base.get(header["base_seq"], (None, -1))[1]:
+            by_base[header["base_seq"]] = (path, header["seq"])
+
+    chain = []
+    while seq in by_base and by_base[seq][1] > seq:
+        path, seq = by_base[seq]
+        chain.append(path)
+    return chain
+
+
+def restore(full_path, changesets, output):
+    """Copy the full backup to output and replay the changesets onto it.
+
+    Triggers are dropped while replaying (the changesets already carry the
+    counter columns and must not add journal rows), then recreated; the
+    row counters and semester results are recomputed. Returns
+    (restored seq, {table: (expected, actual)}).
+    """
+    if os.path.exists(output):
+        raise FileExistsError(f"{output} already exists")
+    shutil.copyfile(full_path, output)
+
+    conn = sqlite3.connect(output)
+    try:
+        seq = current_seq(conn)
+        expected = None
+        if changesets:
+            triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+            with conn:
+                for name, _ in triggers:
+                    conn.execute(f"DROP TRIGGER {name}")
+                for path in changesets:
+                    header = apply_changeset(conn, path, seq)
+                    seq = header["seq"]
+                    expected = header["row_counts"]
+                    print(f"  applied {os.path.basename(path)} (sequence {header['base_seq']} -> {seq})")
+                for _, sql in triggers:
+                    conn.execute(sql)
+                # New journal entries continue after the last replayed change
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'change_log'", (seq,))
+                schema.recount_rows(conn.cursor())
+                # Derived from the grades, which may have changed
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'semester_results'").fetchone():
+                    schema.rebuild_semester_results(conn.cursor())
+
+        counts = {}
+        for table in JOURNALED_TABLES:
+            actual = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            counts[table] = ((expected or {}).get(table, actual), actual)
+        check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"restored database failed quick_check: {check}")
+    finally:
+        conn.close()
+    return seq, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore a full backup plus its chain of incremental changesets")
+    parser.add_argument("full", help="full backup (.db) to start from")
+    parser.add_argument("output", help="database file to create")
+    parser.add_argument("changesets", nargs="*",
+                        help="changeset files in order (default: the chain found next to the full backup)")
+    args = parser.parse_args()
+
+    changesets = args.changesets or find_chain(args.full, os.path.dirname(os.path.abspath(args.full)))
+    print(f"Restoring {args.full} with {len(changesets)} changeset(s)")
+    seq, counts = restore(args.full, changesets, args.output)
+
+    mismatches = [(table, expected, actual) for table, (expected, actual) in counts.items() if expected != actual]
+    for table, (expected, actual) in counts.items():
+        print(f"  {table:<20} {actual:>10}" + ("" if expected == actual else f"   expected {expected}"))
+    if mismatches:
+        print(f"Row counts do not match the last changeset: {args.output} is incomplete")
+        raise SystemExit(1)
+    print(f"Restored to change sequence {seq}: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import statistics
+
+try:
+    import numpy as np
+except ImportError:  # medians and deviations fall back to the statistics module
+    np = None
+
+from grading import FAIL_GRADE, GRADE_SCALE
+
+# Grade letters in display order, best first
+GRADE_ORDER = [grade for _, grade, _ in GRADE_SCALE] + [FAIL_GRADE[0]]
+
+# Grouping -> (key columns, label expression)
+GROUPINGS = {
+    "subject": (["g.subject_code"], "COALESCE(sub.subject_name, g.subject_code)"),
+    "section": (["g.department", "g.section"], "g.department || ' ' || g.section"),
+}
+
+
+class GroupStatistics:
+    """Marks statistics for one subject or section"""
+    __slots__ = ("key", "label", "count", "mean", "median", "std", "pass_rate", "back_papers", "grade_counts")
+
+    def __init__(self, key, label, count, mean, pass_count, back_papers):
+        self.key = key
+        self.label = label
+        self.count = count
+        self.mean = mean
+        self.median = None
+        self.std = None
+        self.pass_rate = pass_count / count * 100 if count else 0.0
+        self.back_papers = back_papers
+        self.grade_counts = dict.fromkeys(GRADE_ORDER, 0)
+
+
+def filter_conditions(department=None, batch=None, semester=None, subject_code=None, section=None):
+    """WHERE conditions and parameters for an analytics filter (None means any)"""
+    conditions, params = [], []
+    if department:
+        conditions.append("st.department = ?")
+        params.append(department)
+    if section:
+        conditions.append("st.section = ?")
+        params.append(section)
+    if batch:
+        conditions.append("st.batch = ?")
+        params.append(int(batch))
+    if semester:
+        conditions.append("g.semester = ?")
+        params.append(int(semester))
+    if subject_code:
+        conditions.append("g.subject_code = ?")
+        params.append(subject_code)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _from_clause(where):
+    """FROM the grade rows matching where (from filter_conditions), with their student's section, as g.
+
+    LIMIT -1 keeps SQLite from flattening the subquery into an aggregate
+    query, which would materialize all of all_grades before filtering;
+    unflattened, the filter is searched through each arm's indexes.
+    """
+    return f'''
+        FROM (SELECT g.subject_code, g.total_marks, g.grade, g.result_status, g.back_paper,
+                     st.department, st.section
+              FROM all_grades g
+              JOIN students st ON st.student_id = g.student_id{where}
+              LIMIT -1) g
+        LEFT JOIN subjects sub ON sub.subject_code = g.subject_code
+    '''
+
+
+def _aggregate_columns():
+    """COUNT/AVG/pass/back paper aggregates plus one conditional count per grade letter"""
+    grade_counts = ", ".join("SUM(g.grade = ?)" for _ in GRADE_ORDER)
+    return (f"COUNT(*), AVG(g.total_marks), SUM(g.result_status = 'Pass'), SUM(g.back_paper), {grade_counts}",
+            list(GRADE_ORDER))
+
+
+def group_statistics(conn, group_by="subject", **filters):
+    """Per-subject or per-section statistics for the grade rows matching filters.
+
+    Counts, means, pass counts, back papers and the grade histogram come
+    from one GROUP BY pass; the median and standard deviation from one
+    fetch of the marks column, grouped with NumPy.
+    """
+    key_columns, label = GROUPINGS[group_by]
+    keys = ", ".join(key_columns)
+    key_length = len(key_columns)
+    where, params = filter_conditions(**filters)
+    aggregates, grade_params = _aggregate_columns()
+
+    groups = {}
+    for row in conn.execute(f'''
+        SELECT {keys}, {label}, {aggregates}
+        {_from_clause(where)}
+        GROUP BY {keys}
+        ORDER BY {keys}
+    ''', grade_params + params):
+        key = tuple(row[:key_length])
+        stats = GroupStatistics(key, *row[key_length:key_length + 5])
+        stats.grade_counts = dict(zip(GRADE_ORDER, row[key_length + 5:]))
+        groups[key] = stats
+
+    rows = conn.execute(f"SELECT {keys}, g.total_marks {_from_clause(where)}", params).fetchall()
+    for key, (median, std) in _grouped_median_std(rows, key_length).items():
+        groups[key].median, groups[key].std = median, std
+
+    return list(groups.values())
+
+
+def _grouped_median_std(rows, key_length):
+    """{key: (median, population std dev)} of the last column of (key..., marks) rows"""
+    if not rows:
+        return {}
+    if np is None:
+        by_key = {}
+        for row in rows:
+            by_key.setdefault(tuple(row[:key_length]), []).append(row[-1] or 0.0)
+        return {key: _median_std(values) for key, values in by_key.items()}
+
+    index = {}
+    codes = np.fromiter((index.setdefault(row[:key_length], len(index)) for row in rows),
+                        dtype=np.int64, count=len(rows))
+    marks = np.fromiter((row[-1] or 0.0 for row in rows), dtype=float, count=len(rows))
+
+    # Sort by group, then marks: each group becomes a sorted run
+    order = np.lexsort((marks, codes))
+    marks, codes = marks[order], codes[order]
+    counts = np.bincount(codes, minlength=len(index))
+    starts = np.cumsum(counts) - counts
+    medians = (marks[starts + (counts - 1) // 2] + marks[starts + counts // 2]) / 2
+    means = np.bincount(codes, weights=marks) / counts
+    stds = np.sqrt(np.bincount(codes, weights=(marks - means[codes]) ** 2) / counts)
+    return {tuple(key): (float(medians[code]), float(stds[code])) for key, code in index.items()}
+
+
+def _median_std(values):
+    """Median and population standard deviation of a list of marks"""
+    if np is not None:
+        array = np.asarray(values, dtype=float)
+        return float(np.median(array)), float(np.std(array))
+    return statistics.median(values), statistics.pstdev(values)
+
+
+def overall_statistics(conn, **filters):
+    """The same statistics over every matching grade row, as one group"""
+    where, params = filter_conditions(**filters)
+    aggregates, grade_params = _aggregate_columns()
+    row = conn.execute(f"SELECT {aggregates} {_from_clause(where)}", grade_params + params).fetchone()
+    overall = GroupStatistics((), "All", row[0], row[1] or 0.0, row[2] or 0, row[3] or 0)
+    if row[0]:
+        overall.grade_counts = dict(zip(GRADE_ORDER, row[4:]))
+        values = [marks or 0.0 for marks, in conn.execute(f"SELECT g.total_marks {_from_clause(where)}", params)]
+        overall.median, overall.std = _median_std(values)
+    return overall
+
+
+def histogram_bins(values, bins=10, value_range=(0, 100)):
+    """(counts, edges) of values in equal-width bins over value_range; the last bin includes its upper edge"""
+    low, high = value_range
+    if np is not None:
+        counts, edges = np.histogram(np.asarray(values, dtype=float), bins=bins, range=value_range)
+        return counts.tolist(), edges.tolist()
+    width = (high - low) / bins
+    counts = [0] * bins
+    for value in values:
+        if low <= value <= high:
+            counts[min(int((value - low) / width), bins - 1)] += 1
+    return counts, [low + width * index for index in range(bins + 1)]
+
+
+def marks_histogram(conn, bins=10, **filters):
+    """(counts, edges) of total marks over 0-100 for the grade rows matching filters"""
+    where, params = filter_conditions(**filters)
+    values = [marks or 0.0 for marks, in conn.execute(f"SELECT g.total_marks {_from_clause(where)}", params)]
+    return histogram_bins(values, bins, (0, 100))
+
+
+def cgpa_trend(conn, department=None, batch=None):
+    """{batch: (semesters, mean CGPA after each semester)} for the students matching the filter.
+
+    A student's CGPA after semester n is their passed credit points over
+    passed credits for semesters 1..n, from the maintained semester_results.
+    """
+    conditions, params = [], []
+    if department:
+        conditions.append("st.department = ?")
+        params.append(department)
+    if batch:
+        conditions.append("st.batch = ?")
+        params.append(int(batch))
+    # Filtering whole students inside the window keeps the running CGPAs
+    # intact and reads only their semester_results rows
+    students = (" WHERE student_id IN (SELECT st.student_id FROM students st WHERE "
+                + " AND ".join(conditions) + ")") if conditions else ""
+
+    trend = {}
+    for batch_year, semester, cgpa in conn.execute(f'''
+        SELECT st.batch, r.semester, AVG(r.cgpa)
+        FROM (SELECT student_id, semester,
+                     SUM(grade_points) OVER running / NULLIF(SUM(credits) OVER running, 0) AS cgpa
+              FROM semester_results{students}
+              WINDOW running AS (PARTITION BY student_id ORDER BY semester)) r
+        JOIN students st ON st.student_id = r.student_id
+        GROUP BY st.batch, r.semester
+        ORDER BY st.batch, r.semester
+    ''', params):
+        if cgpa is not None:
+            semesters, values = trend.setdefault(batch_year, ([], []))
+            semesters.append(semester)
+            values.append(round(cgpa, 2))
+    return trend
@@ -0,0 +1,709 @@
+def create_tables(cursor):
+    """Create all application tables that do not exist yet"""
+    # Create admin users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            salt TEXT NOT NULL,
+            full_name TEXT,
+            email TEXT,
+            is_locked INTEGER DEFAULT 0,
+            login_attempts INTEGER DEFAULT 0,
+            last_login TIMESTAMP,
+            last_password_change TIMESTAMP,
+            lockout_time TIMESTAMP,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create security logs table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS security_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            description TEXT NOT NULL,
+            username TEXT,
+            ip_address TEXT DEFAULT 'localhost',
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create system settings table (key/value configuration)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS system_settings (
+            setting_key TEXT PRIMARY KEY,
+            setting_value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create backups table (one row per backup attempt, see backup_manager.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,             -- 'scheduled', 'manual' or 'incremental'
+            file_path TEXT,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            duration_ms REAL,
+            pages INTEGER,
+            size_bytes INTEGER,
+            status TEXT NOT NULL,           -- 'ok', 'corrupt', 'failed' or 'pruned'
+            check_result TEXT
+        )
+    ''')
+    # Change journal range covered: a full backup holds everything up to
+    # change_seq, an incremental one the changes from base_seq to change_seq
+    add_column_if_missing(cursor, "backups", "base_seq", "INTEGER")
+    add_column_if_missing(cursor, "backups", "change_seq", "INTEGER")
+
+    # Create departments table if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS departments (
+            dept_id TEXT PRIMARY KEY,
+            dept_name TEXT NOT NULL,
+            hod_name TEXT,
+            established_year INTEGER,
+            total_students INTEGER DEFAULT 0,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create sections table if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sections (
+            section_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            section_name TEXT NOT NULL,
+            department TEXT NOT NULL,
+            semester INTEGER NOT NULL,
+            batch INTEGER NOT NULL,
+            class_teacher TEXT,
+            room_number TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (department) REFERENCES departments(dept_id),
+            UNIQUE(section_name, department, semester, batch)
+        )
+    ''')
+
+    # Create subjects table with enhanced fields if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subjects (
+            subject_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject_code TEXT UNIQUE NOT NULL,
+            subject_name TEXT NOT NULL,
+            credits INTEGER NOT NULL,
+            semester INTEGER NOT NULL,
+            department TEXT NOT NULL,
+            subject_type TEXT NOT NULL,  -- Theory/Practical
+            max_marks INTEGER DEFAULT 100,
+            min_pass_marks INTEGER DEFAULT 40,
+            teaching_hours INTEGER,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (department) REFERENCES departments(dept_id)
+        )
+    ''')
+
+    # Create students table with section field if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            student_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            department TEXT NOT NULL,
+            batch INTEGER NOT NULL,
+            current_semester INTEGER DEFAULT 1,
+            section TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            blood_group TEXT,
+            admission_date DATE,
+            status TEXT DEFAULT 'Active',
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (department) REFERENCES departments(dept_id),
+            FOREIGN KEY (section) REFERENCES sections(section_name)
+        )
+    ''')
+
+    # Create theory grades table if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS theory_grades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            subject_code TEXT NOT NULL,
+            semester INTEGER NOT NULL,
+            academic_year TEXT,
+            internal1_marks REAL DEFAULT 0,    -- First Internal (20 marks)
+            internal2_marks REAL DEFAULT 0,    -- Second Internal (20 marks)
+            presentation_marks REAL DEFAULT 0, -- Presentation (10 marks)
+            assignment1_marks REAL DEFAULT 0,  -- Assignment 1 (5 marks)
+            assignment2_marks REAL DEFAULT 0,  -- Assignment 2 (5 marks)
+            external_marks REAL DEFAULT 0,     -- External (60 marks)
+            total_marks REAL DEFAULT 0,
+            grade TEXT,
+            grade_point REAL DEFAULT 0,
+            result_status TEXT,
+            back_paper INTEGER DEFAULT 0,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students(student_id),
+            FOREIGN KEY (subject_code) REFERENCES subjects(subject_code),
+            UNIQUE(student_id, subject_code, semester)
+        )
+    ''')
+
+    # Create practical grades table if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practical_grades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            subject_code TEXT NOT NULL,
+            semester INTEGER NOT NULL,
+            academic_year TEXT,
+            lab_copies_marks REAL DEFAULT 0,    -- Lab Copies (20 marks)
+            viva_marks REAL DEFAULT 0,          -- Viva (20 marks)
+            practical_exam_marks REAL DEFAULT 0, -- Practical Exam (60 marks)
+            total_marks REAL DEFAULT 0,
+            grade TEXT,
+            grade_point REAL DEFAULT 0,
+            result_status TEXT,
+            back_paper INTEGER DEFAULT 0,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students(student_id),
+            FOREIGN KEY (subject_code) REFERENCES subjects(subject_code),
+            UNIQUE(student_id, subject_code, semester)
+        )
+    ''')
+
+    # Supplementary (back paper) exam attempts at a failed grade row; a pass
+    # clears the row's back_paper flag (see back_papers.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS supplementary_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            grade_table TEXT NOT NULL,      -- 'theory_grades' or 'practical_grades'
+            grade_id INTEGER NOT NULL,      -- id of the failed grade row
+            student_id TEXT NOT NULL,
+            subject_code TEXT NOT NULL,
+            semester INTEGER NOT NULL,
+            attempt_no INTEGER NOT NULL,
+            exam_date TEXT,
+            exam_marks REAL NOT NULL,       -- the re-attempted exam component (out of 60)
+            total_marks REAL NOT NULL,
+            grade TEXT,
+            grade_point REAL,
+            result_status TEXT,
+            recorded_by TEXT,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students(student_id),
+            UNIQUE(grade_table, grade_id, attempt_no)
+        )
+    ''')
+
+    # Grace-mark moderations of a subject (see moderation.py) and the
+    # before/after values of every grade row each one changed
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS moderations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject_code TEXT NOT NULL,
+            semester INTEGER,               -- NULL: every semester the subject was sat in
+            rule TEXT NOT NULL,             -- 'flat', 'cap' or 'pass_lift'
+            amount REAL NOT NULL,
+            rows_changed INTEGER NOT NULL DEFAULT 0,
+            applied_by TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (subject_code) REFERENCES subjects(subject_code)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS moderation_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            moderation_id INTEGER NOT NULL,
+            grade_table TEXT NOT NULL,      -- 'theory_grades' or 'practical_grades'
+            grade_id INTEGER NOT NULL,
+            student_id TEXT NOT NULL,
+            exam_before REAL,
+            exam_after REAL,
+            total_before REAL,
+            total_after REAL,
+            grade_before TEXT,
+            grade_after TEXT,
+            grade_point_before REAL,
+            grade_point_after REAL,
+            status_before TEXT,
+            status_after TEXT,
+            FOREIGN KEY (moderation_id) REFERENCES moderations(id),
+            UNIQUE(moderation_id, grade_table, grade_id)
+        )
+    ''')
+
+    # Grading scheme (see grading.GRADING_SCHEMES) a subject is graded under,
+    # and the one each stored grade was computed with
+    add_column_if_missing(cursor, "subjects", "grading_scheme", "TEXT DEFAULT 'absolute'")
+    add_column_if_missing(cursor, "theory_grades", "grading_scheme", "TEXT DEFAULT 'absolute'")
+    add_column_if_missing(cursor, "practical_grades", "grading_scheme", "TEXT DEFAULT 'absolute'")
+
+    # Theory and practical grades as one relation, so SGPA/CGPA and analytics
+    # have a single definition. Filters on the view are pushed into both
+    # arms, so lookups by student still use each table's unique index
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS all_grades AS
+        SELECT 'Theory' AS kind, id, student_id, subject_code, semester, academic_year,
+               total_marks, grade, grade_point, result_status, back_paper
+        FROM theory_grades
+        UNION ALL
+        SELECT 'Practical', id, student_id, subject_code, semester, academic_year,
+               total_marks, grade, grade_point, result_status, back_paper
+        FROM practical_grades
+    ''')
+
+
+def create_indexes(cursor):
+    """Create the secondary indexes the application's queries rely on.
+
+    Grade lookups by student use the UNIQUE(student_id, subject_code,
+    semester) index; these cover the remaining access paths. The expected
+    plan for every statement is checked by tests/test_query_plans.py.
+    """
+    # Subject delete checks look grades up by subject
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_theory_grades_subject ON theory_grades(subject_code)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_practical_grades_subject ON practical_grades(subject_code)")
+
+    # Security log viewer: newest first, optionally for one event type
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_security_logs_timestamp ON security_logs(timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_security_logs_event_time ON security_logs(event_type, timestamp)")
+
+    # Pending back papers: partial indexes hold only the failed rows, so the
+    # exam cell's list never touches the passed majority
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_theory_grades_back_paper ON theory_grades(student_id) WHERE back_paper = 1")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_practical_grades_back_paper ON practical_grades(student_id) WHERE back_paper = 1")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_supplementary_attempts_student ON supplementary_attempts(student_id)")
+
+
+def add_column_if_missing(cursor, table, column, definition):
+    """Add a column to an existing table (schema migration for older databases)"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def install_student_counters(cursor):
+    """Create triggers that keep departments/sections.total_students accurate.
+
+    Returns True if the triggers were new, in which case the counters were
+    seeded from the existing rows. Bulk loaders can install the triggers
+    after loading so each insert does not pay for the counter updates.
+    """
+    add_column_if_missing(cursor, "sections", "total_students", "INTEGER DEFAULT 0")
+
+    # Students are counted per section by (department, batch, semester, section name)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_students_section
+        ON students(department, batch, current_semester, section)
+    ''')
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='trg_students_count_insert'")
+    triggers_existed = cursor.fetchone() is not None
+
+    cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS trg_students_count_insert AFTER INSERT ON students
+        BEGIN
+            UPDATE departments SET total_students = total_students + 1
+            WHERE dept_id = NEW.department;
+            UPDATE sections SET total_students = total_students + 1
+            WHERE section_name = NEW.section AND department = NEW.department
+              AND batch = NEW.batch AND semester = NEW.current_semester;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_students_count_delete AFTER DELETE ON students
+        BEGIN
+            UPDATE departments SET total_students = total_students - 1
+            WHERE dept_id = OLD.department;
+            UPDATE sections SET total_students = total_students - 1
+            WHERE section_name = OLD.section AND department = OLD.department
+              AND batch = OLD.batch AND semester = OLD.current_semester;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_students_count_update
+        AFTER UPDATE OF department, batch, current_semester, section ON students
+        BEGIN
+            UPDATE departments SET total_students = total_students - 1
+            WHERE dept_id = OLD.department;
+            UPDATE departments SET total_students = total_students + 1
+            WHERE dept_id = NEW.department;
+            UPDATE sections SET total_students = total_students - 1
+            WHERE section_name = OLD.section AND department = OLD.department
+              AND batch = OLD.batch AND semester = OLD.current_semester;
+            UPDATE sections SET total_students = total_students + 1
+            WHERE section_name = NEW.section AND department = NEW.department
+              AND batch = NEW.batch AND semester = NEW.current_semester;
+        END;
+
+        -- A new or re-keyed section/department picks up students already assigned to it
+        CREATE TRIGGER IF NOT EXISTS trg_sections_count_insert AFTER INSERT ON sections
+        BEGIN
+            UPDATE sections SET total_students = (
+                SELECT COUNT(*) FROM students
+                WHERE department = NEW.department AND batch = NEW.batch
+                  AND current_semester = NEW.semester AND section = NEW.section_name)
+            WHERE section_id = NEW.section_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sections_count_update
+        AFTER UPDATE OF section_name, department, semester, batch ON sections
+        BEGIN
+            UPDATE sections SET total_students = (
+                SELECT COUNT(*) FROM students
+                WHERE department = NEW.department AND batch = NEW.batch
+                  AND current_semester = NEW.semester AND section = NEW.section_name)
+            WHERE section_id = NEW.section_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_departments_count_insert AFTER INSERT ON departments
+        BEGIN
+            UPDATE departments SET total_students = (
+                SELECT COUNT(*) FROM students WHERE department = NEW.dept_id)
+            WHERE dept_id = NEW.dept_id;
+        END;
+    ''')
+
+    # First run on an existing database: seed the counters once
+    if not triggers_existed:
+        reconcile_student_counters(cursor)
+    return not triggers_existed
+
+
+def reconcile_student_counters(cursor):
+    """Recount department and section totals from the students table"""
+    cursor.execute('''
+        UPDATE departments SET total_students = (
+            SELECT COUNT(*) FROM students s WHERE s.department = departments.dept_id)
+    ''')
+    cursor.execute('''
+        UPDATE sections SET total_students = (
+            SELECT COUNT(*) FROM students s
+            WHERE s.department = sections.department AND s.batch = sections.batch
+              AND s.current_semester = sections.semester AND s.section = sections.section_name)
+    ''')
+
+
+# Tables whose row counts are maintained by triggers for the System Info tab
+COUNTED_TABLES = ['departments', 'sections', 'subjects', 'students', 'theory_grades',
+                  'practical_grades', 'admin_users', 'security_logs']
+
+
+def install_row_counters(cursor):
+    """Keep table_row_counts exact with insert/delete triggers on COUNTED_TABLES.
+
+    A table's counter is seeded with one COUNT(*) when its triggers are
+    first created; after that reading a count never scans the table.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_row_counts (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    for table in COUNTED_TABLES:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?",
+                       (f"trg_{table}_rows_insert",))
+        if cursor.fetchone():
+            continue
+
+        cursor.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_rows_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE table_row_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_rows_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE table_row_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+            END;
+        ''')
+        cursor.execute(f"INSERT OR REPLACE INTO table_row_counts (table_name, row_count) "
+                       f"SELECT '{table}', COUNT(*) FROM {table}")
+
+
+def recount_rows(cursor):
+    """Reseed table_row_counts with COUNT(*), e.g. after rows were restored with triggers off"""
+    for table in COUNTED_TABLES:
+        cursor.execute(f"INSERT OR REPLACE INTO table_row_counts (table_name, row_count) "
+                       f"SELECT '{table}', COUNT(*) FROM {table}")
+
+
+# semester_results columns after (student_id, semester), aggregated over grade
+# rows g joined to their subjects s
+_SEMESTER_RESULT_VALUES = '''
+                       COALESCE(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits END), 0),
+                       COALESCE(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits * g.grade_point END), 0),
+                       COALESCE(ROUND(SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits * g.grade_point END)
+                                      / SUM(CASE WHEN g.result_status = 'Pass' THEN s.credits END), 2), 0),
+                       COUNT(*),
+                       COALESCE(SUM(g.result_status <> 'Pass'), 0)'''
+
+
+def _semester_result_refresh(student, semester):
+    """Statements recomputing one (student, semester) row of semester_results"""
+    return f'''
+                INSERT INTO semester_results (student_id, semester, credits, grade_points, sgpa, subjects, failed)
+                SELECT {student}, {semester},{_SEMESTER_RESULT_VALUES}
+                FROM (SELECT subject_code, grade_point, result_status FROM theory_grades
+                      WHERE student_id = {student} AND semester = {semester}
+                      UNION ALL
+                      SELECT subject_code, grade_point, result_status FROM practical_grades
+                      WHERE student_id = {student} AND semester = {semester}) g
+                JOIN subjects s ON s.subject_code = g.subject_code
+                WHERE true
+                ON CONFLICT(student_id, semester) DO UPDATE SET
+                    credits = excluded.credits, grade_points = excluded.grade_points, sgpa = excluded.sgpa,
+                    subjects = excluded.subjects, failed = excluded.failed;
+                DELETE FROM semester_results
+                WHERE student_id = {student} AND semester = {semester} AND subjects = 0;'''
+
+
+def _subject_result_refresh(subject_code):
+    """Statement recomputing the semester_results rows of every student graded in a subject"""
+    graded = " UNION ALL ".join(f"SELECT student_id, semester FROM {table} WHERE subject_code = {subject_code}"
+                                for table in ("theory_grades", "practical_grades"))
+    # The student_id IN list lets each arm search the (student_id, ...) key
+    scope = f"student_id IN (SELECT student_id FROM ({graded})) AND (student_id, semester) IN ({graded})"
+    return f'''
+                INSERT INTO semester_results (student_id, semester, credits, grade_points, sgpa, subjects, failed)
+                SELECT g.student_id, g.semester,{_SEMESTER_RESULT_VALUES}
+                FROM (SELECT student_id, semester, subject_code, grade_point, result_status FROM theory_grades
+                      WHERE {scope}
+                      UNION ALL
+                      SELECT student_id, semester, subject_code, grade_point, result_status FROM practical_grades
+                      WHERE {scope}) g
+                JOIN subjects s ON s.subject_code = g.subject_code
+                WHERE true
+                GROUP BY g.student_id, g.semester
+                ON CONFLICT(student_id, semester) DO UPDATE SET
+                    credits = excluded.credits, grade_points = excluded.grade_points, sgpa = excluded.sgpa,
+                    subjects = excluded.subjects, failed = excluded.failed;'''
+
+
+def install_semester_results(cursor):
+    """Create semester_results, kept current by triggers on both grade tables and subject credits.
+
+    One row per (student, semester) with passed credits, SGPA and failed
+    subject count, so rank lists and analytics never aggregate grade rows.
+    result_scope_versions gets a new version for a (department, batch,
+    semester) whenever a result in it changes; caches compare versions.
+    Returns True if the table was new and has been filled from the grades.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='semester_results'")
+    existed = cursor.fetchone() is not None
+
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS semester_results (
+            student_id TEXT NOT NULL,
+            semester INTEGER NOT NULL,
+            credits REAL NOT NULL DEFAULT 0,       -- credits passed
+            grade_points REAL NOT NULL DEFAULT 0,  -- sum of credits * grade point over passed subjects
+            sgpa REAL NOT NULL DEFAULT 0,
+            subjects INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, semester)
+        );
+        CREATE INDEX IF NOT EXISTS idx_semester_results_semester ON semester_results(semester);
+
+        CREATE TABLE IF NOT EXISTS result_scope_versions (
+            department TEXT NOT NULL,
+            batch INTEGER NOT NULL,
+            semester INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (department, batch, semester)
+        );
+    ''')
+
+    script = ""
+    for table in ("theory_grades", "practical_grades"):
+        # Older databases refreshed both the old and new row on every update
+        cursor.execute(f"SELECT sql FROM sqlite_master WHERE type='trigger' AND name='trg_{table}_results_update'")
+        row = cursor.fetchone()
+        if row and "UPDATE OF" not in row[0]:
+            cursor.execute(f"DROP TRIGGER trg_{table}_results_update")
+        script += f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_results_insert AFTER INSERT ON {table}
+            BEGIN{_semester_result_refresh("NEW.student_id", "NEW.semester")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_results_update
+            AFTER UPDATE OF student_id, subject_code, semester, grade_point, result_status ON {table}
+            BEGIN{_semester_result_refresh("NEW.student_id", "NEW.semester")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_results_move AFTER UPDATE OF student_id, semester ON {table}
+            WHEN OLD.student_id IS NOT NEW.student_id OR OLD.semester IS NOT NEW.semester
+            BEGIN{_semester_result_refresh("OLD.student_id", "OLD.semester")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_results_delete AFTER DELETE ON {table}
+            BEGIN{_semester_result_refresh("OLD.student_id", "OLD.semester")}
+            END;
+        '''
+
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        script += f'''
+            CREATE TRIGGER IF NOT EXISTS trg_semester_results_version_{event.lower()} AFTER {event} ON semester_results
+            BEGIN
+                INSERT INTO result_scope_versions (department, batch, semester, version)
+                SELECT department, batch, {row}.semester, 1 FROM students WHERE student_id = {row}.student_id
+                ON CONFLICT(department, batch, semester) DO UPDATE SET version = version + 1;
+            END;
+        '''
+
+    # Credits weight every SGPA the subject is part of
+    script += f'''
+        CREATE TRIGGER IF NOT EXISTS trg_subjects_results_credits AFTER UPDATE OF credits ON subjects
+        WHEN OLD.credits IS NOT NEW.credits
+        BEGIN{_subject_result_refresh("NEW.subject_code")}
+        END;
+    '''
+
+    # Moving a student to another department, batch or section changes every ranking they are in
+    script += '''
+        CREATE TRIGGER IF NOT EXISTS trg_students_results_version AFTER UPDATE OF department, batch, section, name
+        ON students
+        BEGIN
+            UPDATE result_scope_versions SET version = version + 1
+            WHERE (department = OLD.department AND batch = OLD.batch)
+               OR (department = NEW.department AND batch = NEW.batch);
+        END;
+    '''
+    cursor.executescript(script)
+
+    if not existed:
+        rebuild_semester_results(cursor)
+    return not existed
+
+
+def _student_version_bump(students):
+    """Upsert giving each student_id selected by students a new version"""
+    return f'''
+                INSERT INTO student_grade_versions (student_id, version)
+                {students}
+                ON CONFLICT(student_id) DO UPDATE SET version = version + 1;'''
+
+
+def _section_students(row):
+    """SELECT of (student_id, 1) for the students in section row (NEW or OLD)"""
+    return (f"SELECT student_id, 1 FROM students WHERE department = {row}.department AND batch = {row}.batch "
+            f"AND current_semester = {row}.semester AND section = {row}.section_name")
+
+
+def install_student_versions(cursor):
+    """Create student_grade_versions, a version per student that triggers bump on every change to their report.
+
+    Any insert, update or delete of one of the student's grades moves it,
+    as do inserting or editing the student, renaming their department,
+    any change to their section (added, removed, renamed, moved or a new
+    class teacher) and edits to a subject they have grades in. A student
+    with no row is at version 0. Report caches compare versions instead
+    of rereading.
+    """
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS student_grade_versions (
+            student_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+    ''')
+
+    script = ""
+    for table in ("theory_grades", "practical_grades"):
+        script += f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_insert AFTER INSERT ON {table}
+            BEGIN{_student_version_bump("VALUES (NEW.student_id, 1)")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_update AFTER UPDATE ON {table}
+            BEGIN{_student_version_bump("VALUES (NEW.student_id, 1)")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_move AFTER UPDATE OF student_id ON {table}
+            WHEN OLD.student_id IS NOT NEW.student_id
+            BEGIN{_student_version_bump("VALUES (OLD.student_id, 1)")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_delete AFTER DELETE ON {table}
+            BEGIN{_student_version_bump("VALUES (OLD.student_id, 1)")}
+            END;
+        '''
+
+    # Older databases only tracked section renames and class teachers, within the old scope
+    cursor.execute("DROP TRIGGER IF EXISTS trg_sections_version")
+
+    script += f'''
+        CREATE TRIGGER IF NOT EXISTS trg_students_version_insert AFTER INSERT ON students
+        BEGIN{_student_version_bump("VALUES (NEW.student_id, 1)")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_students_version_update AFTER UPDATE ON students
+        BEGIN{_student_version_bump("SELECT OLD.student_id, 1 UNION SELECT NEW.student_id, 1 WHERE true")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_students_version_delete AFTER DELETE ON students
+        BEGIN{_student_version_bump("VALUES (OLD.student_id, 1)")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_departments_version AFTER UPDATE OF dept_name ON departments
+        BEGIN{_student_version_bump("SELECT student_id, 1 FROM students WHERE department = NEW.dept_id")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sections_version_insert AFTER INSERT ON sections
+        BEGIN{_student_version_bump(_section_students("NEW"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sections_version_update
+        AFTER UPDATE OF section_name, department, semester, batch, class_teacher ON sections
+        BEGIN{_student_version_bump(_section_students("OLD") + " UNION " + _section_students("NEW"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sections_version_delete AFTER DELETE ON sections
+        BEGIN{_student_version_bump(_section_students("OLD"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_subjects_version AFTER UPDATE OF subject_name, credits, subject_type
+        ON subjects
+        BEGIN{_student_version_bump(
+            "SELECT student_id, 1 FROM theory_grades WHERE subject_code = NEW.subject_code "
+            "UNION SELECT student_id, 1 FROM practical_grades WHERE subject_code = NEW.subject_code")}
+        END;
+    '''
+    cursor.executescript(script)
+
+
+def rebuild_semester_results(cursor):
+    """Recompute every semester_results row from the grade tables"""
+    cursor.execute("DELETE FROM semester_results")
+    cursor.execute(f'''
+        INSERT INTO semester_results (student_id, semester, credits, grade_points, sgpa, subjects, failed)
+        SELECT g.student_id, g.semester,{_SEMESTER_RESULT_VALUES}
+        FROM all_grades g
+        JOIN subjects s ON s.subject_code = g.subject_code
+        GROUP BY g.student_id, g.semester
+    ''')
+
+
+def table_row_counts(cursor):
+    """{table: (row_count, exact)} without scanning the tables.
+
+    Counts come from the trigger-maintained table_row_counts (exact). A
+    table without a counter falls back to the row estimate ANALYZE stored
+    in sqlite_stat1 (approximate), or is left out if there is none.
+    """
+    counts = {}
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('table_row_counts', 'sqlite_stat1')")
+    available = {row[0] for row in cursor.fetchall()}
+
+    if 'sqlite_stat1' in available:
+        cursor.execute("SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl")
+        counts.update((table, (row_count, False)) for table, row_count in cursor.fetchall())
+
+    if 'table_row_counts' in available:
+        cursor.execute("SELECT table_name, row_count FROM table_row_counts")
+        counts.update((table, (row_count, True)) for table, row_count in cursor.fetchall())
+
+    return counts
@@ -0,0 +1,85 @@
+"""Grade history: who changed which grade, and what it was at a given time."""
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grade_history  # noqa: E402
+from generate_dataset import DatasetGenerator  # noqa: E402
+
+
+class GradeHistoryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.workdir, "college.db")
+        conn = sqlite3.connect(self.db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            DatasetGenerator(conn, students=50).generate()
+        conn.close()
+        self.connections = []
+
+    def tearDown(self):
+        for conn in self.connections:
+            conn.close()
+        shutil.rmtree(self.workdir)
+
+    def connect(self, username):
+        conn = sqlite3.connect(self.db_path)
+        grade_history.register_changed_by(conn)
+        grade_history.set_changed_by(conn, username)
+        self.connections.append(conn)
+        return conn
+
+    def bump(self, conn, grade_id):
+        conn.execute("UPDATE theory_grades SET total_marks = total_marks + 1 WHERE id = ?", (grade_id,))
+        conn.commit()
+
+    def author_of_last_change(self, conn, grade_id):
+        return conn.execute('''
+            SELECT e.changed_by FROM grade_events e JOIN theory_grades t
+              ON e.student_id = t.student_id AND e.subject_code = t.subject_code AND e.semester = t.semester
+            WHERE t.id = ? AND e.grade_table = 'theory_grades' AND e.op = 'U'
+            ORDER BY e.id DESC LIMIT 1
+        ''', (grade_id,)).fetchone()[0]
+
+    def test_each_connection_records_its_own_user(self):
+        alice, bob = self.connect("alice"), self.connect("bob")
+        self.bump(alice, 1)
+        self.bump(bob, 2)
+        grade_history.set_changed_by(bob, None)   # bob signs out; alice is still signed in
+        self.bump(alice, 3)
+
+        self.assertEqual(self.author_of_last_change(alice, 1), "alice")
+        self.assertEqual(self.author_of_last_change(alice, 2), "bob")
+        self.assertEqual(self.author_of_last_change(alice, 3), "alice")
+
+    def test_snapshots_only_due_students_and_reset_their_count(self):
+        conn = self.connect("alice")
+        busy, busy_student = conn.execute("SELECT id, student_id FROM theory_grades ORDER BY id LIMIT 1").fetchone()
+        quiet = conn.execute("SELECT id FROM theory_grades WHERE student_id != ? LIMIT 1", (busy_student,)).fetchone()[0]
+        conn.execute("DELETE FROM grade_snapshot_due")
+        for _ in range(3):
+            self.bump(conn, busy)
+        self.bump(conn, quiet)
+
+        self.assertEqual(grade_history.take_snapshots(conn, min_events=3), 1)
+        conn.commit()
+        last_event_id = conn.execute(
+            "SELECT last_event_id FROM grade_snapshots WHERE student_id = ? ORDER BY id DESC LIMIT 1",
+            (busy_student,)).fetchone()[0]
+        self.assertEqual(last_event_id, conn.execute(
+            "SELECT MAX(id) FROM grade_events WHERE student_id = ?", (busy_student,)).fetchone()[0])
+        self.assertIsNone(conn.execute(
+            "SELECT events FROM grade_snapshot_due WHERE student_id = ?", (busy_student,)).fetchone())
+        self.assertEqual(grade_history.take_snapshots(conn, min_events=3), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Incremental exports must never lose changes, whatever subset of datasets is exported."""
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grade_history  # noqa: E402
+import incremental_export  # noqa: E402
+from generate_dataset import DatasetGenerator  # noqa: E402
+
+
+class IncrementalExportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.workdir, "college.db")
+        self.output_dir = os.path.join(self.workdir, "exports")
+        conn = sqlite3.connect(self.db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            DatasetGenerator(conn, students=50).generate()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def export(self, datasets=None):
+        return incremental_export.export_changes(self.db_path, self.output_dir, datasets=datasets)
+
+    def test_subset_export_keeps_other_datasets_pending(self):
+        self.assertEqual(self.export()["mode"], "full")
+
+        conn = sqlite3.connect(self.db_path)
+        grade_history.register_changed_by(conn)
+        conn.execute("UPDATE students SET phone = '0000000000' WHERE student_id = "
+                     "(SELECT MIN(student_id) FROM students)")
+        conn.execute("UPDATE theory_grades SET total_marks = total_marks + 1 WHERE id = "
+                     "(SELECT MIN(id) FROM theory_grades)")
+        conn.commit()
+        conn.close()
+
+        subset = self.export(["students"])
+        self.assertEqual(list(subset["datasets"]), ["students"])
+        self.assertEqual(subset["datasets"]["students"]["upserts"], 1)
+
+        summary = self.export()
+        self.assertEqual(summary["mode"], "incremental")
+        self.assertEqual(summary["datasets"]["students"]["upserts"], 0)
+        self.assertEqual(summary["datasets"]["theory_grades"]["upserts"], 1)
+        self.assertEqual(summary["datasets"]["practical_grades"]["upserts"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
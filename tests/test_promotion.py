@@ -0,0 +1,57 @@
+"""Promotion must only move students into sections that exist."""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import promotion  # noqa: E402
+from generate_dataset import DatasetGenerator  # noqa: E402
+
+
+class PromotionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        with contextlib.redirect_stdout(io.StringIO()):
+            DatasetGenerator(self.conn, students=200).generate()
+        self.department, self.batch, self.semester = self.conn.execute(
+            "SELECT department, batch, current_semester FROM students "
+            "WHERE status = 'Active' AND current_semester < ? LIMIT 1", (promotion.FINAL_SEMESTER,)).fetchone()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def students_in_next_semester(self):
+        return self.conn.execute("SELECT COUNT(*) FROM students WHERE department = ? AND batch = ? "
+                                 "AND current_semester = ?",
+                                 (self.department, self.batch, self.semester + 1)).fetchone()[0]
+
+    def test_promoted_students_get_a_section_of_the_new_semester(self):
+        self.conn.execute("INSERT OR IGNORE INTO sections (section_name, department, semester, batch) "
+                          "VALUES ('Z', ?, ?, ?)", (self.department, self.semester + 1, self.batch))
+        promoted = promotion.promote_batch(self.conn, self.department, self.batch, self.semester)
+        self.assertGreater(promoted, 0)
+        orphans = self.conn.execute('''
+            SELECT COUNT(*) FROM students s
+            WHERE s.department = ? AND s.batch = ? AND s.current_semester = ?
+              AND NOT EXISTS (SELECT 1 FROM sections sec
+                              WHERE sec.department = s.department AND sec.batch = s.batch
+                                AND sec.semester = s.current_semester AND sec.section_name = s.section)
+        ''', (self.department, self.batch, self.semester + 1)).fetchone()[0]
+        self.assertEqual(orphans, 0)
+
+    def test_semester_without_sections_is_refused(self):
+        self.conn.execute("DELETE FROM sections WHERE department = ? AND batch = ? AND semester = ?",
+                          (self.department, self.batch, self.semester + 1))
+        before = self.students_in_next_semester()
+        with self.assertRaises(ValueError):
+            promotion.promote_batch(self.conn, self.department, self.batch, self.semester)
+        self.assertEqual(self.students_in_next_semester(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+"""Query-plan regression tests for the statements in queries.py.
+
+Every statement is explained against a small generated database and must
+use the index it was written for. A missing index or a rewrite that makes
+a filter non-sargable shows up here as a failed test instead of a slow
+screen on a large database.
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grade_history  # noqa: E402
+import grading  # noqa: E402
+import moderation  # noqa: E402
+import queries  # noqa: E402
+import result_analytics  # noqa: E402
+import schema  # noqa: E402
+from generate_dataset import DatasetGenerator  # noqa: E402
+
+# Tables large enough that a full scan is never acceptable
+LARGE_TABLES = ("theory_grades", "practical_grades", "security_logs", "semester_results", "grade_events",
+                "moderation_changes")
+
+GRADE_KEY = "sqlite_autoindex_{}_1"
+
+# Statements built from fragments the way the application builds them
+COMPOSED = {
+    "SECURITY_LOG_LIST": queries.SECURITY_LOG_LIST + queries.SECURITY_LOG_ORDER,
+    "SECURITY_LOG_BY_EVENT": queries.SECURITY_LOG_LIST + queries.SECURITY_LOG_EVENT_FILTER + queries.SECURITY_LOG_ORDER,
+    "SECURITY_LOG_BY_DATE": (queries.SECURITY_LOG_LIST + queries.SECURITY_LOG_FROM_FILTER
+                             + queries.SECURITY_LOG_TO_FILTER + queries.SECURITY_LOG_ORDER),
+    "SECURITY_LOG_BY_EVENT_AND_DATE": (queries.SECURITY_LOG_LIST + queries.SECURITY_LOG_EVENT_FILTER
+                                       + queries.SECURITY_LOG_FROM_FILTER + queries.SECURITY_LOG_TO_FILTER
+                                       + queries.SECURITY_LOG_ORDER),
+    "STUDENT_LIST_BY_DEPARTMENT": queries.STUDENT_LIST + " WHERE department=?",
+    "SUBJECT_LIST": queries.SUBJECT_LIST + queries.SUBJECT_ORDER,
+    "THEORY_GRADE_ROW": queries.THEORY_GRADE_LIST + " AND t.subject_code = ?",
+    "PRACTICAL_GRADE_ROW": queries.PRACTICAL_GRADE_LIST + " AND p.subject_code = ?",
+    "BACK_PAPER_LIST": queries.BACK_PAPER_PENDING + queries.BACK_PAPER_ORDER,
+    "BACK_PAPER_BY_SUBJECT": (queries.BACK_PAPER_PENDING + queries.BACK_PAPER_SEMESTER_FILTER
+                              + queries.BACK_PAPER_SUBJECT_FILTER + queries.BACK_PAPER_ORDER),
+    "PROMOTION_CANDIDATES": queries.PROMOTION_COUNT + queries.PROMOTION_SCOPE,
+    "PROMOTION_ELIGIBLE": queries.PROMOTION_COUNT + queries.PROMOTION_SCOPE + queries.PROMOTION_BACK_PAPER_RULE,
+    "PROMOTE_BATCH": queries.PROMOTE_STUDENTS + queries.PROMOTION_SCOPE + queries.PROMOTION_BACK_PAPER_RULE,
+    "GRADE_EVENTS_UNTIL": (queries.GRADE_EVENTS_FOR_STUDENT + queries.GRADE_EVENTS_UNTIL_FILTER
+                           + queries.GRADE_EVENTS_ORDER),
+}
+
+# Statement name -> index its plan must use (None: no index expected)
+EXPECTED_INDEX = {
+    "STUDENT_LIST": None,
+    "STUDENT_LIST_BY_DEPARTMENT": "idx_students_section",
+    "SUBJECT_LIST": None,
+    "STUDENT_EXPORT": None,
+    "SECURITY_LOG_LIST": "idx_security_logs_timestamp",
+    "SECURITY_LOG_BY_EVENT": "idx_security_logs_event_time",
+    "SECURITY_LOG_BY_DATE": "idx_security_logs_timestamp",
+    "SECURITY_LOG_BY_EVENT_AND_DATE": "idx_security_logs_event_time",
+    "SECURITY_LOG_EXPORT": "idx_security_logs_timestamp",
+    "SECURITY_LOG_PURGE": "idx_security_logs_timestamp",
+    "REPORT_STUDENT": "sqlite_autoindex_students_1",
+    "STUDENT_GRADE_VERSION": "PRIMARY KEY",
+    "REPORT_EXPORT_THEORY": GRADE_KEY.format("theory_grades"),
+    "REPORT_EXPORT_PRACTICAL": GRADE_KEY.format("practical_grades"),
+    "THEORY_GRADE_LIST": GRADE_KEY.format("theory_grades"),
+    "PRACTICAL_GRADE_LIST": GRADE_KEY.format("practical_grades"),
+    "THEORY_GRADE_ROW": GRADE_KEY.format("theory_grades"),
+    "PRACTICAL_GRADE_ROW": GRADE_KEY.format("practical_grades"),
+    "STUDENT_SEMESTER_GPA": GRADE_KEY.format("theory_grades"),
+    "THEORY_GRADES_FOR_SUBJECT": "idx_theory_grades_subject",
+    "PRACTICAL_GRADES_FOR_SUBJECT": "idx_practical_grades_subject",
+    "THEORY_GRADES_FOR_STUDENT": GRADE_KEY.format("theory_grades"),
+    "PRACTICAL_GRADES_FOR_STUDENT": GRADE_KEY.format("practical_grades"),
+    "THEORY_GRADES_DELETE_STUDENT": GRADE_KEY.format("theory_grades"),
+    "PRACTICAL_GRADES_DELETE_STUDENT": GRADE_KEY.format("practical_grades"),
+    "RANK_LIST": "sqlite_autoindex_semester_results_1",
+    "RANK_SCOPE_VERSION": None,
+    "BACK_PAPER_PENDING": "idx_theory_grades_back_paper",
+    "BACK_PAPER_LIST": "idx_practical_grades_back_paper",
+    "BACK_PAPER_BY_SUBJECT": "idx_theory_grades_subject",
+    "SUPPLEMENTARY_ATTEMPT_COUNT": "sqlite_autoindex_supplementary_attempts_1",
+    "SUPPLEMENTARY_ATTEMPT_LIST": "sqlite_autoindex_supplementary_attempts_1",
+    "SUPPLEMENTARY_ATTEMPTS_DELETE_STUDENT": "idx_supplementary_attempts_student",
+    "PROMOTION_COUNT": None,
+    "PROMOTION_TARGET_SECTIONS": None,
+    "PROMOTION_CANDIDATES": "idx_students_section",
+    "PROMOTION_ELIGIBLE": "idx_practical_grades_back_paper",
+    "PROMOTE_BATCH": "idx_students_section",
+    "PROMOTE_STUDENTS": None,
+    # Upserts go through the UNIQUE constraint; there is nothing to explain
+    "THEORY_GRADE_SAVE": None,
+    "PRACTICAL_GRADE_SAVE": None,
+    "SUBJECT_GRADING_SCHEME": "sqlite_autoindex_subjects_1",
+    "SUBJECT_SET_GRADING_SCHEME": "sqlite_autoindex_subjects_1",
+    "THEORY_GRADES_TO_REGRADE": "idx_theory_grades_subject",
+    "PRACTICAL_GRADES_TO_REGRADE": "idx_practical_grades_subject",
+    "THEORY_GRADE_REGRADE": "INTEGER PRIMARY KEY",
+    "PRACTICAL_GRADE_REGRADE": "INTEGER PRIMARY KEY",
+    "MODERATION_INSERT": None,
+    "MODERATION_ROWS_CHANGED": "INTEGER PRIMARY KEY",
+    "THEORY_MODERATION_APPLY": "sqlite_autoindex_moderation_changes_1",
+    "PRACTICAL_MODERATION_APPLY": "sqlite_autoindex_moderation_changes_1",
+    "THEORY_MODERATION_REGRADED": "sqlite_autoindex_moderation_changes_1",
+    "PRACTICAL_MODERATION_REGRADED": "sqlite_autoindex_moderation_changes_1",
+    "MODERATION_CHANGES_LIST": "sqlite_autoindex_moderation_changes_1",
+    "GRADE_SNAPSHOT_LATEST": "idx_grade_snapshots_student",
+    "GRADE_EVENTS_FOR_STUDENT": "idx_grade_events_student",
+    "GRADE_EVENTS_UNTIL": "idx_grade_events_student",
+    "GRADE_EVENTS_LAST_ID": "idx_grade_events_student",
+    "GRADE_SNAPSHOTS_DUE": "idx_grade_snapshot_due_events",
+    "GRADE_SNAPSHOT_DUE_CLEAR": "PRIMARY KEY",
+}
+
+# Export-style statements that read the whole log, in index order
+FULL_READS = {"SECURITY_LOG_LIST", "SECURITY_LOG_EXPORT"}
+
+# Partial indexes hold only the rows a statement wants; scanning one is not a full scan
+PARTIAL_INDEXES = ("idx_theory_grades_back_paper", "idx_practical_grades_back_paper")
+
+STATEMENT_KINDS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def catalogued_statements():
+    """Every complete statement in queries.py plus the composed variants"""
+    statements = {}
+    for name in dir(queries):
+        value = getattr(queries, name)
+        if name.isupper() and isinstance(value, str) and value.split(None, 1)[0].upper() in STATEMENT_KINDS:
+            statements[name] = value
+    statements.update(COMPOSED)
+    return statements
+
+
+class QueryPlanTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = sqlite3.connect(":memory:")
+        with contextlib.redirect_stdout(io.StringIO()):
+            DatasetGenerator(cls.conn, students=400).generate()
+        schema.create_indexes(cls.conn.cursor())
+        grade_history.register_changed_by(cls.conn)
+        cls.conn.executemany(
+            "INSERT INTO security_logs (event_type, description, username, timestamp) VALUES (?, ?, ?, ?)",
+            [(("LOGIN_SUCCESS", "LOGOUT", "LOGIN_FAILED")[i % 3], "test", "admin",
+              f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00") for i in range(3000)])
+        cls.conn.execute("ANALYZE")
+        cls.sample = cls.conn.execute('''
+            SELECT t.student_id, t.subject_code, t.semester, st.department, st.batch
+            FROM theory_grades t JOIN students st ON st.student_id = t.student_id LIMIT 1
+        ''').fetchone()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def plan(self, sql):
+        rows = self.conn.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("?")).fetchall()
+        return [row[-1] for row in rows]
+
+    def test_every_statement_has_an_expectation(self):
+        missing = sorted(set(catalogued_statements()) - set(EXPECTED_INDEX))
+        self.assertEqual(missing, [], "add expected plans for new statements in queries.py")
+
+    def test_statements_use_expected_index(self):
+        for name, sql in sorted(catalogued_statements().items()):
+            expected = EXPECTED_INDEX.get(name)
+            if expected is None:
+                continue
+            with self.subTest(statement=name):
+                plan = self.plan(sql)
+                self.assertTrue(any(expected in line for line in plan),
+                                f"{name} does not use {expected}: {plan}")
+
+    def test_no_full_scan_of_large_tables(self):
+        for name, sql in sorted(catalogued_statements().items()):
+            with self.subTest(statement=name):
+                self.assert_no_full_scan(name, sql)
+
+    def test_generated_statements_use_expected_index(self):
+        for name, (call, expected) in sorted(self.generated_calls().items()):
+            with self.subTest(call=name):
+                statements = self.traced(call)
+                self.assertTrue(statements, f"{name} ran no statements")
+                plans = [self.plan(sql) for sql in statements]
+                self.assertTrue(any(expected in line for plan in plans for line in plan),
+                                f"{name} does not use {expected}: {plans}")
+                for sql in statements:
+                    self.assert_no_full_scan(name, sql)
+
+    def test_security_log_listing_needs_no_sort(self):
+        for name in ("SECURITY_LOG_LIST", "SECURITY_LOG_BY_EVENT", "SECURITY_LOG_BY_DATE",
+                     "SECURITY_LOG_BY_EVENT_AND_DATE"):
+            with self.subTest(statement=name):
+                plan = self.plan(COMPOSED[name])
+                self.assertFalse(any("TEMP B-TREE" in line for line in plan), f"{name} sorts: {plan}")
+
+    def generated_calls(self):
+        """Functions that build their SQL at run time -> (call, index one of their statements must use)"""
+        student_id, subject_code, semester, department, batch = self.sample
+
+        def snapshot(conn):
+            conn.execute("UPDATE theory_grades SET total_marks = total_marks + 1 WHERE student_id = ?", (student_id,))
+            grade_history.take_snapshots(conn, min_events=1)
+
+        return {
+            "preview_moderation": (lambda conn: moderation.preview_moderation(
+                conn, subject_code, moderation.PASS_LIFT, 5), "idx_theory_grades_subject"),
+            "moderate_subject": (lambda conn: moderation.moderate_subject(
+                conn, subject_code, moderation.FLAT, 2, semester), "idx_theory_grades_subject"),
+            "regrade_subject": (lambda conn: grading.regrade_subject(
+                conn, subject_code, grading.PERCENTILE), "idx_theory_grades_subject"),
+            "grades_as_of": (lambda conn: grade_history.grades_as_of(conn, student_id, "2999-01-01"),
+                             GRADE_KEY.format("theory_grades")),
+            "take_snapshots": (snapshot, GRADE_KEY.format("practical_grades")),
+            "group_statistics_by_subject": (lambda conn: result_analytics.group_statistics(
+                conn, "subject", department=department, batch=batch), "idx_students_section"),
+            "group_statistics_by_section": (lambda conn: result_analytics.group_statistics(
+                conn, "section", subject_code=subject_code), "idx_theory_grades_subject"),
+            "overall_statistics": (lambda conn: result_analytics.overall_statistics(
+                conn, department=department, semester=semester), "idx_students_section"),
+            "marks_histogram": (lambda conn: result_analytics.marks_histogram(
+                conn, 10, department=department), "idx_students_section"),
+            "cgpa_trend": (lambda conn: result_analytics.cgpa_trend(conn, department, batch),
+                           "sqlite_autoindex_semester_results_1"),
+        }
+
+    def traced(self, call):
+        """The statements call(conn) runs, with their parameters bound; its writes are rolled back"""
+        statements = []
+        self.conn.execute("SAVEPOINT traced")
+        self.conn.set_trace_callback(statements.append)
+        try:
+            call(self.conn)
+        finally:
+            self.conn.set_trace_callback(None)
+            self.conn.execute("ROLLBACK TO traced")
+            self.conn.execute("RELEASE traced")
+        # Trigger bodies are traced as comments; they are covered where they are defined
+        return [sql for sql in dict.fromkeys(statements) if sql.split(None, 1)[0].upper() in STATEMENT_KINDS]
+
+    def assert_no_full_scan(self, name, sql):
+        for line in self.plan(sql):
+            words = line.split()
+            if words[0] != "SCAN":
+                continue
+            table = self.table_for_alias(sql, words[1])
+            if table not in LARGE_TABLES or any(index in line for index in PARTIAL_INDEXES):
+                continue
+            self.assertIn(name, FULL_READS, f"{name} scans {table}: {line}")
+            self.assertIn("USING", line, f"{name} scans {table} without an index: {line}")
+
+    def table_for_alias(self, sql, alias):
+        """Resolve a plan's table alias (t, p, s, ...) back to its table"""
+        words = sql.replace(",", " ").split()
+        for index, word in enumerate(words[:-1]):
+            if words[index + 1] == alias and word in LARGE_TABLES:
+                return word
+        return alias
+
+
+if __name__ == "__main__":
+    unittest.main()
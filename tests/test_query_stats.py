@@ -0,0 +1,71 @@
+"""Every statement run through an instrumented connection must reach QueryStats."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import query_stats  # noqa: E402
+
+
+class QueryStatsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = query_stats.QueryStats(slow_ms=None)
+        self.conn = query_stats.connect(":memory:", self.stats)
+        self.conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn.executemany("INSERT INTO t (name) VALUES (?)", [("a",), ("b",), ("c",)])
+        self.stats.reset()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def calls(self, sql):
+        stats = self.stats.statements.get(query_stats.normalize_sql(sql))
+        return (stats.calls, stats.rows) if stats else (0, 0)
+
+    def test_single_row_fetchone_is_recorded(self):
+        sql = "SELECT COUNT(*) FROM t"
+        self.assertEqual(self.conn.execute(sql).fetchone(), (3,))
+        self.assertEqual(self.calls(sql), (1, 1))
+
+    def test_shared_cursor_is_recorded_on_next_execute(self):
+        cursor = self.conn.cursor()
+        sql = "SELECT name FROM t WHERE id = ?"
+        cursor.execute(sql, (1,))
+        cursor.fetchone()
+        cursor.execute("SELECT 1")
+        self.assertEqual(self.calls(sql), (1, 1))
+
+    def test_repeated_fetchone_counts_every_row(self):
+        cursor = self.conn.cursor()
+        sql = "SELECT name FROM t ORDER BY id"
+        cursor.execute(sql)
+        while cursor.fetchone() is not None:
+            pass
+        self.assertEqual(self.calls(sql), (1, 3))
+
+    def test_repeated_fetchone_then_close_counts_rows_read(self):
+        cursor = self.conn.cursor()
+        sql = "SELECT name FROM t ORDER BY id"
+        cursor.execute(sql)
+        cursor.fetchone()
+        cursor.fetchone()
+        self.assertEqual(self.calls(sql), (0, 0))
+        cursor.close()
+        self.assertEqual(self.calls(sql), (1, 2))
+
+    def test_dropped_cursor_is_recorded(self):
+        sql = "SELECT name FROM t"
+        for row in self.conn.execute(sql):
+            break
+        self.assertEqual(self.calls(sql), (1, 1))
+
+    def test_fetchall_is_recorded(self):
+        sql = "SELECT name FROM t ORDER BY id"
+        self.conn.execute(sql).fetchall()
+        self.assertEqual(self.calls(sql), (1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
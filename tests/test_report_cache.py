@@ -0,0 +1,60 @@
+"""Report models must never be served after a change to what they show."""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_dataset import DatasetGenerator  # noqa: E402
+from report_cache import ReportCache, student_version  # noqa: E402
+
+
+class ReportCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        with contextlib.redirect_stdout(io.StringIO()):
+            DatasetGenerator(self.conn, students=100).generate()
+        self.student_id, self.department, self.batch, self.semester, self.section = self.conn.execute(
+            "SELECT student_id, department, batch, current_semester, section FROM students "
+            "WHERE student_id IN (SELECT student_id FROM theory_grades) LIMIT 1").fetchone()
+        self.cache = ReportCache(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assert_version_moves(self, sql, params=()):
+        version = student_version(self.conn, self.student_id)
+        self.conn.execute(sql, params)
+        self.assertGreater(student_version(self.conn, self.student_id), version, sql)
+
+    def test_hit_until_grade_write(self):
+        report = self.cache.report(self.student_id)
+        self.assertIs(self.cache.report(self.student_id), report)
+        self.conn.execute("UPDATE theory_grades SET total_marks = total_marks + 1 WHERE student_id = ?",
+                          (self.student_id,))
+        self.assertIsNot(self.cache.report(self.student_id), report)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_section_changes_move_version(self):
+        scope = (self.section, self.department, self.semester, self.batch)
+        where = " WHERE section_name = ? AND department = ? AND semester = ? AND batch = ?"
+        self.assert_version_moves("UPDATE sections SET class_teacher = 'New Teacher'" + where, scope)
+        self.assert_version_moves("UPDATE sections SET batch = batch + 1" + where, scope)
+        self.assert_version_moves("UPDATE sections SET batch = batch - 1" + where,
+                                  (self.section, self.department, self.semester, self.batch + 1))
+        self.assert_version_moves("DELETE FROM sections" + where, scope)
+        self.assert_version_moves("INSERT INTO sections (section_name, department, semester, batch, class_teacher) "
+                                  "VALUES (?, ?, ?, ?, 'Another Teacher')", scope)
+
+    def test_re_added_student_gets_new_version(self):
+        row = self.conn.execute("SELECT * FROM students WHERE student_id = ?", (self.student_id,)).fetchone()
+        self.assert_version_moves("DELETE FROM students WHERE student_id = ?", (self.student_id,))
+        self.assert_version_moves(f"INSERT INTO students VALUES ({', '.join('?' * len(row))})", row)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""semester_results must agree with the live SGPA query after writes it depends on."""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries  # noqa: E402
+from generate_dataset import DatasetGenerator  # noqa: E402
+
+
+class SemesterResultsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        with contextlib.redirect_stdout(io.StringIO()):
+            DatasetGenerator(self.conn, students=200).generate()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assert_results_match_live_gpa(self, student_ids):
+        for student_id in student_ids:
+            with self.subTest(student=student_id):
+                live = {semester: (credits, sgpa) for semester, credits, sgpa, _ in
+                        self.conn.execute(queries.STUDENT_SEMESTER_GPA, (student_id,))}
+                stored = {semester: (credits, sgpa) for semester, credits, sgpa in self.conn.execute(
+                    "SELECT semester, credits, sgpa FROM semester_results WHERE student_id = ?", (student_id,))}
+                self.assertEqual(stored, live)
+
+    def test_credit_edit_refreshes_results(self):
+        subject_code = self.conn.execute("SELECT subject_code FROM theory_grades LIMIT 1").fetchone()[0]
+        student_ids = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT student_id FROM theory_grades WHERE subject_code = ?", (subject_code,))]
+        versions = self.conn.execute("SELECT SUM(version) FROM result_scope_versions").fetchone()[0]
+
+        self.conn.execute("UPDATE subjects SET credits = credits + 6 WHERE subject_code = ?", (subject_code,))
+
+        self.assert_results_match_live_gpa(student_ids)
+        self.assertGreater(self.conn.execute("SELECT SUM(version) FROM result_scope_versions").fetchone()[0],
+                           versions, "rank caches must see the credit change")
+
+
+if __name__ == "__main__":
+    unittest.main()
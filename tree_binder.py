@@ -0,0 +1,127 @@
+class TreeviewBinder:
+    """Keep a ttk.Treeview in sync with a keyed result set.
+
+    Rows are identified by primary key (used as the Treeview iid). set_rows()
+    compares the new result set with what is already shown and applies only
+    the inserts, updates, deletes and moves, so unchanged rows keep their
+    selection and the scroll position is preserved. Large deltas are applied
+    in chunks from after_idle so the window stays responsive.
+    """
+
+    CHUNK_SIZE = 500
+
+    def __init__(self, tree, chunk_size=CHUNK_SIZE):
+        self.tree = tree
+        self.chunk_size = chunk_size
+        self.rows = {}   # iid -> values tuple as last applied
+        self.job = None  # after_idle id of a pending chunk
+        self.ops = []
+
+    def set_rows(self, keyed_rows):
+        """Show exactly keyed_rows, an iterable of (key, values) in display order"""
+        self.cancel()
+
+        new_rows = {}
+        new_order = []
+        for key, values in keyed_rows:
+            iid = str(key)
+            new_rows[iid] = tuple(values)
+            new_order.append(iid)
+
+        ops = []
+        current = []
+        for iid in self.tree.get_children():
+            if iid in new_rows:
+                current.append(iid)
+            else:
+                ops.append(("delete", iid, None, None))
+
+        for iid in new_order:
+            if iid in self.rows and self.rows[iid] != new_rows[iid]:
+                ops.append(("update", iid, None, new_rows[iid]))
+
+        ops.extend(self._placement_ops(current, new_order, new_rows))
+
+        self.ops = ops
+        self._apply_chunk()
+
+    def _placement_ops(self, current, new_order, new_rows):
+        """Inserts and moves that turn the surviving rows into new_order"""
+        existing = set(current)
+        common = [iid for iid in new_order if iid in existing]
+
+        if common == current:
+            # Relative order unchanged: inserting in ascending index order
+            # lands every new row in its final position
+            return [("insert", iid, index, new_rows[iid])
+                    for index, iid in enumerate(new_order) if iid not in existing]
+
+        # Order changed (e.g. a different sort): walk the target order and
+        # move only rows that are out of place
+        ops = []
+        shown = list(current)
+        for index, iid in enumerate(new_order):
+            if iid not in existing:
+                shown.insert(index, iid)
+                ops.append(("insert", iid, index, new_rows[iid]))
+            elif shown[index] != iid:
+                shown.remove(iid)
+                shown.insert(index, iid)
+                ops.append(("move", iid, index, None))
+        return ops
+
+    def _apply_chunk(self):
+        self.job = None
+        chunk, self.ops = self.ops[:self.chunk_size], self.ops[self.chunk_size:]
+        self._apply(chunk)
+        if self.ops:
+            self.job = self.tree.after_idle(self._apply_chunk)
+
+    def _apply(self, ops):
+        tree = self.tree
+        for op, iid, index, values in ops:
+            if op == "delete":
+                tree.delete(iid)
+                self.rows.pop(iid, None)
+            elif op == "update":
+                tree.item(iid, values=values)
+                self.rows[iid] = values
+            elif op == "insert":
+                tree.insert("", index, iid=iid, values=values)
+                self.rows[iid] = values
+            else:
+                tree.move(iid, "", index)
+
+    def cancel(self):
+        """Drop any chunks not yet applied; the next diff starts from what is shown"""
+        if self.job is not None:
+            self.tree.after_cancel(self.job)
+            self.job = None
+        self.ops = []
+
+    def flush(self):
+        """Apply any pending chunks right away"""
+        ops = self.ops
+        self.cancel()
+        self._apply(ops)
+
+    def update_row(self, key, values):
+        """Apply a single-row change: update, append, or delete if values is None"""
+        self.flush()
+        iid = str(key)
+        if values is None:
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+            self.rows.pop(iid, None)
+            return
+
+        values = tuple(values)
+        if self.tree.exists(iid):
+            if self.rows.get(iid) != values:
+                self.tree.item(iid, values=values)
+        else:
+            self.tree.insert("", "end", iid=iid, values=values)
+        self.rows[iid] = values
+
+    def clear(self):
+        self.set_rows([])